@@ -9,10 +9,10 @@ Usage:
 """
 import asyncio
 import argparse
+import time
 from pathlib import Path
-from typing import Optional, List, Tuple
-import json
-import re
+from typing import Callable, Optional, List, Tuple
+from urllib.parse import urlparse
 
 from playwright.async_api import async_playwright, Page, Browser
 
@@ -23,7 +23,16 @@ from config import (
     SLOW_MO,
     TIMEOUT,
     DOWNLOADS_DIR,
-    AUTH_STATE_FILE
+    AUTH_STATE_FILE,
+    AI_CONCURRENCY,
+    RESPONSE_STREAM_IDLE_TIMEOUT,
+    RESPONSE_CAPTURE_MODE,
+    PAGE_READY_TIMEOUT,
+    MENU_TIMEOUT,
+    UPLOAD_READY_TIMEOUT,
+    SEND_READY_TIMEOUT,
+    RESPONSE_START_TIMEOUT,
+    NEW_CHAT_TIMEOUT
 )
 from utils import (
     logger,
@@ -37,8 +46,194 @@ from utils import (
     clean_message,
     get_unique_urls,
     get_video_path,
-    migrate_old_output_format
+    migrate_old_output_format,
+    OrderedResultWriter
 )
+from network_capture import NetworkResponseCapture
+from json_scanner import IncrementalJSONScanner
+from metrics import StageMetrics
+from selector_cache import SelectorResolver
+
+
+# Containers that may hold the assistant's answer (most specific first)
+RESPONSE_SELECTORS = [
+    '.assistant-message',
+    '.ai-response',
+    '.message-content',
+    '[data-role="assistant"]',
+    '.response-text',
+    '.chat-message:last-child',
+    'div[class*="response"]',
+    'div[class*="message"]:last-of-type',
+    '[class*="markdown"]',
+    '[class*="prose"]',
+]
+
+# Upload controls; a file input is used directly, anything else is clicked first
+UPLOAD_SELECTORS = [
+    'button:has-text("upload")',
+    'button:has-text("Upload")',
+    '[aria-label*="upload"]',
+    '[aria-label*="Upload"]',
+    'input[type="file"]',
+    '.upload-button',
+    '[data-testid="upload"]',
+    'label:has-text("Upload")',
+    'div:has-text("Upload files")'
+]
+
+# Message box for the prompt
+PROMPT_INPUT_SELECTORS = [
+    'textarea',
+    'input[type="text"]',
+    '[contenteditable="true"]',
+    '.message-input',
+    '[placeholder*="message"]',
+    '[placeholder*="Message"]',
+    '[data-testid="text-input"]'
+]
+
+# Send button next to the message box
+SEND_BUTTON_SELECTORS = [
+    'button[type="submit"]',
+    'button:has-text("Send")',
+    'button:has-text("send")',
+    '[aria-label*="send"]',
+    '[aria-label*="Send"]',
+    '.send-button',
+    'button svg',  # Icon button
+]
+
+# Message box; visible once the chat page is ready for input
+COMPOSER_SELECTOR = 'textarea, [contenteditable="true"]'
+
+# Reasoning-level selector button (brain icon), most specific first
+REASONING_TRIGGER_SELECTORS = [
+    '#reasoning-selector-button',
+    '[data-testid="reasoning-selector-trigger-button"]',
+    '[aria-label="Reasoning level"]',
+    'button[id="reasoning-selector-button"]',
+]
+
+# "Minimal" entry of the opened reasoning dropdown
+MINIMAL_OPTION_SELECTORS = [
+    '[data-testid*="minimal"]',
+    'div:has-text("Minimal")',
+    'span:has-text("Minimal")',
+    '[role="option"]:has-text("Minimal")',
+    '[role="menuitem"]:has-text("Minimal")',
+    'button:has-text("Minimal")',
+    'li:has-text("Minimal")',
+    'label:has-text("Minimal")',
+]
+
+# Levels the reasoning button can show
+REASONING_LEVELS = ["Minimal", "Low", "Medium", "High"]
+
+# Text, label and tooltip of the first reasoning button found (one round trip)
+REASONING_LABEL_JS = """
+(selectors) => {
+    for (const sel of selectors) {
+        let el;
+        try { el = document.querySelector(sel); } catch (e) { continue; }
+        if (!el) continue;
+        return [el.textContent, el.getAttribute('aria-label'), el.getAttribute('title'),
+                el.getAttribute('data-value'), el.getAttribute('data-state')].filter(Boolean).join(' ');
+    }
+    return null;
+}
+"""
+
+# The reasoning-level dropdown (or its Minimal option) while it is open
+REASONING_MENU_SELECTOR = '[role="menu"], [role="listbox"], [data-testid*="minimal"]'
+
+# True once the attached video shows up (file chip or its name) and no
+# progress bar or busy marker is left. The send button is not checked: chat
+# UIs keep it disabled while the prompt box is empty (see SEND_READY_JS).
+UPLOAD_READY_JS = """
+(fileName) => {
+    if (document.querySelector('[role="progressbar"], [aria-busy="true"], [class*="uploading" i]')) return false;
+    return document.body.innerText.includes(fileName) ||
+        !!document.querySelector('[class*="attachment" i], [data-testid*="attachment" i], [class*="file-chip" i]');
+}
+"""
+
+# True once the send button is enabled; checked after the prompt is typed
+SEND_READY_JS = """
+() => {
+    const send = document.querySelector('button[type="submit"], [aria-label*="send" i], .send-button');
+    return !send || !(send.disabled || send.getAttribute('aria-disabled') === 'true');
+}
+"""
+
+# True once any response container has text
+RESPONSE_STARTED_JS = """
+(selectors) => selectors.some(sel => {
+    let nodes;
+    try { nodes = document.querySelectorAll(sel); } catch (e) { return false; }
+    return nodes.length > 0 && (nodes[nodes.length - 1].textContent || '').trim().length > 0;
+})
+"""
+
+# True while no response container has text (an empty conversation)
+CHAT_EMPTY_JS = "(selectors) => !(" + RESPONSE_STARTED_JS.strip() + ")(selectors)"
+
+# Controls that start a new conversation in the chat SPA
+NEW_CHAT_SELECTORS = [
+    '[data-testid*="new-chat"]',
+    '[aria-label*="New chat" i]',
+    'button:has-text("New chat")',
+    'a:has-text("New chat")',
+]
+
+# Route the SPA to the chat URL without a reload (when there is no New chat control)
+SPA_NAVIGATE_JS = """
+(url) => {
+    window.history.pushState({}, '', url);
+    window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+}
+"""
+
+# Name of the exposed Python callback the observer pushes response text to
+RESPONSE_BINDING = "__mvoicePushResponse"
+
+# Watches the chat DOM and pushes the longest response text to Python whenever
+# it changes. Mutations are batched (100ms) so a token stream doesn't flood CDP.
+RESPONSE_OBSERVER_JS = """
+([selectors, binding]) => {
+    if (window.__mvoiceObserver) window.__mvoiceObserver.disconnect();
+    let lastText = null;
+    let scheduled = false;
+    const read = () => {
+        let best = '';
+        for (const sel of selectors) {
+            let nodes;
+            try { nodes = document.querySelectorAll(sel); } catch (e) { continue; }
+            if (!nodes.length) continue;
+            const text = nodes[nodes.length - 1].textContent || '';
+            if (text.length > best.length) best = text;
+        }
+        return best;
+    };
+    const push = () => {
+        scheduled = false;
+        const text = read();
+        if (text && text !== lastText) {
+            lastText = text;
+            window[binding](text);
+        }
+    };
+    const observer = new MutationObserver(() => {
+        if (!scheduled) {
+            scheduled = true;
+            setTimeout(push, 100);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    window.__mvoiceObserver = observer;
+    push();
+}
+"""
 
 
 class AIUploader:
@@ -46,12 +241,36 @@ class AIUploader:
     Handles uploading videos to AI platform and extracting responses.
     """
     
-    def __init__(self, headless: bool = BROWSER_HEADLESS, prompt: str = DEFAULT_PROMPT):
+    def __init__(
+        self,
+        headless: bool = BROWSER_HEADLESS,
+        prompt: str = DEFAULT_PROMPT,
+        ai_url: str = AI_URL,
+        capture_mode: str = RESPONSE_CAPTURE_MODE,
+        metrics: Optional[StageMetrics] = None,
+        selectors: Optional[SelectorResolver] = None
+    ):
         self.headless = headless
         self.prompt = prompt
+        self.ai_url = ai_url
+        self.capture_mode = capture_mode
+        # Per-stage timings (shared by every session opened from this one)
+        self.metrics = metrics or StageMetrics()
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
         self.context = None
+        self.playwright = None
+        self._owns_browser = True
+        self._response_stream: Optional[asyncio.Queue] = None
+        self._stream_bound = False
+        self._network_capture: Optional[NetworkResponseCapture] = None
+        self._json_scanner = IncrementalJSONScanner(METRICS_COLUMNS)
+        # Reasoning level set on the current page load (kept by start_new_chat)
+        self._reasoning_set = False
+        # The SPA route did not clear the chat on this page; reload instead
+        self._spa_route_failed = False
+        # Learned fallback selectors (shared by every session opened from this one)
+        self.selectors = selectors or SelectorResolver()
         
     async def __aenter__(self):
         await self.start()
@@ -68,6 +287,11 @@ class AIUploader:
             slow_mo=SLOW_MO
         )
         
+        await self._open_context()
+        logger.info("Browser started for AI upload")
+    
+    async def _open_context(self):
+        """Open a browser context (with saved auth state if available) and a page."""
         # Load saved auth state if exists
         if AUTH_STATE_FILE.exists():
             logger.info("Loading saved login session...")
@@ -77,10 +301,42 @@ class AIUploader:
             self.context = await self.browser.new_context()
         
         self.page = await self.context.new_page()
-        logger.info("Browser started for AI upload")
+        self._stream_bound = False
+        self._reasoning_set = False
+        self._spa_route_failed = False
+        if self.capture_mode == "network":
+            self._network_capture = NetworkResponseCapture(self.page)
+    
+    async def new_session(self) -> "AIUploader":
+        """
+        Open another chat session on the same browser.
+        
+        The new session gets its own context and page, so it can process a
+        video while this one is waiting on the AI.
+        
+        Returns:
+            AIUploader bound to the shared browser
+        """
+        session = type(self)(
+            headless=self.headless,
+            prompt=self.prompt,
+            ai_url=self.ai_url,
+            capture_mode=self.capture_mode,
+            metrics=self.metrics,
+            selectors=self.selectors
+        )
+        session.browser = self.browser
+        session._owns_browser = False
+        await session._open_context()
+        return session
         
     async def close(self):
-        """Close the browser."""
+        """Close the browser (or only the context for a shared-browser session)."""
+        if not self._owns_browser:
+            if self.context:
+                await self.context.close()
+            return
+        self.selectors.save()
         if self.browser:
             await self.browser.close()
         if self.playwright:
@@ -99,9 +355,9 @@ class AIUploader:
         After login, save the session for future use.
         """
         logger.info("Starting login process...")
-        logger.info(f"Navigating to {AI_URL}")
+        logger.info(f"Navigating to {self.ai_url}")
         
-        await self.page.goto(AI_URL, timeout=TIMEOUT * 2)
+        await self.page.goto(self.ai_url, timeout=TIMEOUT * 2)
         
         print("\n" + "="*60)
         print("LOGIN REQUIRED")
@@ -130,7 +386,7 @@ class AIUploader:
             True if logged in, False if need to login
         """
         try:
-            await self.page.goto(AI_URL, timeout=TIMEOUT)
+            await self.page.goto(self.ai_url, timeout=TIMEOUT)
             await self.page.wait_for_timeout(3000)
             
             # Check for common login page indicators
@@ -166,62 +422,173 @@ class AIUploader:
             logger.warning(f"Error checking login status: {e}")
             return False
     
+    async def _wait_for(self, name: str, condition) -> bool:
+        """
+        Await a Playwright condition wait and report the time it took.
+        
+        The duration is logged and recorded as the `wait_<name>` stage.
+        
+        Args:
+            name: Short label for the condition (e.g. "upload_ready")
+            condition: Awaitable Playwright wait (wait_for_selector/wait_for_function)
+                that carries its own timeout
+            
+        Returns:
+            True if the condition held, False on timeout/error (caller continues)
+        """
+        start = time.perf_counter()
+        try:
+            await condition
+            ok = True
+        except Exception as e:
+            logger.debug(f"Wait for {name} ended without the condition: {e}")
+            ok = False
+        elapsed = time.perf_counter() - start
+        self.metrics.record(f"wait_{name}", elapsed, ok=ok)
+        if ok:
+            logger.info(f"Waited {elapsed:.2f}s for {name}")
+        else:
+            logger.warning(f"Timed out after {elapsed:.2f}s waiting for {name}, continuing")
+        return ok
+    
     async def navigate_to_ai(self):
         """Navigate to the AI platform."""
-        logger.info(f"Navigating to {AI_URL}")
-        await self.page.goto(AI_URL, timeout=TIMEOUT)
+        logger.info(f"Navigating to {self.ai_url}")
+        await self.page.goto(self.ai_url, timeout=TIMEOUT)
         await self.page.wait_for_load_state("networkidle", timeout=TIMEOUT)
         logger.info("AI platform loaded")
     
+    async def _page_is_healthy(self) -> bool:
+        """True if the page is open on the AI site with the message box visible."""
+        try:
+            if self.page.is_closed():
+                return False
+            if urlparse(self.page.url).netloc != urlparse(self.ai_url).netloc:
+                return False
+            return await self.page.locator(COMPOSER_SELECTOR).first.is_visible()
+        except Exception:
+            return False
+    
+    async def start_new_chat(self) -> bool:
+        """
+        Start an empty conversation without reloading the page.
+        
+        Clicks the site's "New chat" control, or routes the SPA back to the
+        chat URL if there is none. The reasoning level stays as it was. Once
+        the SPA route has failed to clear the chat on this page it is not
+        tried again (each failure costs NEW_CHAT_TIMEOUT plus a reload).
+        
+        Returns:
+            True if the old conversation is gone and the message box is ready
+        """
+        try:
+            clicked = False
+            for selector in self.selectors.ordered('chat.new_chat', NEW_CHAT_SELECTORS):
+                element = self.page.locator(selector).first
+                if await element.count() > 0 and await element.is_visible():
+                    await element.click()
+                    self.selectors.found('chat.new_chat', selector)
+                    clicked = True
+                    break
+            if not clicked:
+                self.selectors.missed('chat.new_chat')
+                if self._spa_route_failed:
+                    return False
+                await self.page.evaluate(SPA_NAVIGATE_JS, self.ai_url)
+        except Exception as e:
+            logger.info(f"New chat failed ({e})")
+            return False
+        
+        cleared = await self._wait_for('new_chat', self.page.wait_for_function(
+            CHAT_EMPTY_JS, arg=RESPONSE_SELECTORS, timeout=NEW_CHAT_TIMEOUT))
+        if not cleared and not clicked:
+            logger.info("SPA route did not clear the chat, reloading for every new chat on this page")
+            self._spa_route_failed = True
+        return cleared and await self._page_is_healthy()
+    
+    async def reset_chat(self, reload: bool = False) -> bool:
+        """
+        Get an empty chat for the next video.
+        
+        Uses start_new_chat while the page looks healthy; does a full
+        navigate_to_ai when `reload` is set, the page is not on the AI site,
+        the message box is missing or the new chat did not clear.
+        
+        Args:
+            reload: Force a full reload (e.g. retrying after an error)
+            
+        Returns:
+            True if the page was reloaded (the reasoning level must be set again)
+        """
+        if not reload and await self._page_is_healthy():
+            if await self.start_new_chat():
+                logger.info("Started a new chat in-page")
+                return False
+            logger.info("New chat did not clear the conversation, reloading the page")
+        
+        await self.navigate_to_ai()
+        self._reasoning_set = False
+        await self._wait_for('page_ready', self.page.wait_for_selector(
+            COMPOSER_SELECTOR, state='visible', timeout=PAGE_READY_TIMEOUT))
+        return True
+    
+    async def get_reasoning_level(self) -> Optional[str]:
+        """
+        Read the current reasoning level from the selector button, without opening it.
+        
+        Returns:
+            One of REASONING_LEVELS, or None if the button or its level can't be read
+        """
+        try:
+            label = await self.page.evaluate(REASONING_LABEL_JS, self.selectors.ordered(
+                'chat.reasoning_trigger', REASONING_TRIGGER_SELECTORS))
+        except Exception:
+            return None
+        label = (label or '').lower()
+        found = [level for level in REASONING_LEVELS if level.lower() in label]
+        # A label naming several levels (e.g. a tooltip listing them) says nothing
+        return found[0] if len(found) == 1 else None
+    
     async def set_reasoning_minimal(self) -> bool:
         """
         Set reasoning level to Minimal for faster responses.
         
+        Skips the dropdown when the button already shows Minimal. The trigger
+        and option selectors that worked are learned by the selector resolver.
+        
         Returns:
-            True if successful, False otherwise
+            True if successful (or already Minimal), False otherwise
         """
         try:
+            if await self.get_reasoning_level() == 'Minimal':
+                logger.info("Reasoning level already Minimal")
+                return True
+            
             logger.info("Setting reasoning level to Minimal...")
             
             # Click on "Reasoning Level" button (brain icon)
-            # Using specific attributes from the actual button
-            reasoning_selectors = [
-                '#reasoning-selector-button',
-                '[data-testid="reasoning-selector-trigger-button"]',
-                '[aria-label="Reasoning level"]',
-                'button[id="reasoning-selector-button"]',
-            ]
-            
             clicked = False
-            for selector in reasoning_selectors:
+            for selector in self.selectors.ordered('chat.reasoning_trigger', REASONING_TRIGGER_SELECTORS):
                 try:
                     element = self.page.locator(selector).first
                     if await element.is_visible(timeout=2000):
                         await element.click()
                         clicked = True
+                        self.selectors.found('chat.reasoning_trigger', selector)
                         logger.info("Clicked Reasoning Level button")
-                        await self.page.wait_for_timeout(1000)
+                        await self._wait_for('menu_open', self.page.wait_for_selector(
+                            REASONING_MENU_SELECTOR, state='visible', timeout=MENU_TIMEOUT))
                         break
                 except Exception:
                     continue
             
             if not clicked:
+                self.selectors.missed('chat.reasoning_trigger')
                 logger.warning("Could not find Reasoning Level button")
                 return False
             
             # Click on "Minimal" option in the dropdown
-            minimal_selectors = [
-                '[data-testid*="minimal"]',
-                'div:has-text("Minimal")',
-                'span:has-text("Minimal")',
-                '[role="option"]:has-text("Minimal")',
-                '[role="menuitem"]:has-text("Minimal")',
-                'button:has-text("Minimal")',
-                'li:has-text("Minimal")',
-                'label:has-text("Minimal")',
-            ]
-            
-            for selector in minimal_selectors:
+            for selector in self.selectors.ordered('chat.reasoning_minimal', MINIMAL_OPTION_SELECTORS):
                 try:
                     elements = self.page.locator(selector)
                     count = await elements.count()
@@ -229,13 +596,16 @@ class AIUploader:
                         element = elements.nth(i)
                         if await element.is_visible(timeout=1000):
                             await element.click()
+                            self.selectors.found('chat.reasoning_minimal', selector)
                             logger.info("✓ Set reasoning to Minimal")
-                            await self.page.wait_for_timeout(500)
+                            await self._wait_for('menu_closed', self.page.wait_for_selector(
+                                REASONING_MENU_SELECTOR, state='hidden', timeout=MENU_TIMEOUT))
                             return True
                 except Exception:
                     continue
             
             # Close dropdown if Minimal not found
+            self.selectors.missed('chat.reasoning_minimal')
             logger.warning("Could not find Minimal option")
             await self.page.keyboard.press("Escape")
             return False
@@ -255,24 +625,14 @@ class AIUploader:
             True if successful, False otherwise
         """
         try:
-            # Look for upload button/area
-            upload_selectors = [
-                'button:has-text("upload")',
-                'button:has-text("Upload")',
-                '[aria-label*="upload"]',
-                '[aria-label*="Upload"]',
-                'input[type="file"]',
-                '.upload-button',
-                '[data-testid="upload"]',
-                'label:has-text("Upload")',
-                'div:has-text("Upload files")'
-            ]
-            
-            # First try to find and click upload button
-            for selector in upload_selectors:
+            # First try to find and click upload button (learned winner first)
+            found = False
+            for selector in self.selectors.ordered('chat.upload_control', UPLOAD_SELECTORS):
                 try:
                     element = self.page.locator(selector).first
                     if await element.is_visible(timeout=2000):
+                        found = True
+                        self.selectors.found('chat.upload_control', selector)
                         # Check if it's a file input
                         if selector == 'input[type="file"]':
                             await element.set_input_files(str(video_path))
@@ -280,10 +640,13 @@ class AIUploader:
                             return True
                         else:
                             await element.click()
-                            await self.page.wait_for_timeout(1000)
+                            await self._wait_for('file_input', self.page.wait_for_selector(
+                                'input[type="file"]', state='attached', timeout=MENU_TIMEOUT))
                             break
                 except Exception:
                     continue
+            if not found:
+                self.selectors.missed('chat.upload_control')
             
             # After clicking upload button, look for file input
             file_input = self.page.locator('input[type="file"]').first
@@ -310,46 +673,33 @@ class AIUploader:
             True if successful, False otherwise
         """
         try:
-            # Look for text input/textarea
-            input_selectors = [
-                'textarea',
-                'input[type="text"]',
-                '[contenteditable="true"]',
-                '.message-input',
-                '[placeholder*="message"]',
-                '[placeholder*="Message"]',
-                '[data-testid="text-input"]'
-            ]
-            
-            for selector in input_selectors:
+            # Look for text input/textarea (learned winners first)
+            for selector in self.selectors.ordered('chat.prompt_box', PROMPT_INPUT_SELECTORS):
                 try:
                     element = self.page.locator(selector).first
                     if await element.is_visible(timeout=2000):
                         await element.fill(prompt)
+                        self.selectors.found('chat.prompt_box', selector)
                         logger.info("Prompt entered")
                         
-                        # Look for send button
-                        send_selectors = [
-                            'button[type="submit"]',
-                            'button:has-text("Send")',
-                            'button:has-text("send")',
-                            '[aria-label*="send"]',
-                            '[aria-label*="Send"]',
-                            '.send-button',
-                            'button svg',  # Icon button
-                        ]
+                        # Send is enabled once the prompt is in (and the upload done)
+                        await self._wait_for('send_ready', self.page.wait_for_function(
+                            SEND_READY_JS, timeout=SEND_READY_TIMEOUT))
                         
-                        for send_selector in send_selectors:
+                        # Look for send button
+                        for send_selector in self.selectors.ordered('chat.send_button', SEND_BUTTON_SELECTORS):
                             try:
                                 send_btn = self.page.locator(send_selector).first
                                 if await send_btn.is_visible(timeout=1000):
                                     await send_btn.click()
+                                    self.selectors.found('chat.send_button', send_selector)
                                     logger.info("Prompt sent")
                                     return True
                             except Exception:
                                 continue
                         
                         # Try pressing Enter if no button found
+                        self.selectors.missed('chat.send_button')
                         await element.press("Enter")
                         logger.info("Prompt sent via Enter key")
                         return True
@@ -357,6 +707,7 @@ class AIUploader:
                 except Exception:
                     continue
             
+            self.selectors.missed('chat.prompt_box')
             logger.warning("Could not find prompt input")
             return False
             
@@ -364,6 +715,84 @@ class AIUploader:
             logger.error(f"Error sending prompt: {e}")
             return False
     
+    def _is_complete_json(self, text: str, scanner: Optional[IncrementalJSONScanner] = None) -> bool:
+        """True if text holds a JSON object with every metric key (and isn't the prompt echo)."""
+        # Only the text added since the last call is scanned
+        if not (scanner or self._json_scanner).feed(text).complete:
+            return False
+        # The user's own prompt contains the example JSON; never accept it
+        prompt_head = self.prompt.strip().lower()[:100]
+        return not (prompt_head and prompt_head in text.lower())
+    
+    def _new_json_check(self) -> Callable[[str], bool]:
+        """_is_complete_json with a scanner of its own, for one network stream."""
+        scanner = IncrementalJSONScanner(METRICS_COLUMNS)
+        return lambda text: self._is_complete_json(text, scanner)
+    
+    async def _on_response_text(self, text: str):
+        """Receive response text pushed by the DOM observer."""
+        if self._response_stream is not None:
+            self._response_stream.put_nowait(text)
+    
+    async def _stream_response(self, timeout: int) -> Optional[str]:
+        """
+        Capture the response as it renders, using a MutationObserver.
+        
+        Returns as soon as the text holds a JSON object with every metric key,
+        without polling or waiting for the text to be stable.
+        
+        Args:
+            timeout: Maximum wait time in milliseconds
+            
+        Returns:
+            Raw response text, or None if the observer could not be installed,
+            the DOM went quiet, or no complete JSON arrived (caller polls instead)
+        """
+        try:
+            if not self._stream_bound:
+                await self.page.expose_function(RESPONSE_BINDING, self._on_response_text)
+                self._stream_bound = True
+            self._response_stream = asyncio.Queue()
+            await self.page.evaluate(RESPONSE_OBSERVER_JS, [RESPONSE_SELECTORS, RESPONSE_BINDING])
+        except Exception as e:
+            logger.info(f"Response observer unavailable ({e}), using polling")
+            self._response_stream = None
+            return None
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000
+        updates = 0
+        
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.info("Streaming capture timed out, using polling")
+                    return None
+                try:
+                    text = await asyncio.wait_for(
+                        self._response_stream.get(),
+                        timeout=min(remaining, RESPONSE_STREAM_IDLE_TIMEOUT)
+                    )
+                except asyncio.TimeoutError:
+                    logger.info(f"No response updates for {RESPONSE_STREAM_IDLE_TIMEOUT}s, using polling")
+                    return None
+                
+                # Drain to the newest text; only the latest snapshot matters
+                while not self._response_stream.empty():
+                    text = self._response_stream.get_nowait()
+                updates += 1
+                
+                if self._is_complete_json(text):
+                    logger.info(f"Streamed complete JSON response ({len(text)} chars, {updates} updates)")
+                    return text
+        finally:
+            self._response_stream = None
+            try:
+                await self.page.evaluate("() => window.__mvoiceObserver && window.__mvoiceObserver.disconnect()")
+            except Exception:
+                pass
+    
     async def wait_for_response(self, timeout: int = 180000) -> Optional[str]:
         """
         Wait for and extract AI response.
@@ -377,6 +806,24 @@ class AIUploader:
         try:
             # Wait for response to appear
             logger.info("Waiting for AI response...")
+            self._json_scanner.reset()
+            
+            # Network capture: rebuild the answer from the backend's stream
+            if self._network_capture is not None:
+                captured = await self._network_capture.wait(
+                    timeout / 1000,
+                    self._new_json_check,
+                    idle_timeout=RESPONSE_STREAM_IDLE_TIMEOUT
+                )
+                if captured:
+                    logger.info(f"Captured complete JSON response from network ({len(captured)} chars)")
+                    return clean_message(captured)
+                logger.info("No complete response in network traffic, reading from the page")
+            
+            # Fast path: push-based capture that returns the moment the JSON closes
+            streamed = await self._stream_response(timeout)
+            if streamed:
+                return clean_message(streamed)
             
             # Placeholder/loading texts to ignore
             loading_texts = [
@@ -404,22 +851,9 @@ class AIUploader:
                 'meaningful & different',
             ]
             
-            # Look for response container
-            response_selectors = [
-                '.assistant-message',
-                '.ai-response',
-                '.message-content',
-                '[data-role="assistant"]',
-                '.response-text',
-                '.chat-message:last-child',
-                'div[class*="response"]',
-                'div[class*="message"]:last-of-type',
-                '[class*="markdown"]',
-                '[class*="prose"]',
-            ]
-            
-            # Wait for initial response to appear
-            await self.page.wait_for_timeout(5000)
+            # Fallback: poll the DOM (table/markdown answers, or no observer)
+            await self._wait_for('response_start', self.page.wait_for_function(
+                RESPONSE_STARTED_JS, arg=RESPONSE_SELECTORS, timeout=RESPONSE_START_TIMEOUT))
             
             # Track response stability
             last_text = ""
@@ -431,9 +865,11 @@ class AIUploader:
             
             for attempt in range(max_attempts):
                 current_text = ""
+                current_selector = None
                 
-                # Try each selector
-                for selector in response_selectors:
+                # Try each selector; once the learned container has text the rest are skipped
+                winner = self.selectors.winners.get('chat.response_container')
+                for selector in self.selectors.ordered('chat.response_container', RESPONSE_SELECTORS):
                     try:
                         elements = self.page.locator(selector)
                         count = await elements.count()
@@ -445,9 +881,15 @@ class AIUploader:
                             
                             if text and len(text) > len(current_text):
                                 current_text = text
+                                current_selector = selector
                                     
                     except Exception:
                         continue
+                    if current_text and selector == winner:
+                        break
+                
+                if current_selector:
+                    self.selectors.found('chat.response_container', current_selector)
                 
                 if current_text:
                     text_lower = current_text.lower().strip()
@@ -475,29 +917,15 @@ class AIUploader:
                     # 2) If no JSON detected, fall back to table-parsing quick-accept when any metric value
                     #    is non-empty (legacy behavior for markdown/table outputs).
                     try:
-                        # Try to extract JSON from the text
-                        text_no_fence = re.sub(r'```\w*', '', current_text)
-                        text_no_fence = re.sub(r'```', '', text_no_fence)
-                        first_brace = text_no_fence.find('{')
-                        last_brace = text_no_fence.rfind('}')
-                        json_found = False
-                        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-                            json_candidate = text_no_fence[first_brace:last_brace + 1]
-                            try:
-                                parsed_json = json.loads(json_candidate)
-                                if isinstance(parsed_json, dict):
-                                    json_found = True
-                                    found_keys = set(k.strip().lower() for k in parsed_json.keys())
-                                    required_keys = set(m.lower() for m in METRICS_COLUMNS)
-                                    if required_keys.issubset(found_keys):
-                                        logger.info("Detected full JSON object with required metric keys; accepting as complete")
-                                        return clean_message(current_text)
-                                    else:
-                                        logger.info(f"Partial JSON detected ({len(found_keys)}/{len(required_keys)} keys); waiting for remaining keys")
-                            except Exception:
-                                json_found = False
+                        # Scan the JSON object incrementally (only the new text since the last poll)
+                        if self._is_complete_json(current_text):
+                            logger.info("Detected full JSON object with required metric keys; accepting as complete")
+                            return clean_message(current_text)
+                        json_found = self._json_scanner.started
+                        if json_found:
+                            logger.info(f"Partial JSON detected ({len(self._json_scanner.keys)}/{len(METRICS_COLUMNS)} keys); waiting for remaining keys")
 
-                        # If no JSON or JSON not complete, fall back to table parse quick-accept
+                        # If no JSON object has started, fall back to table parse quick-accept
                         if not json_found:
                             parsed_quick = parse_message_to_dict(current_text)
                             if isinstance(parsed_quick, dict) and any(v.strip() for v in parsed_quick.values()):
@@ -587,7 +1015,13 @@ class AIUploader:
         # Complete if has end indicator and not truncated, OR if long enough
         return (has_end and not is_truncated) or len(text) > 1500
     
-    async def process_video(self, url: str, video_path: Path, max_retries: int = 5) -> Optional[str]:
+    async def process_video(
+        self,
+        url: str,
+        video_path: Path,
+        max_retries: int = 5,
+        save_result: bool = True
+    ) -> Optional[str]:
         """
         Process a single video: upload, prompt, and get response.
         
@@ -595,40 +1029,52 @@ class AIUploader:
             url: Original video URL
             video_path: Path to downloaded video
             max_retries: Maximum number of retries if response is incomplete
+            save_result: Write the result/failure to output.csv. Pass False when
+                the caller writes results itself (e.g. in input order).
             
         Returns:
             AI response message or None
         """
+        metrics = self.metrics
         for retry in range(max_retries):
+            attempt = retry + 1
             try:
                 if retry > 0:
                     logger.info(f"Retry {retry}/{max_retries} for {video_path.name}")
+                    metrics.count_retry('ai', url, attempt)
                 
-                # Navigate to fresh page
-                await self.navigate_to_ai()
-                await self.page.wait_for_timeout(2000)
+                # Fresh conversation (full reload when retrying after a failure)
+                with metrics.span('navigate', url, attempt):
+                    await self.reset_chat(reload=retry > 0)
                 
-                # Set reasoning level to Minimal for faster response
-                await self.set_reasoning_minimal()
-                await self.page.wait_for_timeout(500)
+                # Set reasoning level to Minimal for faster response (kept across new chats)
+                if not self._reasoning_set:
+                    with metrics.span('set_reasoning', url, attempt) as span:
+                        span.ok = self._reasoning_set = await self.set_reasoning_minimal()
                 
-                # Upload video
-                success = await self.upload_video(video_path)
-                if not success:
+                # Upload video (the span includes the wait for the upload to complete)
+                with metrics.span('upload', url, attempt) as span:
+                    span.ok = await self.upload_video(video_path)
+                    if span.ok:
+                        await self._wait_for('upload_ready', self.page.wait_for_function(
+                            UPLOAD_READY_JS, arg=video_path.name, timeout=UPLOAD_READY_TIMEOUT))
+                if not span.ok:
                     logger.error(f"Failed to upload video: {video_path}")
                     continue
                 
-                # Wait for upload to complete
-                await self.page.wait_for_timeout(3000)
-                
-                # Send prompt
-                success = await self.send_prompt(self.prompt)
-                if not success:
+                # Send prompt (start listening first so no stream frame is missed)
+                if self._network_capture is not None:
+                    self._network_capture.arm()
+                with metrics.span('prompt', url, attempt) as span:
+                    span.ok = await self.send_prompt(self.prompt)
+                if not span.ok:
                     logger.error("Failed to send prompt")
                     continue
                 
                 # Wait for response
-                response = await self.wait_for_response()
+                with metrics.span('response_wait', url, attempt) as span:
+                    response = await self.wait_for_response()
+                    span.ok = bool(response)
 
                 if response:
                     response_clean = response.strip()
@@ -658,7 +1104,8 @@ class AIUploader:
                             continue
                         else:
                             # last attempt -> log as failed and don't save the prompt
-                            log_failed_url(url, "AI returned prompt/empty table")
+                            if save_result:
+                                log_failed_url(url, "AI returned prompt/empty table")
                             return None
 
                     # If valid-looking response, check completeness
@@ -671,7 +1118,8 @@ class AIUploader:
                             logger.warning(f"Failed to log parsed response: {e}")
 
                         # Save result (parsed into columns)
-                        append_result_to_csv_parsed(url, response)
+                        if save_result:
+                            append_result_to_csv_parsed(url, response)
                         logger.info(f"✓ Processed video: {url}")
                         return response
                     else:
@@ -688,7 +1136,8 @@ class AIUploader:
                             except Exception as e:
                                 logger.warning(f"Failed to log parsed response: {e}")
 
-                            append_result_to_csv_parsed(url, response)
+                            if save_result:
+                                append_result_to_csv_parsed(url, response)
                             return response
                 
             except Exception as e:
@@ -701,10 +1150,13 @@ class AIUploader:
         logger.error(f"Failed to process video after {max_retries} attempts: {url}")
         return None
     
-    async def process_all_pending(self) -> dict:
+    async def process_all_pending(self, concurrency: int = AI_CONCURRENCY) -> dict:
         """
         Process all downloaded videos that haven't been processed yet.
         
+        Args:
+            concurrency: Number of chat sessions to run at the same time
+        
         Returns:
             Dictionary with results
         """
@@ -730,25 +1182,97 @@ class AIUploader:
             else:
                 logger.warning(f"Video not downloaded for: {url}")
         
-        logger.info(f"Processing {len(pending)} pending videos")
+        logger.info(f"Processing {len(pending)} pending videos ({concurrency} sessions)")
+        
+        writer = OrderedResultWriter()
         
-        for url, video_path in pending:
-            response = await self.process_video(url, video_path)
+        async def process_one(seq: int, session: "AIUploader", url: str, video_path: Path):
+            response = await session.process_video(url, video_path, save_result=False)
             
             if response:
+                writer.add_result(seq, url, response)
                 results['successful'].append({
                     'url': url,
                     'message': response[:100] + '...' if len(response) > 100 else response
                 })
             else:
+                writer.add_failure(seq, url, "AI upload failed")
                 results['failed'].append(url)
             
             # Rate limiting
             await asyncio.sleep(5)
         
+        async with AISessionPool(self, size=concurrency) as pool:
+            try:
+                await pool.map(process_one, pending)
+            finally:
+                writer.close()
+        
         return results
 
 
+class AISessionPool:
+    """
+    Pool of concurrent AI chat sessions sharing one browser.
+    
+    The first session is the given uploader itself; the rest are opened with
+    AIUploader.new_session (own context from auth_state.json, own page).
+    """
+    
+    def __init__(self, uploader: AIUploader, size: int = AI_CONCURRENCY):
+        self.uploader = uploader
+        self.size = max(1, size)
+        self.sessions: List[AIUploader] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    async def start(self):
+        """Open the extra sessions and mark all of them idle."""
+        self.sessions = [self.uploader]
+        for _ in range(self.size - 1):
+            self.sessions.append(await self.uploader.new_session())
+        for session in self.sessions:
+            self._idle.put_nowait(session)
+        logger.info(f"AI session pool ready ({self.size} sessions)")
+    
+    async def close(self):
+        """Close the extra sessions (the original uploader is left open)."""
+        for session in self.sessions[1:]:
+            try:
+                await session.close()
+            except Exception as e:
+                logger.debug(f"Error closing AI session: {e}")
+        self.sessions = []
+    
+    async def acquire(self) -> AIUploader:
+        """Wait for an idle session."""
+        return await self._idle.get()
+    
+    def release(self, session: AIUploader):
+        """Return a session to the pool."""
+        self._idle.put_nowait(session)
+    
+    async def map(self, func, items: List[Tuple[str, Path]]):
+        """
+        Run func(seq, session, url, video_path) for every item, at most
+        `size` at a time. seq is the item's position in `items`.
+        """
+        async def run(seq: int, url: str, video_path: Path):
+            session = await self.acquire()
+            try:
+                await func(seq, session, url, video_path)
+            finally:
+                self.release(session)
+        
+        await asyncio.gather(*(run(i, url, path) for i, (url, path) in enumerate(items)))
+
+
 async def main():
     """Main function for standalone execution."""
     parser = argparse.ArgumentParser(description='Upload videos to AI platform and get responses')
@@ -759,6 +1283,8 @@ async def main():
     parser.add_argument('--headless', action='store_true', help='Run browser in headless mode')
     parser.add_argument('--login', action='store_true', help='Force login and save session')
     parser.add_argument('--clear-session', action='store_true', help='Clear saved session')
+    parser.add_argument('--capture', choices=['dom', 'network'], default=RESPONSE_CAPTURE_MODE, help='How to capture the AI answer')
+    parser.add_argument('--sessions', type=int, default=AI_CONCURRENCY, help=f'Concurrent AI chat sessions (default: {AI_CONCURRENCY})')
     
     args = parser.parse_args()
     
@@ -777,7 +1303,7 @@ async def main():
     # Force non-headless for login
     headless = False if args.login else args.headless
     
-    async with AIUploader(headless=headless, prompt=args.prompt) as uploader:
+    async with AIUploader(headless=headless, prompt=args.prompt, capture_mode=args.capture) as uploader:
         
         # Login mode
         if args.login:
@@ -813,7 +1339,7 @@ async def main():
                 print("="*50)
         else:
             # Process all pending
-            results = await uploader.process_all_pending()
+            results = await uploader.process_all_pending(concurrency=args.sessions)
             
             # Print summary
             print("\n" + "="*50)
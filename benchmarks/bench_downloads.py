@@ -0,0 +1,155 @@
+"""
+Download Throughput Benchmark against the Mock Downloader Sites
+
+Starts a mock snaptik (TikTok) and a mock snapvideo (Instagram) from
+mock_downloader_sites.py, points VideoDownloader at them through
+site_urls, and downloads N fake URLs into a temporary folder. Reports
+downloads/minute, per-platform latency of successful and failed downloads,
+and what the sites saw (page loads, lookups, CDN hits, injected errors),
+so retry/failure handling can be measured under injected latency and errors.
+
+Needs playwright + chromium, like the downloader itself.
+
+Usage:
+    python benchmarks/bench_downloads.py [--videos 30] [--instagram-share 0.5]
+    python benchmarks/bench_downloads.py --resolve-ms 3000 --error-rate 0.1 --cdn-error-rate 0.2
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_pipeline import duration_stats  # noqa: E402
+from mock_downloader_sites import add_config_arguments, config_from_args, start_mock_site  # noqa: E402
+from config import DOWNLOAD_CONCURRENCY  # noqa: E402
+from downloader import VideoDownloader  # noqa: E402
+from selector_cache import SelectorResolver  # noqa: E402
+from utils import detect_platform  # noqa: E402
+
+
+class TimedVideoDownloader(VideoDownloader):
+    """VideoDownloader that records the duration and outcome of every download."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    async def download_video(self, url: str, index: int = 0) -> Optional[Path]:
+        start = time.perf_counter()
+        path = await super().download_video(url, index)
+        outcome = "ok" if path else "failed"
+        self.samples[f"{detect_platform(url)}/{outcome}"].append(time.perf_counter() - start)
+        return path
+
+
+def make_urls(videos: int, instagram_share: float) -> List[str]:
+    """Fake TikTok / Instagram URLs, Instagram spread evenly through the list."""
+    urls = []
+    instagram_seen = 0
+    for i in range(videos):
+        if instagram_seen < round((i + 1) * instagram_share):
+            urls.append(f"https://www.instagram.com/p/BENCH{i:05d}/")
+            instagram_seen += 1
+        else:
+            urls.append(f"https://www.tiktok.com/@bench/video/{7300000000000000000 + i}")
+    return urls
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Start both mock sites, download every URL, return the report."""
+    tiktok_server, tiktok_url, tiktok_counters = start_mock_site(config_from_args("snaptik", args))
+    instagram_server, instagram_url, instagram_counters = start_mock_site(config_from_args("snapvideo", args))
+    root = Path(tempfile.mkdtemp(prefix="mvoice_bench_dl_"))
+    try:
+        urls = make_urls(args.videos, args.instagram_share)
+        site_concurrency = {
+            urlparse(tiktok_url).netloc: args.tiktok_concurrency,
+            urlparse(instagram_url).netloc: args.instagram_concurrency,
+        }
+
+        async with TimedVideoDownloader(
+            headless=not args.headed,
+            site_concurrency=site_concurrency,
+            downloads_dir=root,
+            site_urls={"tiktok": tiktok_url, "instagram": instagram_url},
+            selectors=SelectorResolver(cache_file=None)
+        ) as downloader:
+            start = time.perf_counter()
+            results = await downloader.download_all(urls)
+            wall = time.perf_counter() - start
+            samples = downloader.samples
+
+        expected_size = args.file_kb * 1024
+        complete_files = sum(1 for path in root.glob("*.mp4") if path.stat().st_size == expected_size)
+
+        successful = len(results["successful"])
+        return {
+            "videos": len(urls),
+            "successful": successful,
+            "failed": len(results["failed"]),
+            "complete_files": complete_files,
+            "wall_s": round(wall, 2),
+            "downloads_per_min": round(successful / (wall / 60), 2) if wall else 0.0,
+            "concurrency": {"tiktok": args.tiktok_concurrency, "instagram": args.instagram_concurrency},
+            "latency": {name: duration_stats(values) for name, values in sorted(samples.items())},
+            "site_requests": {"snaptik": dict(tiktok_counters), "snapvideo": dict(instagram_counters)},
+        }
+    finally:
+        tiktok_server.shutdown()
+        instagram_server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def print_report(report: dict):
+    """Print the benchmark report."""
+    print("\n" + "=" * 70)
+    print("DOWNLOAD BENCHMARK (mock downloader sites)")
+    print("=" * 70)
+    print(f"Videos: {report['videos']} ({report['successful']} ok, {report['failed']} failed, "
+          f"{report['complete_files']} complete files on disk)")
+    print(f"Concurrency: tiktok={report['concurrency']['tiktok']}, instagram={report['concurrency']['instagram']}")
+    print(f"Throughput: {report['downloads_per_min']} downloads/min over {report['wall_s']}s")
+    print("-" * 70)
+    print(f"{'platform/outcome':<20} {'calls':>6} {'mean s':>9} {'p50 s':>9} {'p95 s':>9} {'max s':>9}")
+    for name, stats in report["latency"].items():
+        print(f"{name:<20} {stats['calls']:>6} {stats['mean_s']:>9.3f} {stats['p50_s']:>9.3f} "
+              f"{stats['p95_s']:>9.3f} {stats['max_s']:>9.3f}")
+    print("-" * 70)
+    for site, counters in report["site_requests"].items():
+        print(f"{site}: " + ", ".join(f"{name}={count}" for name, count in sorted(counters.items())))
+    print("=" * 70)
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Download benchmark against local mock downloader sites')
+    parser.add_argument('--videos', type=int, default=30, help='Number of fake video URLs')
+    parser.add_argument('--instagram-share', type=float, default=0.5, help='Share of Instagram URLs (0-1)')
+    parser.add_argument('--tiktok-concurrency', type=int, default=DOWNLOAD_CONCURRENCY.get('snaptik.app', 1),
+                        help='Parallel downloads on the mock snaptik')
+    parser.add_argument('--instagram-concurrency', type=int, default=DOWNLOAD_CONCURRENCY.get('snapvideo.app', 1),
+                        help='Parallel downloads on the mock snapvideo')
+    parser.add_argument('--headed', action='store_true', help='Show the browser')
+    parser.add_argument('--json', type=str, help='Also write the report to this JSON file')
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmark for the Response Parsing Hot Path
+
+Times parse_message_to_dict, clean_message, is_row_empty_or_header and the
+streamed JSON completion check used by wait_for_response on the corpus from
+corpus.py, and reports throughput and p50/p99 latency per kind.
+
+A saved baseline also records a digest of every target's output, so a
+parser change that alters results is flagged even if it is faster.
+
+The data.csv dedup sets (UrlDigestSet, BloomFilter) are measured too:
+bytes per URL (tracemalloc) and time per add, against a set of URL strings.
+
+Usage:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --save benchmarks/baseline.json
+    python benchmarks/bench_parser.py --compare benchmarks/baseline.json [--tolerance 0.25]
+"""
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus import load_corpus  # noqa: E402
+from json_scanner import IncrementalJSONScanner  # noqa: E402
+from utils import (  # noqa: E402
+    METRICS_COLUMNS,
+    BloomFilter,
+    UrlDigestSet,
+    clean_message,
+    is_row_empty_or_header,
+    normalize_url,
+    parse_message_to_dict
+)
+
+
+TARGETS = ["parse", "clean", "row_check", "json_detect"]
+
+
+def percentile(sorted_values: List[int], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return float(sorted_values[index])
+
+
+def _digest(outputs: list) -> str:
+    payload = json.dumps(outputs, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _stats(timings: List[int], outputs: list) -> dict:
+    timings.sort()
+    total_s = sum(timings) / 1e9
+    return {
+        "calls": len(timings),
+        "ops_per_sec": round(len(timings) / total_s, 1) if total_s else 0.0,
+        "p50_us": round(percentile(timings, 50) / 1000, 2),
+        "p99_us": round(percentile(timings, 99) / 1000, 2),
+        "digest": _digest(outputs),
+    }
+
+
+def _time_calls(func: Callable, items: list, rounds: int) -> Tuple[List[int], list]:
+    """Call func on every item `rounds` times; return per-call ns and the outputs."""
+    for item in items[:10]:
+        func(item)  # warm-up
+    timings = []
+    outputs = []
+    for round_no in range(rounds):
+        for item in items:
+            start = time.perf_counter_ns()
+            result = func(item)
+            timings.append(time.perf_counter_ns() - start)
+            if round_no == 0:
+                outputs.append(result)
+    return timings, outputs
+
+
+def _stream_snapshots(text: str, poll_chars: int) -> List[str]:
+    """Snapshots a poller would see while the response streams in."""
+    return [text[:end] for end in range(poll_chars, len(text), poll_chars)] + [text]
+
+
+def _time_json_detect(texts: List[str], rounds: int, poll_chars: int) -> Tuple[List[int], list]:
+    """Per-poll cost of the incremental completion check over a streamed response."""
+    timings = []
+    outputs = []
+    for round_no in range(rounds):
+        for text in texts:
+            scanner = IncrementalJSONScanner(METRICS_COLUMNS)
+            for snapshot in _stream_snapshots(text, poll_chars):
+                start = time.perf_counter_ns()
+                complete = scanner.feed(snapshot).complete
+                timings.append(time.perf_counter_ns() - start)
+            if round_no == 0:
+                outputs.append([complete, scanner.closed, len(scanner.keys)])
+    return timings, outputs
+
+
+def run_benchmarks(corpus: List[Tuple[str, str]], rounds: int, poll_chars: int,
+                   targets: List[str]) -> Dict[str, dict]:
+    """
+    Run every target on every corpus kind.
+
+    Returns:
+        {"target/kind": {"calls", "ops_per_sec", "p50_us", "p99_us", "digest"}}
+    """
+    by_kind: Dict[str, List[str]] = defaultdict(list)
+    for kind, text in corpus:
+        by_kind[kind].append(text)
+
+    results = {}
+    for target in targets:
+        for kind, texts in by_kind.items():
+            if target == "parse":
+                timings, outputs = _time_calls(parse_message_to_dict, texts, rounds)
+            elif target == "clean":
+                timings, outputs = _time_calls(clean_message, texts, rounds)
+            elif target == "row_check":
+                rows = [parse_message_to_dict(text) for text in texts]
+                timings, outputs = _time_calls(is_row_empty_or_header, rows, rounds)
+            elif target == "json_detect":
+                timings, outputs = _time_json_detect(texts, rounds, poll_chars)
+            else:
+                raise ValueError(f"Unknown target: {target}")
+
+            results[f"{target}/{kind}"] = _stats(timings, outputs)
+
+    # Rows the retry logic has to recognise as "not a result"
+    if "row_check" in targets:
+        empty_rows = [{col: "" for col in METRICS_COLUMNS}, {col: col for col in METRICS_COLUMNS}]
+        timings, outputs = _time_calls(is_row_empty_or_header, empty_rows * 50, rounds)
+        results["row_check/empty_or_header"] = _stats(timings, outputs)
+    return results
+
+
+class _UrlKeySet(set):
+    """The plain alternative: a set of normalized URL strings."""
+
+    def add(self, url: str):
+        super().add(normalize_url(url))
+
+
+def measure_dedup(count: int) -> Dict[str, dict]:
+    """
+    Memory and add() time of each data.csv dedup set for `count` unique URLs.
+
+    Returns:
+        {"name": {"urls", "bytes_per_url", "add_us"}}
+    """
+    urls = [f"https://www.tiktok.com/@creator{i % 997}/video/{7000000000000000000 + i}" for i in range(count)]
+    results = {}
+    for name, make in (("url_strings", _UrlKeySet), ("digest_set", UrlDigestSet),
+                       ("bloom", lambda: BloomFilter(capacity=count))):
+        start = time.perf_counter()
+        seen = make()
+        for url in urls:
+            seen.add(url)
+        elapsed = time.perf_counter() - start
+        del seen
+
+        # Memory in a second pass: tracemalloc slows every allocation down
+        tracemalloc.start()
+        seen = make()
+        for url in urls:
+            seen.add(url)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del seen
+        results[name] = {
+            "urls": count,
+            "bytes_per_url": round(size / count, 1),
+            "add_us": round(elapsed / count * 1e6, 2),
+        }
+    return results
+
+
+def print_dedup(results: Dict[str, dict]):
+    """Print the dedup set measurements."""
+    print(f"\n{'dedup set':<36} {'urls':>9} {'bytes/url':>11} {'add us':>9}")
+    print("-" * 86)
+    for name, stats in results.items():
+        print(f"{name:<36} {stats['urls']:>9} {stats['bytes_per_url']:>11.1f} {stats['add_us']:>9.2f}")
+    print("=" * 86)
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict] = None):
+    """Print a results table, with p50 change vs. the baseline if given."""
+    print("\n" + "=" * 86)
+    print("PARSER BENCHMARK")
+    print("=" * 86)
+    header = f"{'target/kind':<36} {'calls':>7} {'ops/s':>11} {'p50 us':>9} {'p99 us':>9}"
+    if baseline:
+        header += f" {'p50 vs base':>11}"
+    print(header)
+    print("-" * 86)
+    for name, stats in results.items():
+        line = (f"{name:<36} {stats['calls']:>7} {stats['ops_per_sec']:>11.1f} "
+                f"{stats['p50_us']:>9.2f} {stats['p99_us']:>9.2f}")
+        if baseline and name in baseline and baseline[name]["p50_us"]:
+            change = stats["p50_us"] / baseline[name]["p50_us"] - 1
+            line += f" {change:>+10.0%}"
+        print(line)
+    print("=" * 86)
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Compare a run against a baseline.
+
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    problems = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["digest"] != base["digest"]:
+            problems.append(f"{name}: output changed (digest {base['digest']} -> {current['digest']})")
+        if base["p50_us"] and current["p50_us"] > base["p50_us"] * (1 + tolerance):
+            problems.append(
+                f"{name}: p50 {base['p50_us']:.2f}us -> {current['p50_us']:.2f}us "
+                f"(> {tolerance:.0%} slower)"
+            )
+    return problems
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Benchmark the response parsing hot path')
+    parser.add_argument('--per-kind', type=int, default=50, help='Synthetic responses per kind')
+    parser.add_argument('--seed', type=int, default=1234, help='Corpus random seed')
+    parser.add_argument('--rounds', type=int, default=5, help='Passes over the corpus per target')
+    parser.add_argument('--poll-chars', type=int, default=64,
+                        help='Characters streamed between two polls (json_detect)')
+    parser.add_argument('--only', choices=TARGETS, action='append', help='Run only this target (repeatable)')
+    parser.add_argument('--dedup-urls', type=int, default=20000,
+                        help='Unique URLs for the dedup set memory measurement (0 = skip)')
+    parser.add_argument('--save', type=str, help='Write results as a baseline JSON file')
+    parser.add_argument('--compare', type=str, help='Compare against a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed p50 slowdown vs. baseline before failing (0.25 = 25%%)')
+
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.per_kind, args.seed)
+    results = run_benchmarks(corpus, args.rounds, args.poll_chars, args.only or TARGETS)
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))["results"]
+
+    print_results(results, baseline)
+    dedup = measure_dedup(args.dedup_urls) if args.dedup_urls > 0 else {}
+    if dedup:
+        print_dedup(dedup)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "per_kind": args.per_kind,
+            "seed": args.seed,
+            "poll_chars": args.poll_chars,
+            "results": results,
+            "dedup": dedup,
+        }, indent=2), encoding='utf-8')
+        print(f"Baseline saved to {args.save}")
+
+    if baseline is not None:
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for problem in problems:
+                print(f"  - {problem}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+End-to-end Throughput Benchmark against the Mock AI Chat
+
+Starts benchmarks/mock_ai_server.py, puts N dummy videos in a temporary
+workspace and runs StreamingPipeline (upload-only mode) over them with a
+timed AIUploader. Reports videos/minute, per-stage latency (navigate,
+reasoning level, upload, prompt, response wait, whole process_video and
+the fixed waits in between) and how long the AI sessions sat idle.
+
+Needs playwright + chromium, like the pipeline itself. The download stage
+is not exercised (it talks to the real downloader sites).
+
+Usage:
+    python benchmarks/bench_pipeline.py [--videos 20] [--ai-sessions 2] [--capture network]
+    python benchmarks/bench_pipeline.py --first-token-ms 5000 --chunk-ms 50 --json bench_pipeline.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_ai_server import add_config_arguments, config_from_args, start_mock_server  # noqa: E402
+from ai_uploader import AIUploader  # noqa: E402
+from config import RESPONSE_CAPTURE_MODE  # noqa: E402
+from metrics import StageMetrics  # noqa: E402
+from selector_cache import SelectorResolver  # noqa: E402
+from pipeline import StreamingPipeline  # noqa: E402
+from utils import get_video_path  # noqa: E402
+
+
+# Stages timed inside AIUploader.process_video, in pipeline order
+STAGES = ["navigate", "reasoning", "upload", "prompt", "response_wait"]
+
+
+class StageRecorder:
+    """Collects (stage -> durations) from every timed session."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def record(self, stage: str, start: float, end: float):
+        self.samples[stage].append(end - start)
+        if stage == "process_video":
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+
+class TimedAIUploader(AIUploader):
+    """AIUploader that records how long each stage of process_video takes."""
+
+    recorder = StageRecorder()
+
+    async def _timed(self, stage: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.recorder.record(stage, start, time.perf_counter())
+
+    async def reset_chat(self, reload: bool = False) -> bool:
+        return await self._timed("navigate", super().reset_chat(reload))
+
+    async def set_reasoning_minimal(self) -> bool:
+        return await self._timed("reasoning", super().set_reasoning_minimal())
+
+    async def upload_video(self, video_path: Path) -> bool:
+        return await self._timed("upload", super().upload_video(video_path))
+
+    async def send_prompt(self, prompt: str) -> bool:
+        return await self._timed("prompt", super().send_prompt(prompt))
+
+    async def wait_for_response(self, timeout: int = 180000) -> Optional[str]:
+        return await self._timed("response_wait", super().wait_for_response(timeout))
+
+    async def process_video(self, *args, **kwargs) -> Optional[str]:
+        return await self._timed("process_video", super().process_video(*args, **kwargs))
+
+
+class BenchPipeline(StreamingPipeline):
+    """StreamingPipeline whose AI sessions are TimedAIUploader instances."""
+
+    uploader_cls = TimedAIUploader
+
+
+def prepare_workspace(root: Path, videos: int, video_kb: int) -> Tuple[Path, Path, Path]:
+    """
+    Write data.csv and dummy video files for the benchmark.
+
+    Returns:
+        (data_file, output_file, downloads_dir)
+    """
+    data_file = root / "data.csv"
+    output_file = root / "output.csv"
+    downloads_dir = root / "downloads"
+    downloads_dir.mkdir(parents=True, exist_ok=True)
+
+    urls = [f"https://www.tiktok.com/@bench/video/{7300000000000000000 + i}" for i in range(videos)]
+    with open(data_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url"])
+        writer.writerows([url] for url in urls)
+
+    # Distinct content per video, otherwise content dedup reuses the first
+    # result and every other video skips the AI stage being measured
+    for i, url in enumerate(urls):
+        get_video_path(url, i, downloads_dir).write_bytes(os.urandom(video_kb * 1024))
+    return data_file, output_file, downloads_dir
+
+
+def duration_stats(durations: List[float]) -> dict:
+    """calls / mean / p50 / p95 / max (seconds) of a list of durations."""
+    values = sorted(durations)
+    if not values:
+        return {"calls": 0, "mean_s": 0.0, "p50_s": 0.0, "p95_s": 0.0, "max_s": 0.0}
+    return {
+        "calls": len(values),
+        "mean_s": round(sum(values) / len(values), 3),
+        "p50_s": round(values[len(values) // 2], 3),
+        "p95_s": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max_s": round(values[-1], 3),
+    }
+
+
+def build_report(recorder: StageRecorder, pipeline: StreamingPipeline) -> dict:
+    """Turn the recorded stage timings and pipeline stats into a report dict."""
+    samples = recorder.samples
+    successful = pipeline.stats["upload"]["successful"]
+    window = (recorder.last_end - recorder.first_start) if recorder.first_start is not None else 0.0
+    busy = sum(samples["process_video"])
+    idle = max(0.0, pipeline.ai_sessions * window - busy)
+
+    stages = {stage: duration_stats(samples[stage]) for stage in STAGES + ["process_video"]}
+    videos = len(samples["process_video"])
+    in_stages = sum(sum(samples[stage]) for stage in STAGES)
+    stages["fixed_waits"] = {
+        "calls": videos,
+        "mean_s": round((busy - in_stages) / videos, 3) if videos else 0.0,
+    }
+
+    return {
+        "videos": videos,
+        "successful": successful,
+        "failed": pipeline.stats["upload"]["failed"],
+        "ai_sessions": pipeline.ai_sessions,
+        "capture_mode": pipeline.capture_mode,
+        "window_s": round(window, 2),
+        "videos_per_min": round(successful / (window / 60), 2) if window else 0.0,
+        "session_idle_s": round(idle, 2),
+        "session_idle_pct": round(100 * idle / (pipeline.ai_sessions * window), 1) if window else 0.0,
+        "stages": stages,
+    }
+
+
+def print_report(report: dict):
+    """Print the benchmark report."""
+    print("\n" + "=" * 70)
+    print("END-TO-END BENCHMARK (mock AI chat)")
+    print("=" * 70)
+    print(f"Videos: {report['videos']} ({report['successful']} ok, {report['failed']} failed)")
+    print(f"AI Sessions: {report['ai_sessions']} | Capture: {report['capture_mode']}")
+    print(f"Throughput: {report['videos_per_min']} videos/min over {report['window_s']}s")
+    print(f"Session idle: {report['session_idle_s']}s ({report['session_idle_pct']}%)")
+    print("-" * 70)
+    print(f"{'stage':<16} {'calls':>6} {'mean s':>9} {'p50 s':>9} {'p95 s':>9} {'max s':>9}")
+    for stage, stats in report["stages"].items():
+        line = f"{stage:<16} {stats['calls']:>6} {stats['mean_s']:>9.3f}"
+        for key in ("p50_s", "p95_s", "max_s"):
+            line += f" {stats[key]:>9.3f}" if key in stats else f" {'-':>9}"
+        print(line)
+    print("=" * 70)
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """Start the mock server, run the pipeline over dummy videos, return the report."""
+    server, url = start_mock_server(config_from_args(args))
+    root = Path(tempfile.mkdtemp(prefix="mvoice_bench_"))
+    try:
+        data_file, output_file, downloads_dir = prepare_workspace(root, args.videos, args.video_kb)
+        TimedAIUploader.recorder = StageRecorder()
+
+        pipeline = BenchPipeline(
+            headless=not args.headed,
+            delete_after_upload=False,
+            upload_only=True,
+            ai_sessions=args.ai_sessions,
+            capture_mode=args.capture,
+            ai_url=url,
+            data_file=data_file,
+            output_file=output_file,
+            downloads_dir=downloads_dir,
+            metrics=StageMetrics(),
+            selectors=SelectorResolver(cache_file=None)
+        )
+        await pipeline.run()
+        return build_report(TimedAIUploader.recorder, pipeline)
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"Workspace kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark against a local mock AI chat')
+    parser.add_argument('--videos', type=int, default=20, help='Number of dummy videos')
+    parser.add_argument('--video-kb', type=int, default=256, help='Size of each dummy video in KB')
+    parser.add_argument('--ai-sessions', type=int, default=1, help='Concurrent AI chat sessions')
+    parser.add_argument('--capture', choices=['dom', 'network'], default=RESPONSE_CAPTURE_MODE,
+                        help='How to capture the AI answer')
+    parser.add_argument('--headed', action='store_true', help='Show the browser')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary workspace')
+    parser.add_argument('--json', type=str, help='Also write the report to this JSON file')
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Synthetic AI Response Corpus for the MVoice Benchmarks
+
+Generates deterministic responses in every shape the AI has been seen to
+answer in: clean JSON, fenced JSON with a preamble, markdown tables, the
+flattened "AIMy thought processMetricsValue..." text that the DOM produces
+when a table is read with textContent, and outputs cut off mid-stream.
+
+Real (anonymized) responses can be added as .txt files in
+benchmarks/fixtures/; load_corpus() picks them up as kind "fixture".
+"""
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import METRICS_COLUMNS  # noqa: E402
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+KINDS = [
+    "clean_json",
+    "fenced_json",
+    "markdown_table",
+    "concatenated",
+    "truncated_json",
+    "truncated_table",
+]
+
+_WORDS = (
+    "bright warm natural soft bold clean fresh studio outdoor kitchen bathroom "
+    "close-up product hero smiling young mother friends skin hair glow shine "
+    "gentle routine daily confident family morning everyday care moment"
+).split()
+
+_SHORT_VALUES = ["Yes", "No", "Low", "Medium", "High", "Female", "Male", "Mixed", "N/A"]
+
+
+def _metric_value(rng: random.Random, metric: str) -> str:
+    name = metric.lower()
+    if name == "business unit":
+        return rng.choice(["Personal Care", "Home Care", "Nutrition"])
+    if name == "category":
+        return rng.choice(["Skin Care", "Hair Care", "Oral Care", "Deodorant"])
+    if name == "brand":
+        return f"Brand {rng.choice('ABCDEFGH')}"
+    if name == "platform":
+        return rng.choice(["TikTok", "Instagram"])
+    if name == "creative link":
+        return f"https://www.tiktok.com/@creator{rng.randint(1, 999)}/video/{rng.randint(10**18, 10**19 - 1)}"
+    if name == "period":
+        return f"Q{rng.randint(1, 4)} 2025"
+    if "(seconds)" in name:
+        return str(rng.randint(0, 60))
+    if "(%)" in name:
+        return f"{rng.randint(0, 100)}%"
+    if "count" in name or "number of" in name:
+        return str(rng.randint(0, 12))
+    if "summary" in name or "benefit" in name or "tone" in name:
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 24))).capitalize() + "."
+    if rng.random() < 0.5:
+        return rng.choice(_SHORT_VALUES)
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 5))).capitalize()
+
+
+def make_values(rng: random.Random) -> Dict[str, str]:
+    """One random, realistic value per metric (METRICS_COLUMNS order)."""
+    return {metric: _metric_value(rng, metric) for metric in METRICS_COLUMNS}
+
+
+def render(kind: str, values: Dict[str, str], rng: random.Random) -> str:
+    """
+    Render metric values as one AI response shape.
+
+    Args:
+        kind: One of KINDS
+        values: Metric values (METRICS_COLUMNS -> value)
+        rng: Random source (truncation point)
+
+    Returns:
+        Response text as it would be read from the page
+    """
+    if kind in ("clean_json", "truncated_json"):
+        text = json.dumps(values, ensure_ascii=False, indent=2)
+    elif kind == "fenced_json":
+        text = (
+            "AI\nMy thought process\nHere's the analysis of the video:\n```json\n"
+            + json.dumps(values, ensure_ascii=False, indent=2)
+            + "\n```"
+        )
+    elif kind in ("markdown_table", "truncated_table"):
+        rows = "\n".join(f"| {metric} | {value} |" for metric, value in values.items())
+        text = "Here's the analysis of the video:\n| Metrics | Value |\n|---|---|\n" + rows
+    elif kind == "concatenated":
+        text = "AIMy thought processMetricsValue" + "".join(
+            metric + value for metric, value in values.items()
+        )
+    else:
+        raise ValueError(f"Unknown corpus kind: {kind}")
+
+    if kind.startswith("truncated_"):
+        text = text[:int(len(text) * rng.uniform(0.3, 0.9))]
+    return text
+
+
+def build_corpus(per_kind: int = 50, seed: int = 1234) -> List[Tuple[str, str]]:
+    """
+    Build the synthetic corpus.
+
+    Args:
+        per_kind: Responses generated per kind
+        seed: Random seed (same seed -> same corpus)
+
+    Returns:
+        List of (kind, response_text)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for kind in KINDS:
+        for _ in range(per_kind):
+            corpus.append((kind, render(kind, make_values(rng), rng)))
+    return corpus
+
+
+def load_fixtures(fixtures_dir: Path = FIXTURES_DIR) -> List[Tuple[str, str]]:
+    """Load anonymized real responses (*.txt) as kind "fixture"."""
+    if not fixtures_dir.exists():
+        return []
+    return [
+        ("fixture", path.read_text(encoding="utf-8"))
+        for path in sorted(fixtures_dir.glob("*.txt"))
+    ]
+
+
+def load_corpus(per_kind: int = 50, seed: int = 1234) -> List[Tuple[str, str]]:
+    """Synthetic corpus plus any fixtures on disk."""
+    return build_corpus(per_kind, seed) + load_fixtures()
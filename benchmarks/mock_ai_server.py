@@ -0,0 +1,334 @@
+"""
+Local Mock AI Chat Server for the MVoice Benchmarks
+
+A stand-in for the chat page AIUploader drives: file input, message
+textarea, send button (disabled while the message box is empty or a file
+is uploading, like the real site), reasoning-level selector (#reasoning-selector-button
+with a Minimal option), a "New chat" button that clears the conversation
+but keeps the reasoning level, and an assistant message that is streamed in from a
+Server-Sent Events endpoint (/api/chat/stream, which also matches
+AI_STREAM_URL_PATTERN so --capture network works).
+
+Latency is configurable: upload time, time to first token (doubled at
+Medium and tripled at High reasoning, like the real site being slower
+when reasoning is not Minimal) and the delay between streamed chunks.
+Answers come from corpus.py.
+
+Usage:
+    python benchmarks/mock_ai_server.py [--port 8765] [--first-token-ms 1500] [--kind fenced_json]
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import make_values, render  # noqa: E402
+
+
+RESPONSE_KINDS = ["clean_json", "fenced_json", "markdown_table", "concatenated"]
+
+REASONING_FACTORS = {"Minimal": 1, "Medium": 2, "High": 3}
+
+PAGE_HTML = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Mock AI Chat</title>
+<style>
+  body { font-family: sans-serif; margin: 0; display: flex; flex-direction: column; height: 100vh; }
+  header { padding: 8px; border-bottom: 1px solid #ddd; position: relative; }
+  #reasoning-menu { position: absolute; top: 40px; left: 8px; background: #fff; border: 1px solid #ccc; }
+  #reasoning-menu [role="menuitem"] { padding: 6px 16px; cursor: pointer; }
+  main { flex: 1; overflow: auto; padding: 8px; }
+  .chat-bubble { white-space: pre-wrap; margin: 8px 0; padding: 8px; border-radius: 6px; }
+  .chat-bubble.user { background: #eef; }
+  .chat-bubble.assistant { background: #f4f4f4; }
+  form { display: flex; gap: 8px; padding: 8px; border-top: 1px solid #ddd; }
+  textarea { flex: 1; height: 60px; }
+</style>
+</head>
+<body>
+<header>
+  <button id="reasoning-selector-button" type="button"
+          data-testid="reasoning-selector-trigger-button" aria-label="Reasoning level">
+    Reasoning: <span id="reasoning-level">Medium</span>
+  </button>
+  <button id="new-chat" type="button" data-testid="new-chat-button" aria-label="New chat">New chat</button>
+  <div id="reasoning-menu" role="menu" hidden>
+    <div role="menuitem" data-testid="reasoning-option-minimal" data-level="Minimal">Minimal</div>
+    <div role="menuitem" data-testid="reasoning-option-medium" data-level="Medium">Medium</div>
+    <div role="menuitem" data-testid="reasoning-option-high" data-level="High">High</div>
+  </div>
+</header>
+<main id="chat"></main>
+<form id="composer">
+  <input type="file" id="file-input" accept="video/*">
+  <span id="upload-status"></span>
+  <textarea id="prompt" placeholder="Message"></textarea>
+  <button type="submit" id="send-button" aria-label="Send" disabled>Send</button>
+</form>
+<script>
+const state = { uploadId: null, level: 'Medium', uploading: false };
+const chat = document.getElementById('chat');
+const menu = document.getElementById('reasoning-menu');
+const sendButton = document.getElementById('send-button');
+const promptBox = document.getElementById('prompt');
+const uploadStatus = document.getElementById('upload-status');
+
+// Send only works with a typed message and no upload in flight
+const updateSend = () => { sendButton.disabled = state.uploading || !promptBox.value.trim(); };
+promptBox.addEventListener('input', updateSend);
+
+document.getElementById('reasoning-selector-button').onclick = () => { menu.hidden = !menu.hidden; };
+menu.querySelectorAll('[role="menuitem"]').forEach(item => {
+  item.onclick = () => {
+    state.level = item.dataset.level;
+    document.getElementById('reasoning-level').textContent = state.level;
+    menu.hidden = true;
+  };
+});
+
+document.getElementById('new-chat').onclick = () => {
+  chat.replaceChildren();
+  state.uploadId = null;
+  document.getElementById('file-input').value = '';
+  uploadStatus.textContent = '';
+  promptBox.value = '';
+  updateSend();
+};
+
+document.getElementById('file-input').onchange = async (event) => {
+  const file = event.target.files[0];
+  if (!file) return;
+  state.uploading = true;
+  updateSend();
+  uploadStatus.setAttribute('aria-busy', 'true');
+  uploadStatus.textContent = 'Uploading ' + file.name + '...';
+  const res = await fetch('/api/upload', { method: 'POST', body: file });
+  state.uploadId = (await res.json()).id;
+  uploadStatus.removeAttribute('aria-busy');
+  uploadStatus.textContent = file.name + ' uploaded';
+  state.uploading = false;
+  updateSend();
+};
+
+function addBubble(cls, text) {
+  const div = document.createElement('div');
+  div.className = 'chat-bubble ' + cls;
+  div.textContent = text;
+  chat.appendChild(div);
+  return div;
+}
+
+promptBox.addEventListener('keydown', (event) => {
+  if (event.key === 'Enter' && !event.shiftKey) {
+    event.preventDefault();
+    document.getElementById('composer').requestSubmit();
+  }
+});
+
+document.getElementById('composer').onsubmit = async (event) => {
+  event.preventDefault();
+  if (sendButton.disabled) return;
+  const prompt = promptBox.value;
+  promptBox.value = '';
+  updateSend();
+  addBubble('user', prompt);
+  const answer = addBubble('assistant assistant-message', 'Thinking...');
+  const res = await fetch('/api/chat/stream', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ prompt: prompt, upload_id: state.uploadId, reasoning: state.level })
+  });
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf('\\n\\n')) !== -1) {
+      const data = buffer.slice(0, end).split('\\n')
+        .filter(line => line.startsWith('data:'))
+        .map(line => line.slice(5).trim())
+        .join('\\n');
+      buffer = buffer.slice(end + 2);
+      if (!data || data === '[DONE]') continue;
+      text += JSON.parse(data).delta;
+      answer.textContent = text;
+    }
+  }
+};
+</script>
+</body>
+</html>
+"""
+
+
+class MockAIConfig:
+    """Latency and answer settings for the mock chat server."""
+
+    def __init__(
+        self,
+        upload_ms: int = 500,
+        first_token_ms: int = 1500,
+        chunk_ms: int = 30,
+        chunk_chars: int = 40,
+        kind: str = "fenced_json",
+        seed: int = 1234
+    ):
+        if kind not in RESPONSE_KINDS:
+            raise ValueError(f"kind must be one of {RESPONSE_KINDS}")
+        self.upload_ms = upload_ms
+        self.first_token_ms = first_token_ms
+        self.chunk_ms = chunk_ms
+        self.chunk_chars = chunk_chars
+        self.kind = kind
+        self.seed = seed
+
+
+class MockAIHandler(BaseHTTPRequestHandler):
+    """Serves the chat page, the upload endpoint and the SSE answer stream."""
+
+    config = MockAIConfig()
+    _lock = threading.Lock()
+    _counter = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    @classmethod
+    def _next_id(cls) -> int:
+        with cls._lock:
+            cls._counter += 1
+            return cls._counter
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.split('?')[0] in ('/', '/chat'):
+            body = PAGE_HTML.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        if path == '/api/upload':
+            size = len(self._read_body())
+            time.sleep(self.config.upload_ms / 1000)
+            self._send_json({'id': self._next_id(), 'size': size})
+        elif path == '/api/chat/stream':
+            try:
+                request = json.loads(self._read_body() or b'{}')
+            except ValueError:
+                request = {}
+            self._stream_answer(request.get('reasoning', 'Medium'))
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _stream_answer(self, reasoning: str):
+        config = self.config
+        rng = random.Random(config.seed + self._next_id())
+        answer = render(config.kind, make_values(rng), rng)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        try:
+            time.sleep(config.first_token_ms * REASONING_FACTORS.get(reasoning, 2) / 1000)
+            for start in range(0, len(answer), config.chunk_chars):
+                chunk = answer[start:start + config.chunk_chars]
+                self.wfile.write(f"data: {json.dumps({'delta': chunk})}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(config.chunk_ms / 1000)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_mock_server(config: MockAIConfig, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the mock chat server on a background thread.
+
+    Args:
+        config: Latency/answer settings
+        port: Port to listen on (0 = any free port)
+
+    Returns:
+        (server, chat page URL); call server.shutdown() when done
+    """
+    handler = type('ConfiguredMockAIHandler', (MockAIHandler,), {'config': config})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chat"
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Add the MockAIConfig options to an argument parser."""
+    parser.add_argument('--upload-ms', type=int, default=500, help='Simulated upload time')
+    parser.add_argument('--first-token-ms', type=int, default=1500,
+                        help='Time to first token at Minimal reasoning (x2 Medium, x3 High)')
+    parser.add_argument('--chunk-ms', type=int, default=30, help='Delay between streamed chunks')
+    parser.add_argument('--chunk-chars', type=int, default=40, help='Characters per streamed chunk')
+    parser.add_argument('--kind', choices=RESPONSE_KINDS, default='fenced_json', help='Answer format')
+    parser.add_argument('--seed', type=int, default=1234, help='Answer random seed')
+
+
+def config_from_args(args: argparse.Namespace) -> MockAIConfig:
+    """Build a MockAIConfig from parsed add_config_arguments() options."""
+    return MockAIConfig(
+        upload_ms=args.upload_ms,
+        first_token_ms=args.first_token_ms,
+        chunk_ms=args.chunk_ms,
+        chunk_chars=args.chunk_chars,
+        kind=args.kind,
+        seed=args.seed
+    )
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Run the local mock AI chat server')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    server, url = start_mock_server(config_from_args(args), args.port)
+    print(f"Mock AI chat running at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
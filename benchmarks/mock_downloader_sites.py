@@ -0,0 +1,278 @@
+"""
+Local Mock Downloader Sites for the MVoice Benchmarks
+
+Stand-ins for the two downloader sites VideoDownloader drives, so download
+throughput can be measured offline:
+
+- "snaptik" (TikTok): input form, result rendered in-page from an AJAX call,
+  .video-links a.download-file anchor pointing at the CDN
+- "snapvideo" (Instagram): input form posting to a result page with an
+  a.abutton.is-success[title="Download Video"] anchor
+
+Both serve the video from a /snapcdn/ path (Content-Disposition: attachment,
+so a browser click becomes a Playwright download), open an ad popup tab
+when the download link is clicked and show a dismissible ad overlay on the
+result. Latency and failures can be injected per stage: page load, link
+resolution ("video not found" result), and CDN (HTTP 503).
+
+Usage:
+    python benchmarks/mock_downloader_sites.py [--port 8766] [--site snaptik] [--error-rate 0.1]
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+SITES = ["snaptik", "snapvideo"]
+
+# Home page path of each site (matches the real DOWNLOADER_SITES entries)
+SITE_PATHS = {"snaptik": "/", "snapvideo": "/en"}
+
+AD_OVERLAY = """
+<div id="ad-overlay" style="position:fixed;inset:0;background:rgba(0,0,0,.6);z-index:10;"
+     onclick="this.remove()">
+  <div style="background:#fff;margin:20% auto;width:300px;padding:20px;">Advertisement</div>
+</div>
+<script>document.addEventListener('keydown', e => {
+  if (e.key === 'Escape') { const ad = document.getElementById('ad-overlay'); if (ad) ad.remove(); }
+});</script>
+"""
+
+POPUP_ON_CLICK = """
+<script>document.addEventListener('click', e => {
+  if (e.target.closest('a[href*="snapcdn"]')) window.open('/ad', '_blank');
+});</script>
+"""
+
+SNAPTIK_HOME = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Mock SnapTik</title></head>
+<body>
+<form id="main-form">
+  <input type="text" name="url" id="url" placeholder="Paste TikTok link">
+  <button type="submit" class="button-go">Download</button>
+</form>
+<div id="result"></div>
+<script>
+document.getElementById('main-form').onsubmit = async (event) => {
+  event.preventDefault();
+  const res = await fetch('/api/resolve?url=' + encodeURIComponent(document.getElementById('url').value));
+  const data = await res.json();
+  const result = document.getElementById('result');
+  if (!data.ok) { result.innerHTML = '<p class="error">' + data.error + '</p>'; return; }
+  result.innerHTML = '<div class="video-links"><a class="download-file" href="' + data.href +
+    '">Download Server 1</a></div>' + (data.ads ? data.overlay : '');
+};
+</script>
+%(popup)s
+</body></html>
+"""
+
+SNAPVIDEO_HOME = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Mock SnapVideo</title></head>
+<body>
+<form method="post" action="/en/result">
+  <input type="text" name="url" id="url" placeholder="Paste Instagram link">
+  <button type="submit" id="download-btn" class="btn-download">Download</button>
+</form>
+</body></html>
+"""
+
+SNAPVIDEO_RESULT = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Mock SnapVideo - Result</title></head>
+<body>
+%(body)s
+%(popup)s
+</body></html>
+"""
+
+
+class MockSiteConfig:
+    """Latency and failure injection for one mock downloader site."""
+
+    def __init__(
+        self,
+        site: str = "snaptik",
+        page_ms: int = 300,
+        resolve_ms: int = 1000,
+        cdn_ms: int = 200,
+        file_kb: int = 512,
+        error_rate: float = 0.0,
+        cdn_error_rate: float = 0.0,
+        ads: bool = True,
+        seed: int = 1234
+    ):
+        if site not in SITES:
+            raise ValueError(f"site must be one of {SITES}")
+        self.site = site
+        self.page_ms = page_ms
+        self.resolve_ms = resolve_ms
+        self.cdn_ms = cdn_ms
+        self.file_kb = file_kb
+        self.error_rate = error_rate
+        self.cdn_error_rate = cdn_error_rate
+        self.ads = ads
+        self.rng = random.Random(seed)
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    """Serves one mock downloader site, its ad popup and its CDN."""
+
+    config = MockSiteConfig()
+    counters: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return self.config.rng.random() < rate
+
+    def _send(self, body: bytes, content_type: str, status: int = 200, headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_html(self, text: str, status: int = 200):
+        self._send(text.encode('utf-8'), 'text/html; charset=utf-8', status)
+
+    def _resolve(self, video_url: str) -> Tuple[bool, str]:
+        """Simulate the site looking the video up: (ok, cdn href or error)."""
+        time.sleep(self.config.resolve_ms / 1000)
+        self._count('resolve')
+        if not video_url or self._roll(self.config.error_rate):
+            self._count('resolve_error')
+            return False, "Video not found or private"
+        video_id = zlib.crc32(video_url.encode('utf-8'))
+        return True, f"/snapcdn/{video_id}.mp4?token={self.config.rng.randint(0, 10**9)}"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        config = self.config
+        popup = POPUP_ON_CLICK if config.ads else ''
+
+        if path == SITE_PATHS[config.site]:
+            time.sleep(config.page_ms / 1000)
+            self._count('page')
+            page = SNAPTIK_HOME % {'popup': popup} if config.site == 'snaptik' else SNAPVIDEO_HOME
+            self._send_html(page)
+        elif path == '/api/resolve' and config.site == 'snaptik':
+            ok, value = self._resolve(parse_qs(parsed.query).get('url', [''])[0])
+            payload = {'ok': ok, 'ads': config.ads, 'overlay': AD_OVERLAY}
+            payload['href' if ok else 'error'] = value
+            self._send(json.dumps(payload).encode('utf-8'), 'application/json')
+        elif path.startswith('/snapcdn/'):
+            time.sleep(config.cdn_ms / 1000)
+            self._count('cdn')
+            if self._roll(config.cdn_error_rate):
+                self._count('cdn_error')
+                self._send_html('<h1>503 Service Unavailable</h1>', 503)
+                return
+            name = path.rsplit('/', 1)[-1]
+            self._send(b'\0' * (config.file_kb * 1024), 'video/mp4',
+                       headers={'Content-Disposition': f'attachment; filename="{name}"'})
+        elif path == '/ad':
+            self._count('ad')
+            self._send_html('<html><body><h1>Advertisement</h1></body></html>')
+        else:
+            self._send_html('<h1>404</h1>', 404)
+
+    def do_POST(self):
+        config = self.config
+        if urlparse(self.path).path == '/en/result' and config.site == 'snapvideo':
+            length = int(self.headers.get('Content-Length') or 0)
+            form = parse_qs(self.rfile.read(length).decode('utf-8')) if length else {}
+            ok, value = self._resolve(form.get('url', [''])[0])
+            if ok:
+                body = (f'<div class="download-items"><a class="abutton is-success" '
+                        f'title="Download Video" href="{html.escape(value)}">Download Video</a></div>')
+                if config.ads:
+                    body += AD_OVERLAY
+            else:
+                body = f'<p class="error">{html.escape(value)}</p>'
+            self._send_html(SNAPVIDEO_RESULT % {'body': body, 'popup': POPUP_ON_CLICK if config.ads else ''})
+        else:
+            self._send_html('<h1>404</h1>', 404)
+
+
+def start_mock_site(config: MockSiteConfig, port: int = 0) -> Tuple[ThreadingHTTPServer, str, Dict[str, int]]:
+    """
+    Start one mock downloader site on a background thread.
+
+    Args:
+        config: Site flavour, latency and failure settings
+        port: Port to listen on (0 = any free port)
+
+    Returns:
+        (server, site home URL, live request counters); call server.shutdown() when done
+    """
+    counters: Dict[str, int] = {}
+    handler = type('ConfiguredMockSiteHandler', (MockSiteHandler,), {'config': config, 'counters': counters})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{SITE_PATHS[config.site]}", counters
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Add the MockSiteConfig latency/failure options to an argument parser."""
+    parser.add_argument('--page-ms', type=int, default=300, help='Home page load latency')
+    parser.add_argument('--resolve-ms', type=int, default=1000, help='Time to resolve a video link')
+    parser.add_argument('--cdn-ms', type=int, default=200, help='CDN time to first byte')
+    parser.add_argument('--file-kb', type=int, default=512, help='Size of the served video')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of "video not found" results')
+    parser.add_argument('--cdn-error-rate', type=float, default=0.0, help='Share of CDN requests answered with 503')
+    parser.add_argument('--no-ads', action='store_true', help='Disable ad popups/overlays')
+    parser.add_argument('--seed', type=int, default=1234, help='Failure injection random seed')
+
+
+def config_from_args(site: str, args: argparse.Namespace) -> MockSiteConfig:
+    """Build a MockSiteConfig for `site` from parsed add_config_arguments() options."""
+    return MockSiteConfig(
+        site=site,
+        page_ms=args.page_ms,
+        resolve_ms=args.resolve_ms,
+        cdn_ms=args.cdn_ms,
+        file_kb=args.file_kb,
+        error_rate=args.error_rate,
+        cdn_error_rate=args.cdn_error_rate,
+        ads=not args.no_ads,
+        seed=args.seed
+    )
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Run a local mock downloader site')
+    parser.add_argument('--site', choices=SITES, default='snaptik', help='Which site to mimic')
+    parser.add_argument('--port', type=int, default=8766, help='Port to listen on')
+    add_config_arguments(parser)
+
+    args = parser.parse_args()
+
+    server, url, _ = start_mock_site(config_from_args(args.site, args), args.port)
+    print(f"Mock {args.site} running at {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
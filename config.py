@@ -10,6 +10,8 @@ DOWNLOADS_DIR = BASE_DIR / "downloads"
 DATA_FILE = BASE_DIR / "data.csv"
 OUTPUT_FILE = BASE_DIR / "output.csv"
 AUTH_STATE_FILE = BASE_DIR / "auth_state.json"  # Saved login session
+RESULTS_DB_FILE = BASE_DIR / "results.db"  # SQLite index of results behind output.csv
+SELECTOR_CACHE_FILE = BASE_DIR / "selector_cache.json"  # Learned fallback selectors
 
 # Ensure downloads directory exists
 DOWNLOADS_DIR.mkdir(exist_ok=True)
@@ -80,6 +82,32 @@ Example output (all keys must be present; values may be empty strings):
 }
 """
 
+# Number of AI chat sessions (browser contexts) that process videos concurrently.
+# Each session waits ~1 min per video, so this is the main throughput knob.
+AI_CONCURRENCY = 1
+
+# Seconds without any change in the chat DOM before the streaming response
+# capture gives up and falls back to polling
+RESPONSE_STREAM_IDLE_TIMEOUT = 60
+
+# Upper bounds (milliseconds) for the condition waits between chat steps.
+# Each wait returns as soon as its condition holds; on timeout the step goes on.
+PAGE_READY_TIMEOUT = 15000      # message box visible after loading the chat
+MENU_TIMEOUT = 3000             # reasoning dropdown opened / closed
+UPLOAD_READY_TIMEOUT = 60000    # attachment shown, no upload progress left
+SEND_READY_TIMEOUT = 30000      # send button enabled once the prompt is typed
+RESPONSE_START_TIMEOUT = 5000   # first answer text before polling starts
+NEW_CHAT_TIMEOUT = 5000         # old conversation cleared by "New chat"
+
+# How the AI answer is captured:
+#   "dom"     - read it from the rendered chat (MutationObserver, then polling)
+#   "network" - rebuild it from the chat backend's XHR/SSE/websocket traffic,
+#               falling back to "dom" if nothing complete arrives
+RESPONSE_CAPTURE_MODE = "dom"
+
+# Regex for chat backend URLs whose responses/websocket frames carry the answer
+AI_STREAM_URL_PATTERN = r"/api/.*(chat|message|completion|stream|conversation)"
+
 # Playwright settings
 BROWSER_HEADLESS = False  # Set to True for headless mode
 SLOW_MO = 100  # Milliseconds between actions (for debugging)
@@ -91,5 +119,70 @@ DOWNLOAD_TIMEOUT = 120  # Seconds
 BATCH_SIZE = 5  # Number of videos to download per batch
 DELETE_AFTER_UPLOAD = True  # Delete video file after successful AI upload
 
+# Third-party downloader site used for each platform
+DOWNLOADER_SITES = {
+    "tiktok": "https://snaptik.app/",
+    "instagram": "https://snapvideo.app/en",
+}
+
+# Fetch resolved CDN links over HTTP (needs aiohttp) instead of clicking
+# through ads and waiting for a browser download. Falls back automatically.
+DIRECT_DOWNLOAD = True
+
+# Max parallel downloads (browser contexts) per downloader site host
+DOWNLOAD_CONCURRENCY = {
+    "snaptik.app": 3,
+    "snapvideo.app": 2,
+}
+
+# Sharded runs (shard_runner.py): worker processes, each with its own browsers,
+# and the folder holding their data/output/downloads partitions
+SHARD_COUNT = 4
+SHARDS_DIR = BASE_DIR / "shards"
+
+# Distributed runs (job_queue.py): workers on several VMs lease URLs from a
+# shared SQLite file or from an HTTP coordinator. A lease that is not renewed
+# (crashed worker) expires and the URL goes back to the queue; after
+# JOB_MAX_ATTEMPTS expired leases it is logged as failed.
+JOB_QUEUE_FILE = BASE_DIR / "jobs.db"
+JOB_QUEUE_PORT = 8765
+JOB_LEASE_SECONDS = 900
+JOB_MAX_ATTEMPTS = 3
+
+# How data.csv is de-duplicated while it is streamed:
+#   "digest" - exact; keeps an 8-byte hash per unique URL
+#   "bloom"  - fixed-size Bloom filter for INPUT_BLOOM_CAPACITY URLs; about
+#              INPUT_BLOOM_ERROR_RATE of the unique URLs are wrongly skipped
+INPUT_DEDUP = "digest"
+INPUT_BLOOM_CAPACITY = 10_000_000
+INPUT_BLOOM_ERROR_RATE = 1e-4
+
+# TikTok short links (vm.tiktok.com/..., tiktok.com/t/...) carry no video ID.
+# With RESOLVE_SHORT_LINKS they are followed once while data.csv is read and
+# the target is cached, so they dedupe with the full URL of the same video.
+RESOLVE_SHORT_LINKS = False
+SHORT_LINK_CACHE_FILE = BASE_DIR / "short_links.json"
+DUPLICATES_REPORT_FILE = BASE_DIR / "duplicates_report.csv"
+
+# Keep a SQLite results store (one row per URL, raw responses) next to output.csv
+USE_RESULTS_DB = True
+
+# Reuse the stored result when a downloaded video has the same content as one
+# already analyzed (reposts, re-shares) instead of spending an AI minute on it.
+# Needs USE_RESULTS_DB (the hash -> result index lives in results.db).
+#   "sampled" - file size + CONTENT_HASH_SAMPLES chunks of CONTENT_HASH_SAMPLE_BYTES
+#   "full"    - every byte of the file
+CONTENT_DEDUP = True
+CONTENT_HASH_MODE = "sampled"
+CONTENT_HASH_SAMPLE_BYTES = 64 * 1024
+CONTENT_HASH_SAMPLES = 4
+
+# Per-stage timing: one JSON line per stage span / retry (None to disable)
+METRICS_FILE = BASE_DIR / "metrics.jsonl"
+
+# Optional Prometheus text-format file with stage histograms, rewritten as the
+# pipeline runs (e.g. for the node_exporter textfile collector). None = off.
+METRICS_PROM_FILE = None
+
 # Supported platforms
 SUPPORTED_PLATFORMS = ["tiktok", "instagram"]
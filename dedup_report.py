@@ -0,0 +1,108 @@
+"""
+Duplicate URL Report for MVoice Automation
+
+Lists the data.csv rows that collapse onto the same video key
+(normalize_url: platform + video ID), i.e. the rows the pipeline skips
+because an earlier row already covers the same video.
+
+Usage:
+    python dedup_report.py                       # write duplicates_report.csv
+    python dedup_report.py --resolve             # follow TikTok short links first
+    python dedup_report.py --data other.csv --report other_dupes.csv
+"""
+import argparse
+import csv
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import DATA_FILE, DUPLICATES_REPORT_FILE
+from utils import (
+    logger,
+    iter_urls_from_csv,
+    normalize_url,
+    is_short_link,
+    resolve_short_link
+)
+
+
+REPORT_COLUMNS = ['key', 'kept_row', 'kept_url', 'duplicate_row', 'duplicate_url', 'reason']
+
+
+def _reason(kept: str, duplicate: str) -> str:
+    """Why two URLs share a key: exact repeat, short link, or another URL variant."""
+    if kept.strip() == duplicate.strip():
+        return 'exact'
+    if is_short_link(kept) or is_short_link(duplicate):
+        return 'short_link'
+    return 'variant'
+
+
+def find_duplicates(file_path: Path = DATA_FILE, resolve: bool = False) -> Tuple[int, int, List[dict]]:
+    """
+    Group the URLs of a CSV file by video key.
+
+    Args:
+        file_path: Input CSV with a 'url' column
+        resolve: Follow TikTok short links (network, cached) before keying
+
+    Returns:
+        (rows read, unique keys, one report row per collapsed duplicate)
+    """
+    first: Dict[str, Tuple[int, str]] = {}
+    duplicates = []
+    rows = 0
+    for rows, url in enumerate(iter_urls_from_csv(file_path), start=1):
+        if resolve and is_short_link(url):
+            resolve_short_link(url)
+        key = normalize_url(url)
+        if key not in first:
+            first[key] = (rows, url)
+            continue
+        kept_row, kept_url = first[key]
+        duplicates.append({
+            'key': key,
+            'kept_row': kept_row,
+            'kept_url': kept_url,
+            'duplicate_row': rows,
+            'duplicate_url': url,
+            'reason': _reason(kept_url, url),
+        })
+    return rows, len(first), duplicates
+
+
+def write_report(duplicates: List[dict], file_path: Path = DUPLICATES_REPORT_FILE):
+    """Write the duplicate rows to a CSV file."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(duplicates)
+    logger.info(f"Wrote {len(duplicates)} duplicates to {file_path}")
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Report data.csv rows that point to the same video')
+    parser.add_argument('--data', type=str, default=str(DATA_FILE), help='Input CSV with URLs')
+    parser.add_argument('--report', type=str, default=str(DUPLICATES_REPORT_FILE), help='Report CSV to write')
+    parser.add_argument('--resolve', action='store_true', help='Resolve TikTok short links (needs network)')
+
+    args = parser.parse_args()
+
+    rows, unique, duplicates = find_duplicates(Path(args.data), resolve=args.resolve)
+    write_report(duplicates, Path(args.report))
+
+    print("\n" + "="*50)
+    print("DUPLICATE URLS")
+    print("="*50)
+    print(f"Rows: {rows}")
+    print(f"Unique videos: {unique}")
+    print(f"Duplicates collapsed: {len(duplicates)}")
+    for reason, count in Counter(d['reason'] for d in duplicates).most_common():
+        print(f"  {reason}: {count}")
+    print(f"Report: {args.report}")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    main()
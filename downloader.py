@@ -9,19 +9,29 @@ Usage:
 """
 import asyncio
 import argparse
+import os
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, urljoin
 
 from playwright.async_api import async_playwright, Page, Browser
 
+try:
+    import aiohttp
+except ImportError:  # Direct CDN fetch is optional; browser downloads still work
+    aiohttp = None
+
 from config import (
     DOWNLOADS_DIR, 
     BROWSER_HEADLESS, 
     SLOW_MO, 
     TIMEOUT,
     MAX_RETRIES,
-    DOWNLOAD_TIMEOUT
+    DOWNLOAD_TIMEOUT,
+    DOWNLOADER_SITES,
+    DOWNLOAD_CONCURRENCY,
+    DIRECT_DOWNLOAD
 )
 from utils import (
     logger, 
@@ -31,6 +41,67 @@ from utils import (
     generate_filename,
     log_failed_url
 )
+from metrics import StageMetrics
+from selector_cache import SelectorResolver
+
+
+class _DownloadWaiter:
+    """
+    Signals download completion through an asyncio.Event.
+    
+    The page's download handler sets the event once the file is saved. A
+    failed download, a crashed or closed page, or a closed context set it
+    too (with `error`), so a dead download fails at once instead of
+    running out the timeout.
+    """
+    
+    def __init__(self, page: Page, output_path: Path):
+        self.output_path = output_path
+        self.error: Optional[str] = None
+        self._event = asyncio.Event()
+        
+        page.on("download", self._on_download)
+        page.on("crash", lambda _: self._fail("page crashed"))
+        page.on("close", lambda _: self._fail("page closed"))
+        page.context.on("close", lambda _: self._fail("context closed"))
+    
+    @property
+    def finished(self) -> bool:
+        """True once the download succeeded or failed."""
+        return self._event.is_set()
+    
+    def _fail(self, reason: str):
+        if not self._event.is_set():
+            self.error = reason
+            self._event.set()
+    
+    async def _on_download(self, download):
+        logger.info(f"Download started: {download.suggested_filename}")
+        try:
+            # Resolves when the download finishes; None means success
+            failure = await download.failure()
+            if failure:
+                self._fail(f"download failed: {failure}")
+                return
+            await download.save_as(self.output_path)
+        except Exception as e:
+            self._fail(f"could not save download: {e}")
+            return
+        logger.info(f"Download saved to: {self.output_path}")
+        self._event.set()
+    
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for the download to finish.
+        
+        Returns:
+            True if the video was saved, False on failure or timeout
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._event.is_set() and self.error is None
 
 
 class VideoDownloader:
@@ -38,10 +109,31 @@ class VideoDownloader:
     Handles video downloading from various platforms.
     """
     
-    def __init__(self, headless: bool = BROWSER_HEADLESS):
+    def __init__(
+        self,
+        headless: bool = BROWSER_HEADLESS,
+        site_concurrency: Optional[Dict[str, int]] = None,
+        downloads_dir: Path = DOWNLOADS_DIR,
+        site_urls: Optional[Dict[str, str]] = None,
+        metrics: Optional[StageMetrics] = None,
+        selectors: Optional[SelectorResolver] = None
+    ):
         self.headless = headless
+        self.metrics = metrics or StageMetrics()
+        # Learned download-link selectors per site
+        self.selectors = selectors or SelectorResolver()
+        # Downloader site per platform (e.g. a local fixture server in the benchmarks)
+        self.site_urls = dict(site_urls or DOWNLOADER_SITES)
         self.browser: Optional[Browser] = None
-        self.downloads_dir = DOWNLOADS_DIR
+        self.http = None  # aiohttp.ClientSession for direct CDN fetches
+        self.downloads_dir = downloads_dir
+        self.downloads_dir.mkdir(parents=True, exist_ok=True)
+        self.site_concurrency = dict(site_concurrency or DOWNLOAD_CONCURRENCY)
+        # One semaphore per downloader site caps parallel contexts on that site
+        self._site_limits: Dict[str, asyncio.Semaphore] = {
+            site: asyncio.Semaphore(max(1, limit))
+            for site, limit in self.site_concurrency.items()
+        }
         
     async def __aenter__(self):
         await self.start()
@@ -58,15 +150,145 @@ class VideoDownloader:
             slow_mo=SLOW_MO
         )
         logger.info("Browser started for downloading")
+        logger.info(f"Download concurrency per site: {self.describe_concurrency()}")
+        
+        if DIRECT_DOWNLOAD and aiohttp is not None:
+            # One pooled client shared by all download workers
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency * 2),
+                timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT, sock_read=30)
+            )
+        elif DIRECT_DOWNLOAD:
+            logger.info("aiohttp not installed, direct CDN fetch disabled")
         
     async def close(self):
         """Close the browser."""
+        self.selectors.save()
+        if self.http:
+            await self.http.close()
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
         logger.info("Browser closed")
     
+    @property
+    def max_concurrency(self) -> int:
+        """Total number of downloads that can run at once across all sites."""
+        return sum(max(1, limit) for limit in self.site_concurrency.values())
+    
+    def describe_concurrency(self) -> str:
+        """Human readable per-site concurrency setting, e.g. 'snaptik.app=3, snapvideo.app=2'."""
+        return ", ".join(f"{site}={limit}" for site, limit in self.site_concurrency.items())
+    
+    def _site_limit(self, platform: str) -> asyncio.Semaphore:
+        """Get the concurrency semaphore for the downloader site of a platform."""
+        site = urlparse(self.site_urls.get(platform, "")).netloc
+        if site not in self._site_limits:
+            self._site_limits[site] = asyncio.Semaphore(1)
+        return self._site_limits[site]
+    
+    async def _fetch_direct(self, href: str, output_path: Path, headers: dict) -> bool:
+        """
+        Stream a resolved video link straight to disk over HTTP.
+        
+        Writes to a .part file of this process first so a half-written video
+        never looks like a finished download, and two worker processes
+        fetching the same video never write into one file.
+        
+        Args:
+            href: Absolute video URL (usually a CDN link)
+            output_path: Path to save video
+            headers: Extra request headers (Referer, User-Agent)
+            
+        Returns:
+            True if a non-empty video was saved, False otherwise
+        """
+        tmp_path = output_path.with_name(f'{output_path.name}.{os.getpid()}.part')
+        try:
+            async with self.http.get(href, headers=headers) as response:
+                content_type = response.headers.get('Content-Type', '')
+                if response.status != 200 or 'text/html' in content_type:
+                    logger.info(f"Direct fetch got HTTP {response.status} ({content_type}), falling back to browser download")
+                    return False
+                
+                size = 0
+                with open(tmp_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(1 << 16):
+                        f.write(chunk)
+                        size += len(chunk)
+            
+            if size == 0:
+                logger.info("Direct fetch returned an empty body, falling back to browser download")
+                tmp_path.unlink(missing_ok=True)
+                return False
+            
+            tmp_path.replace(output_path)
+            logger.info(f"Direct download saved {size // 1024} KB to: {output_path}")
+            return True
+        except Exception as e:
+            logger.info(f"Direct fetch failed ({e}), falling back to browser download")
+            tmp_path.unlink(missing_ok=True)
+            return False
+    
+    async def _try_direct_download(
+        self,
+        page: Page,
+        role: str,
+        selectors: List[str],
+        output_path: Path,
+        timeout: int = 15000
+    ) -> bool:
+        """
+        Fast path: read the download anchor's href and fetch it directly.
+        
+        Skips ad clicking and Playwright download events entirely. The anchor
+        only has to be attached, not visible, so ad overlays don't matter.
+        
+        Args:
+            page: Downloader site page after the URL was submitted
+            role: Selector cache role of the anchor (e.g. "tiktok.direct_link")
+            selectors: Anchor selectors in priority order
+            output_path: Path to save video
+            timeout: Max time to wait for an anchor (ms)
+            
+        Returns:
+            True if the video was saved, False to fall back to the browser flow
+        """
+        if self.http is None:
+            return False
+        
+        selectors = self.selectors.ordered(role, selectors)
+        try:
+            await page.wait_for_selector(", ".join(selectors), state="attached", timeout=timeout)
+        except Exception:
+            self.selectors.missed(role)
+            logger.info("No download anchor yet, falling back to browser download")
+            return False
+        
+        for selector in selectors:
+            try:
+                anchors = page.locator(selector)
+                if await anchors.count() == 0:
+                    continue
+                href = await anchors.first.get_attribute("href", timeout=1000)
+            except Exception:
+                continue
+            
+            if not href:
+                continue
+            href = urljoin(page.url, href)
+            if not href.startswith(("http://", "https://")):
+                continue
+            
+            logger.info(f"Resolved download link with selector {selector}, fetching directly")
+            self.selectors.found(role, selector)
+            user_agent = await page.evaluate("navigator.userAgent")
+            if await self._fetch_direct(href, output_path, {"Referer": page.url, "User-Agent": user_agent}):
+                return True
+        
+        return False
+    
     async def _close_ads(self, page: Page):
         """
         Close any ads or popups that appear on the page.
@@ -132,7 +354,7 @@ class VideoDownloader:
         
         try:
             # Use snaptik as downloader
-            downloader_url = "https://snaptik.app/"
+            downloader_url = self.site_urls["tiktok"]
             logger.info(f"Navigating to {downloader_url}")
             await page.goto(downloader_url, timeout=TIMEOUT)
             
@@ -152,6 +374,14 @@ class VideoDownloader:
             submit_selector = 'button[type="submit"], .button-go, #submiturl'
             await page.click(submit_selector)
             
+            # Fast path: fetch the resolved link directly once the anchor exists.
+            # Only result-link selectors: the wait resolves on the first match,
+            # and a[href*="download"] also matches nav and app-store links
+            direct_selectors = ['a[href*="snapcdn"]', 'a.download-file', '.video-links a']
+            if await self._try_direct_download(page, 'tiktok.direct_link', direct_selectors, output_path):
+                logger.info(f"Saved TikTok video: {output_path}")
+                return True
+            
             # Wait longer for page to process and ads to appear
             logger.info("Waiting for page to process (5 seconds)...")
             await page.wait_for_timeout(5000)
@@ -165,55 +395,47 @@ class VideoDownloader:
                 'a:has-text("Server")'
             ]
             
-            for selector in download_selectors:
+            for selector in self.selectors.ordered('tiktok.download_link', download_selectors):
                 try:
                     download_link = page.locator(selector).first
                     if await download_link.is_visible(timeout=3000):
                         logger.info(f"Found download link with selector: {selector}")
+                        self.selectors.found('tiktok.download_link', selector)
                         
-                        # Use Playwright's expect_download with event handler
-                        download_done = False
-                        
-                        async def on_download(download):
-                            nonlocal download_done
-                            logger.info(f"Download started: {download.suggested_filename}")
-                            await download.save_as(output_path)
-                            logger.info(f"Download saved to: {output_path}")
-                            download_done = True
-                        
-                        page.on("download", on_download)
+                        waiter = _DownloadWaiter(page, output_path)
                         
                         # Click download button (this triggers ads)
                         await download_link.click()
                         logger.info("Clicked download button, waiting for ads...")
                         
-                        # Wait for ads to appear
-                        await page.wait_for_timeout(2000)
+                        # Give ads time to appear (returns early if the download finishes)
+                        await waiter.wait(2)
                         
                         # Try to close ads by clicking multiple times
                         for attempt in range(5):
-                            if download_done:
-                                logger.info("Download already completed!")
-                                return True
+                            if waiter.finished:
+                                break
                             logger.info(f"Ad closing attempt {attempt + 1}/5")
                             await self._close_ads(page)
-                            await page.wait_for_timeout(800)
+                            await waiter.wait(0.8)
                         
                         # Wait for download to complete (max 30 seconds after ad closing)
                         logger.info("Waiting for download to complete (max 30s)...")
                         download_wait_timeout = 30  # seconds
-                        for i in range(download_wait_timeout):
-                            if download_done or output_path.exists():
-                                logger.info(f"Saved TikTok video: {output_path}")
-                                return True
-                            await page.wait_for_timeout(1000)
+                        if await waiter.wait(download_wait_timeout):
+                            logger.info(f"Saved TikTok video: {output_path}")
+                            return True
                         
-                        logger.warning(f"Download timeout after {download_wait_timeout}s for {url}")
+                        if waiter.error:
+                            logger.warning(f"Download failed for {url}: {waiter.error}")
+                        else:
+                            logger.warning(f"Download timeout after {download_wait_timeout}s for {url}")
                         return False  # Exit after timeout, don't try other selectors
                 except Exception as e:
                     logger.debug(f"Error with selector {selector}: {e}")
                     continue
             
+            self.selectors.missed('tiktok.download_link')
             logger.warning(f"Could not find download link for {url}")
             return False
             
@@ -241,7 +463,7 @@ class VideoDownloader:
         
         try:
             # Use snapinsta as downloader
-            downloader_url = "https://snapvideo.app/en"
+            downloader_url = self.site_urls["instagram"]
             logger.info(f"Navigating to {downloader_url}")
             await page.goto(downloader_url, timeout=TIMEOUT)
             
@@ -261,6 +483,12 @@ class VideoDownloader:
             submit_selector = 'button:has-text("Download"), .btn-download, #download-btn, button[type="submit"]'
             await page.click(submit_selector)
             
+            # Fast path: fetch the resolved link directly once the anchor exists
+            direct_selectors = ['a[href*="snapcdn"]', 'a[title="Download Video"]', 'a.abutton.is-success']
+            if await self._try_direct_download(page, 'instagram.direct_link', direct_selectors, output_path):
+                logger.info(f"Saved Instagram video: {output_path}")
+                return True
+            
             # Wait for page to process
             logger.info("Waiting for page to process (5 seconds)...")
             await page.wait_for_timeout(5000)
@@ -291,16 +519,7 @@ class VideoDownloader:
                         pass
             
             # Setup download event handler
-            download_done = False
-            
-            async def on_download(download):
-                nonlocal download_done
-                logger.info(f"Download started: {download.suggested_filename}")
-                await download.save_as(output_path)
-                logger.info(f"Download saved to: {output_path}")
-                download_done = True
-            
-            page.on("download", on_download)
+            waiter = _DownloadWaiter(page, output_path)
             
             # Look for "Download Video" link
             download_selectors = [
@@ -311,11 +530,12 @@ class VideoDownloader:
                 'a.abutton.is-success',
             ]
             
-            for selector in download_selectors:
+            for selector in self.selectors.ordered('instagram.download_link', download_selectors):
                 try:
                     download_link = page.locator(selector).first
                     if await download_link.is_visible(timeout=3000):
                         logger.info(f"Found download link with selector: {selector}")
+                        self.selectors.found('instagram.download_link', selector)
                         
                         # Click download video link
                         await download_link.click()
@@ -324,11 +544,12 @@ class VideoDownloader:
                         # Wait for download to complete (max 30 seconds)
                         logger.info("Waiting for download to complete (max 30s)...")
                         download_wait_timeout = 30  # seconds
-                        for i in range(download_wait_timeout):
-                            if download_done or output_path.exists():
-                                logger.info(f"Saved Instagram video: {output_path}")
-                                return True
-                            await page.wait_for_timeout(1000)
+                        if await waiter.wait(download_wait_timeout):
+                            logger.info(f"Saved Instagram video: {output_path}")
+                            return True
+                        if waiter.error:
+                            logger.warning(f"Download failed for {url}: {waiter.error}")
+                            return False
                         
                         # If still not downloaded after initial wait, try closing popup ads
                         logger.info(f"Initial wait expired; attempting ad-close retries for {url}...")
@@ -339,50 +560,51 @@ class VideoDownloader:
                                 # Click at top of page
                                 try:
                                     await page.mouse.click(viewport["width"] // 2, 100)
-                                    await page.wait_for_timeout(500)
+                                    await waiter.wait(0.5)
                                 except Exception:
                                     pass
                                 # Click at bottom of page
                                 try:
                                     await page.mouse.click(viewport["width"] // 2, viewport["height"] - 100)
-                                    await page.wait_for_timeout(500)
+                                    await waiter.wait(0.5)
                                 except Exception:
                                     pass
                                 # Press Escape
                                 try:
                                     await page.keyboard.press("Escape")
-                                    await page.wait_for_timeout(300)
+                                    await waiter.wait(0.3)
                                 except Exception:
                                     pass
 
                                 # If download started during clicks, finish
-                                if download_done or output_path.exists():
-                                    logger.info(f"Saved Instagram video after ad-close: {output_path}")
-                                    return True
+                                if waiter.finished:
+                                    break
 
                                 # Try clicking the download link again if visible
                                 try:
                                     if await download_link.is_visible(timeout=1000):
                                         logger.info("Re-clicking download link after ad-close attempt...")
                                         await download_link.click()
-                                        await page.wait_for_timeout(800)
+                                        await waiter.wait(0.8)
                                 except Exception:
                                     pass
 
                         # After ad-close retries, wait again for download to complete (max 30 seconds)
                         logger.info("Waiting again for download to complete (max 30s)...")
-                        for i in range(download_wait_timeout):
-                            if download_done or output_path.exists():
-                                logger.info(f"Saved Instagram video: {output_path}")
-                                return True
-                            await page.wait_for_timeout(1000)
+                        if await waiter.wait(download_wait_timeout):
+                            logger.info(f"Saved Instagram video: {output_path}")
+                            return True
 
-                        logger.warning(f"Download timeout after retries ({download_wait_timeout}s) for {url}")
+                        if waiter.error:
+                            logger.warning(f"Download failed for {url}: {waiter.error}")
+                        else:
+                            logger.warning(f"Download timeout after retries ({download_wait_timeout}s) for {url}")
                         return False  # Exit after timeout
                 except Exception as e:
                     logger.debug(f"Error with selector {selector}: {e}")
                     continue
             
+            self.selectors.missed('instagram.download_link')
             logger.warning(f"Could not find download link for {url}")
             return False
             
@@ -404,7 +626,7 @@ class VideoDownloader:
             Path to downloaded video or None if failed
         """
         platform = detect_platform(url)
-        output_path = get_video_path(url, index)
+        output_path = get_video_path(url, index, self.downloads_dir)
         
         # Skip if already downloaded
         if output_path.exists():
@@ -413,23 +635,29 @@ class VideoDownloader:
         
         logger.info(f"Downloading {platform} video: {url}")
         
+        if platform not in ('tiktok', 'instagram'):
+            logger.warning(f"Unsupported platform for URL: {url}")
+            return None
+        
         success = False
-        for attempt in range(MAX_RETRIES):
-            try:
-                if platform == 'tiktok':
-                    success = await self.download_tiktok(url, output_path)
-                elif platform == 'instagram':
-                    success = await self.download_instagram(url, output_path)
-                else:
-                    logger.warning(f"Unsupported platform for URL: {url}")
-                    return None
-                
-                if success:
-                    return output_path
+        with self.metrics.span('download', url) as span:
+            for attempt in range(MAX_RETRIES):
+                if attempt > 0:
+                    self.metrics.count_retry('download', url, attempt + 1)
+                try:
+                    async with self._site_limit(platform):
+                        if platform == 'tiktok':
+                            success = await self.download_tiktok(url, output_path)
+                        else:
+                            success = await self.download_instagram(url, output_path)
                     
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1} failed: {e}")
-                await asyncio.sleep(2)
+                    if success:
+                        return output_path
+                        
+                except Exception as e:
+                    logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                    await asyncio.sleep(2)
+            span.ok = False
         
         logger.error(f"Failed to download after {MAX_RETRIES} attempts: {url}")
         return None
@@ -438,6 +666,9 @@ class VideoDownloader:
         """
         Download all videos from list of URLs.
         
+        Runs max_concurrency workers; the per-site semaphores keep each
+        downloader site within its own limit.
+        
         Args:
             urls: List of video URLs
             
@@ -450,23 +681,25 @@ class VideoDownloader:
             'skipped': []
         }
         
-        for i, url in enumerate(urls):
-            logger.info(f"Processing {i + 1}/{len(urls)}: {url}")
-            
-            output_path = get_video_path(url, i)
-            if output_path.exists():
-                results['skipped'].append(url)
-                continue
-            
-            path = await self.download_video(url, i)
-            
-            if path:
-                results['successful'].append({'url': url, 'path': str(path)})
-            else:
-                results['failed'].append(url)
-            
-            # Rate limiting
-            await asyncio.sleep(2)
+        pending = iter(enumerate(urls))
+        
+        async def worker():
+            for i, url in pending:
+                logger.info(f"Processing {i + 1}/{len(urls)}: {url}")
+                
+                output_path = get_video_path(url, i, self.downloads_dir)
+                if output_path.exists():
+                    results['skipped'].append(url)
+                    continue
+                
+                path = await self.download_video(url, i)
+                
+                if path:
+                    results['successful'].append({'url': url, 'path': str(path)})
+                else:
+                    results['failed'].append(url)
+        
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
         
         return results
 
@@ -0,0 +1,603 @@
+"""
+Distributed Job Queue for MVoice Automation
+
+Lease-based queue of data.csv URLs that StreamingPipeline workers on
+several machines pull from, one URL at a time, so a fast worker simply
+takes more URLs than a slow one:
+
+    pending --claim--> leased --complete--> done / failed
+
+A claimed URL is leased to the worker for JOB_LEASE_SECONDS; running
+workers renew their leases. A lease that expires (crashed worker) puts the
+URL back to pending. When nothing is pending, an idle worker steals a URL
+that another worker has leased but not started downloading yet.
+
+Results are stored with the job and appended to output.csv in data.csv
+order by whoever owns the queue file, so there is one output.csv to hand in.
+
+The queue is a SQLite file (jobs.db) shared by local worker processes, or
+served over HTTP by a coordinator for workers on other machines.
+
+Usage:
+    python job_queue.py serve [--host 0.0.0.0] [--port 8765]   # coordinator
+    python pipeline.py --queue http://<coordinator>:8765         # on each VM
+
+    python job_queue.py init                                    # local workers
+    python pipeline.py --queue jobs.db                           # (several times)
+
+    python job_queue.py status
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import (
+    DATA_FILE,
+    OUTPUT_FILE,
+    JOB_QUEUE_FILE,
+    JOB_QUEUE_PORT,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS
+)
+from utils import (
+    logger,
+    normalize_url,
+    iter_unique_urls,
+    get_processed_urls,
+    append_result_to_csv_parsed,
+    log_failed_url
+)
+
+
+# Job statuses
+JOB_PENDING = 'pending'
+JOB_LEASED = 'leased'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    started INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    response TEXT,
+    error TEXT,
+    collected INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_seq ON jobs(status, seq);
+"""
+
+
+def default_worker_id() -> str:
+    """hostname-pid, unique per worker process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """
+    SQLite job queue (WAL mode), safe to share between processes on one machine.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction, so two
+    workers can never claim the same URL. If output_file is set, finished
+    jobs are appended to it (in seq order) as soon as all earlier jobs are
+    finished. Methods may be called from worker threads (asyncio.to_thread);
+    a lock serializes them.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = JOB_QUEUE_FILE,
+        output_file: Optional[Path] = OUTPUT_FILE,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ):
+        self.db_path = db_path
+        self.output_file = output_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Transactions are managed by hand (BEGIN IMMEDIATE)
+        self.conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=10000")
+        self.conn.executescript(SCHEMA)
+
+    def __repr__(self):
+        return f"JobQueue({self.db_path})"
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _now(self) -> str:
+        return datetime.now().isoformat(timespec='seconds')
+
+    def enqueue(self, jobs: Iterable[Tuple[int, str]]) -> int:
+        """
+        Add URLs to the queue; URLs already in it are left alone.
+
+        Args:
+            jobs: (seq, url) pairs, seq being the URL's position in data.csv
+
+        Returns:
+            Number of URLs added
+        """
+        now = self._now()
+        with self._transaction():
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (url_key, url, seq, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(normalize_url(url), url, seq, JOB_PENDING, now) for seq, url in jobs]
+            )
+            return self.conn.total_changes - before
+
+    def _expire_leases(self):
+        """Put URLs whose lease ran out back to pending (or fail them)."""
+        now = self._now()
+        expired = self.conn.execute(
+            "SELECT url_key, url, worker, attempts FROM jobs WHERE status = ? AND lease_until < ?",
+            (JOB_LEASED, time.time())
+        ).fetchall()
+        for key, url, worker, attempts in expired:
+            if attempts >= self.max_attempts:
+                logger.warning(f"Lease of {url} expired {attempts} times, giving up")
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, error = ?, "
+                    "updated_at = ? WHERE url_key = ?",
+                    (JOB_FAILED, f"Lease expired {attempts} times (worker crashed?)", now, key)
+                )
+            else:
+                logger.warning(f"Lease of {url} held by {worker} expired, re-queued")
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, started = 0, "
+                    "updated_at = ? WHERE url_key = ?",
+                    (JOB_PENDING, now, key)
+                )
+
+    def claim(self, worker: str) -> Optional[Tuple[int, str]]:
+        """
+        Lease the next URL to a worker.
+
+        Pending URLs go first (in seq order). When none are left, a URL
+        leased by another worker but not started yet is stolen; a started
+        URL (download running) only comes back once its lease expires.
+
+        Returns:
+            (seq, url), or None if there is nothing left to do
+        """
+        with self._transaction():
+            self._expire_leases()
+            row = self.conn.execute(
+                "SELECT url_key, seq, url FROM jobs WHERE status = ? ORDER BY seq LIMIT 1",
+                (JOB_PENDING,)
+            ).fetchone()
+            stolen = False
+            if row is None:
+                row = self.conn.execute(
+                    "SELECT url_key, seq, url FROM jobs WHERE status = ? AND started = 0 AND worker != ? "
+                    "ORDER BY seq LIMIT 1",
+                    (JOB_LEASED, worker)
+                ).fetchone()
+                stolen = row is not None
+            if row is None:
+                return None
+
+            key, seq, url = row
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, started = 0, "
+                "attempts = attempts + ?, updated_at = ? WHERE url_key = ?",
+                (JOB_LEASED, worker, time.time() + self.lease_seconds, 0 if stolen else 1, self._now(), key)
+            )
+        if stolen:
+            logger.info(f"{worker} stole {url}")
+        return seq, url
+
+    def start(self, worker: str, url: str) -> bool:
+        """
+        Mark a leased URL as started (it can no longer be stolen) and renew its lease.
+
+        Workers call it when the download begins and again before the
+        upload, to check that the lease is still theirs.
+
+        Returns:
+            False if the worker no longer holds the lease (stolen or expired)
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET started = 1, lease_until = ?, updated_at = ? "
+                "WHERE url_key = ? AND worker = ? AND status = ?",
+                (time.time() + self.lease_seconds, self._now(), normalize_url(url), worker, JOB_LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, worker: str) -> int:
+        """
+        Extend every lease a worker holds (its heartbeat).
+
+        Returns:
+            Number of leases renewed
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE worker = ? AND status = ?",
+                (time.time() + self.lease_seconds, worker, JOB_LEASED)
+            )
+            return cursor.rowcount
+
+    def complete(self, worker: str, url: str, response: Optional[str] = None, error: Optional[str] = None):
+        """
+        Store the result of a URL and write finished jobs to output_file.
+
+        A late result from a worker whose lease expired is still accepted
+        unless another worker holds the URL now; a done job is never replaced.
+
+        Args:
+            worker: Worker id
+            url: Video URL
+            response: Raw AI response (None if it failed)
+            error: Reason for failure
+        """
+        status = JOB_DONE if response else JOB_FAILED
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = NULL, response = ?, error = ?, "
+                "collected = 0, updated_at = ? WHERE url_key = ? AND status != ? "
+                "AND NOT (status = ? AND worker != ?)",
+                (status, worker, response, None if response else (error or "AI upload failed"),
+                 self._now(), normalize_url(url), JOB_DONE, JOB_LEASED, worker)
+            )
+            if self.output_file:
+                self._collect(self.output_file)
+
+    def release(self, worker: str) -> int:
+        """
+        Give back the URLs a stopping worker leased but did not start.
+
+        Returns:
+            Number of URLs put back to pending
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, attempts = attempts - 1, "
+                "updated_at = ? WHERE worker = ? AND status = ? AND started = 0",
+                (JOB_PENDING, self._now(), worker, JOB_LEASED)
+            )
+            return cursor.rowcount
+
+    def collect(self, output_file: Path = OUTPUT_FILE, everything: bool = False) -> int:
+        """
+        Append finished, not yet written jobs to output_file in seq order.
+
+        Args:
+            output_file: Output CSV path
+            everything: Also write jobs behind an unfinished one (e.g. at the end of a run)
+
+        Returns:
+            Number of rows written
+        """
+        with self._transaction():
+            return self._collect(output_file, everything)
+
+    def _collect(self, output_file: Path, everything: bool = False) -> int:
+        barrier = None
+        if not everything:
+            barrier = self.conn.execute(
+                "SELECT MIN(seq) FROM jobs WHERE status IN (?, ?)", (JOB_PENDING, JOB_LEASED)
+            ).fetchone()[0]
+        rows = self.conn.execute(
+            "SELECT url_key, url, status, response, error FROM jobs "
+            "WHERE status IN (?, ?) AND collected = 0 AND (? IS NULL OR seq < ?) ORDER BY seq",
+            (JOB_DONE, JOB_FAILED, barrier, barrier)
+        ).fetchall()
+        for key, url, status, response, error in rows:
+            if status == JOB_DONE:
+                append_result_to_csv_parsed(url, response, output_file)
+            else:
+                log_failed_url(url, error or "AI upload failed", output_file)
+            self.conn.execute("UPDATE jobs SET collected = 1 WHERE url_key = ?", (key,))
+        return len(rows)
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of URLs per job status."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def workers(self) -> Dict[str, int]:
+        """Get the number of leased URLs per worker."""
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT worker, COUNT(*) FROM jobs WHERE status = ? GROUP BY worker", (JOB_LEASED,)
+            ))
+
+
+def enqueue_pending(jobs: JobQueue, data_file: Path = DATA_FILE, output_file: Path = OUTPUT_FILE) -> int:
+    """
+    Queue every URL of data_file that output_file has not processed yet.
+
+    Returns:
+        Number of URLs added
+    """
+    processed = get_processed_urls(output_file)
+    added = jobs.enqueue((i, url) for i, url in iter_unique_urls(data_file) if url not in processed)
+    logger.info(f"Queued {added} new URLs ({len(processed)} already processed)")
+    return added
+
+
+class JobQueueClient:
+    """
+    Worker side of the HTTP coordinator, with the same methods as JobQueue.
+
+    Requests are retried for a while so a coordinator restart does not
+    kill the workers.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30, retries: int = 5):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+
+    def __repr__(self):
+        return f"JobQueueClient({self.base_url})"
+
+    def close(self):
+        """Nothing to close (one HTTP request per call)."""
+
+    def _request(self, path: str, payload: Optional[dict] = None) -> dict:
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={'Content-Type': 'application/json'}
+        )
+        for attempt in range(1, self.retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read().decode('utf-8'))
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Job queue request {path} failed ({e}), retrying...")
+                time.sleep(2 * attempt)
+
+    def claim(self, worker: str) -> Optional[Tuple[int, str]]:
+        job = self._request('/claim', {'worker': worker}).get('job')
+        return (job['seq'], job['url']) if job else None
+
+    def start(self, worker: str, url: str) -> bool:
+        return self._request('/start', {'worker': worker, 'url': url})['ok']
+
+    def renew(self, worker: str) -> int:
+        return self._request('/renew', {'worker': worker})['renewed']
+
+    def complete(self, worker: str, url: str, response: Optional[str] = None, error: Optional[str] = None):
+        self._request('/complete', {'worker': worker, 'url': url, 'response': response, 'error': error})
+
+    def release(self, worker: str) -> int:
+        return self._request('/release', {'worker': worker})['released']
+
+    def counts(self) -> Dict[str, int]:
+        return self._request('/status')['counts']
+
+
+def connect_job_queue(target: str, output_file: Path = OUTPUT_FILE):
+    """
+    Open the queue a worker pulls from.
+
+    Args:
+        target: http(s):// URL of a coordinator, or path of a shared jobs.db
+        output_file: Output CSV finished jobs are written to (jobs.db only;
+            the coordinator writes its own)
+
+    Returns:
+        JobQueueClient or JobQueue
+    """
+    if target.startswith(('http://', 'https://')):
+        return JobQueueClient(target)
+    return JobQueue(Path(target), output_file=output_file)
+
+
+class JobFeed:
+    """
+    Iterator of (seq, url) pairs claimed from the queue, one per next().
+
+    Used in place of the pipeline's PendingUrls iterator; `indices` maps a
+    claimed URL to its data.csv position (for get_video_path) until a
+    consumer pops it. next() blocks on the queue, so the pipeline calls it
+    in a worker thread.
+    """
+
+    def __init__(self, jobs, worker: str):
+        self.jobs = jobs
+        self.worker = worker
+        self.indices: Dict[str, int] = {}
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Tuple[int, str]:
+        job = self.jobs.claim(self.worker)
+        if job is None:
+            raise StopIteration
+        seq, url = job
+        self.indices[url] = seq
+        self.count += 1
+        return seq, url
+
+
+class JobResultWriter:
+    """
+    Drop-in for OrderedResultWriter that hands results to the queue.
+
+    The queue owner writes them to output.csv in data.csv order. Results are
+    sent from one background thread (in order), so a slow coordinator or a
+    busy jobs.db does not block the pipeline's event loop.
+    """
+
+    def __init__(self, jobs, worker: str):
+        self.jobs = jobs
+        self.worker = worker
+        self._sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix='job-results')
+
+    def _complete(self, url: str, response: Optional[str] = None, error: Optional[str] = None):
+        try:
+            self.jobs.complete(self.worker, url, response=response, error=error)
+        except Exception as e:
+            logger.error(f"Could not report {url} to the job queue: {e}")
+
+    def add_result(self, seq: int, url: str, message: str):
+        """Report a successful AI response."""
+        self._sender.submit(self._complete, url, response=message)
+
+    def add_failure(self, seq: int, url: str, reason: str):
+        """Report a failed URL."""
+        self._sender.submit(self._complete, url, error=reason)
+
+    def skip(self, seq: int):
+        """Nothing to report (the URL was taken over by another worker)."""
+
+    def close(self):
+        """Wait for the reports still being sent, then give back leased URLs that were never started."""
+        self._sender.shutdown(wait=True)
+        released = self.jobs.release(self.worker)
+        if released:
+            logger.info(f"Released {released} unstarted URLs back to the queue")
+
+
+def _make_handler(jobs: JobQueue):
+    class JobQueueHandler(BaseHTTPRequestHandler):
+        """JSON endpoints: POST /claim /start /renew /complete /release, GET /status."""
+
+        def _reply(self, payload: dict, code: int = 200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/status':
+                self._reply({'counts': jobs.counts(), 'workers': jobs.workers()})
+            else:
+                self._reply({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+                worker = body['worker']
+                if self.path == '/claim':
+                    job = jobs.claim(worker)
+                    self._reply({'job': {'seq': job[0], 'url': job[1]} if job else None})
+                elif self.path == '/start':
+                    self._reply({'ok': jobs.start(worker, body['url'])})
+                elif self.path == '/renew':
+                    self._reply({'renewed': jobs.renew(worker)})
+                elif self.path == '/complete':
+                    jobs.complete(worker, body['url'], body.get('response'), body.get('error'))
+                    self._reply({'ok': True})
+                elif self.path == '/release':
+                    self._reply({'released': jobs.release(worker)})
+                else:
+                    self._reply({'error': 'not found'}, 404)
+            except (ValueError, KeyError) as e:
+                self._reply({'error': f'bad request: {e}'}, 400)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return JobQueueHandler
+
+
+def serve(jobs: JobQueue, host: str = '0.0.0.0', port: int = JOB_QUEUE_PORT):
+    """
+    Serve the queue over HTTP until Ctrl+C.
+
+    One request at a time: every call is a short SQLite transaction, and
+    output.csv (and its results store) is only written from this thread.
+    """
+    server = HTTPServer((host, port), _make_handler(jobs))
+    logger.info(f"Job queue coordinator listening on http://{host}:{port} ({jobs.counts()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def print_status(jobs):
+    """Print URL counts per job status."""
+    counts = jobs.counts()
+    print("\n" + "="*50)
+    print("JOB QUEUE")
+    print("="*50)
+    for status in (JOB_PENDING, JOB_LEASED, JOB_DONE, JOB_FAILED):
+        print(f"{status}: {counts.get(status, 0)}")
+    if isinstance(jobs, JobQueue):
+        for worker, leased in sorted(jobs.workers().items()):
+            print(f"  {worker}: {leased} leased")
+    print("="*50)
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Lease-based job queue for distributed pipeline runs')
+    parser.add_argument('command', choices=['init', 'serve', 'status', 'collect'],
+                        help='init: queue pending URLs, serve: run the HTTP coordinator, '
+                             'status: show counts, collect: write all finished jobs to the output CSV')
+    parser.add_argument('--db', type=str, default=str(JOB_QUEUE_FILE), help='Queue database')
+    parser.add_argument('--data', type=str, default=str(DATA_FILE), help='Input CSV with URLs')
+    parser.add_argument('--output', type=str, default=str(OUTPUT_FILE), help='Output CSV results are written to')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='Coordinator bind address')
+    parser.add_argument('--port', type=int, default=JOB_QUEUE_PORT, help=f'Coordinator port (default: {JOB_QUEUE_PORT})')
+    parser.add_argument('--lease', type=float, default=JOB_LEASE_SECONDS, help='Lease length in seconds')
+
+    args = parser.parse_args()
+
+    jobs = JobQueue(Path(args.db), output_file=Path(args.output), lease_seconds=args.lease)
+    try:
+        if args.command in ('init', 'serve'):
+            enqueue_pending(jobs, Path(args.data), Path(args.output))
+        if args.command == 'serve':
+            serve(jobs, args.host, args.port)
+            # Rows held back behind URLs that never finished
+            jobs.collect(Path(args.output), everything=True)
+        elif args.command == 'collect':
+            print(f"Wrote {jobs.collect(Path(args.output), everything=True)} rows to {args.output}")
+        print_status(jobs)
+    finally:
+        jobs.close()
+
+
+if __name__ == "__main__":
+    main()
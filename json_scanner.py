@@ -0,0 +1,171 @@
+"""
+Incremental JSON Scanner for MVoice Automation
+
+Follows the JSON object in a growing AI response without re-parsing it on
+every poll. Each feed() only scans the text added since the previous call,
+keeps track of which top-level keys already have a complete value, and
+notices the closing brace as soon as it arrives.
+"""
+import json
+import re
+from typing import Iterable, Optional, Set
+
+
+# Characters that change the scanner state outside / inside a string
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_IN_STRING = re.compile(r'["\\]')
+
+
+class IncrementalJSONScanner:
+    """
+    Tracks the first top-level JSON object in a text that only grows.
+
+    Feed it successive snapshots of the response. If a snapshot does not
+    extend the previous one (the page re-rendered), the scanner starts over.
+    """
+
+    def __init__(self, required_keys: Optional[Iterable[str]] = None):
+        self.required_keys: Set[str] = set(k.strip().lower() for k in (required_keys or ()))
+        self.reset()
+
+    def reset(self):
+        """Forget everything scanned so far."""
+        self.text = ""
+        self.keys: Set[str] = set()
+        self.closed = False
+        self.parsed: Optional[dict] = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start = -1
+        self._current_key: Optional[str] = None
+
+    @property
+    def started(self) -> bool:
+        """True once the opening brace of an object has been seen."""
+        return self._start != -1
+
+    @property
+    def complete(self) -> bool:
+        """True if the object closed, parsed, and holds every required key."""
+        return self.parsed is not None and self.required_keys.issubset(self.keys)
+
+    @property
+    def object_text(self) -> Optional[str]:
+        """The JSON object text once it has closed."""
+        if not self.closed:
+            return None
+        return self.text[self._start:self._pos]
+
+    def feed(self, text: str) -> "IncrementalJSONScanner":
+        """
+        Scan a new snapshot of the response.
+
+        Args:
+            text: Full response text so far
+
+        Returns:
+            self, for chaining (e.g. scanner.feed(text).complete)
+        """
+        if not text.startswith(self.text):
+            self.reset()
+        self.text = text
+        if not self.closed:
+            self._scan()
+        return self
+
+    def _finish_value(self):
+        if self._current_key is not None:
+            self.keys.add(self._current_key)
+            self._current_key = None
+
+    def _scan(self):
+        text = self.text
+        pos = self._pos
+        end = len(text)
+
+        while pos < end:
+            if self._start == -1:
+                pos = text.find('{', pos)
+                if pos == -1:
+                    pos = end
+                    break
+                self._start = pos
+                self._depth = 1
+                self._expect_key = True
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _IN_STRING.search(text, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if self._key_start != -1:
+                    try:
+                        key = json.loads(text[self._key_start:pos])
+                    except ValueError:
+                        key = text[self._key_start + 1:pos - 1]
+                    self._current_key = key.strip().lower()
+                    self._key_start = -1
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = end
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = pos - 1
+                    self._expect_key = False
+            elif char in '{[':
+                self._depth += 1
+            elif char == ']':
+                self._depth -= 1
+            elif char == ',':
+                if self._depth == 1:
+                    self._finish_value()
+                    self._expect_key = True
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value()
+                    self._close(pos)
+                    if self.closed:
+                        break
+
+        self._pos = pos
+
+    def _close(self, pos: int):
+        """Validate the object that just closed; on garbage, look for the next one."""
+        try:
+            parsed = json.loads(self.text[self._start:pos])
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            self.parsed = parsed
+            self.keys = set(k.strip().lower() for k in parsed.keys())
+            self.closed = True
+            return
+        # e.g. "{placeholder}" in prose before the real answer
+        self.keys = set()
+        self._start = -1
+        self._depth = 0
+        self._expect_key = False
+        self._current_key = None
@@ -0,0 +1,240 @@
+"""
+Stage Metrics for MVoice Automation
+
+Per-video timing of each pipeline stage (download, navigate, set_reasoning,
+upload, prompt, response_wait) plus retry counts. Every span is written as
+one JSON line, aggregated into histograms, and can be exported as a
+Prometheus text / OpenMetrics file.
+
+Usage:
+    python metrics.py [--file metrics.jsonl]   # summarize a JSON lines file
+"""
+import argparse
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_FILE
+from utils import write_text_atomic
+
+
+# Pipeline stages in the order a video goes through them
+STAGES = ("download", "navigate", "set_reasoning", "upload", "prompt", "response_wait")
+
+# Histogram bucket upper bounds in seconds (+Inf is implied)
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+class Span:
+    """One timed stage; set `ok = False` if the stage ran but did not succeed."""
+
+    def __init__(self, stage: str, url: Optional[str], attempt: Optional[int]):
+        self.stage = stage
+        self.url = url
+        self.attempt = attempt
+        self.ok = True
+        self.seconds = 0.0
+
+
+class StageMetrics:
+    """
+    Collects stage spans and retries for a run.
+
+    Keeps raw durations in memory for the summary, histogram buckets for
+    the exporters, and appends every event to a JSON lines file if given.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Optional[Path] = None,
+        prom_path: Optional[Path] = None,
+        openmetrics: bool = False,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.openmetrics = openmetrics
+        self.buckets = tuple(sorted(buckets))
+        self.durations: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        self._bucket_counts: Dict[str, List[int]] = {}
+        self._jsonl = None  # opened on the first event
+
+    def close(self):
+        """Write the exporter file one last time and close the JSON lines file."""
+        self.export()
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
+
+    def _write_event(self, event: dict):
+        if self.jsonl_path:
+            if self._jsonl is None:
+                self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8')
+            event = {'ts': datetime.now().isoformat(timespec='milliseconds'), **event}
+            self._jsonl.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._jsonl.flush()
+
+    def record(self, stage: str, seconds: float, url: Optional[str] = None,
+               ok: bool = True, attempt: Optional[int] = None):
+        """
+        Record one finished stage.
+
+        Args:
+            stage: Stage name (see STAGES)
+            seconds: Duration
+            url: Video URL the stage ran for
+            ok: False if the stage failed
+            attempt: 1-based attempt number for the video
+        """
+        self.durations.setdefault(stage, []).append(seconds)
+        if not ok:
+            self.failures[stage] = self.failures.get(stage, 0) + 1
+
+        counts = self._bucket_counts.setdefault(stage, [0] * (len(self.buckets) + 1))
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+
+        self._write_event({
+            'event': 'span', 'stage': stage, 'url': url,
+            'seconds': round(seconds, 4), 'ok': ok, 'attempt': attempt
+        })
+
+    @contextmanager
+    def span(self, stage: str, url: Optional[str] = None, attempt: Optional[int] = None) -> Iterator[Span]:
+        """
+        Time a stage: `with metrics.span('upload', url) as span: span.ok = await ...`
+
+        An exception escaping the block marks the span as failed.
+        """
+        span = Span(stage, url, attempt)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            self.record(stage, span.seconds, url, span.ok, attempt)
+
+    def count_retry(self, stage: str, url: Optional[str] = None, attempt: Optional[int] = None):
+        """Count a retry of `stage` (e.g. 'ai' or 'download') for a video."""
+        self.retries[stage] = self.retries.get(stage, 0) + 1
+        self._write_event({'event': 'retry', 'stage': stage, 'url': url, 'attempt': attempt})
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Per-stage count, failures, total/mean/p50/p95/max seconds.
+
+        Stages in STAGES order first, then any other recorded stage.
+        """
+        result = {}
+        ordered = [s for s in STAGES if s in self.durations]
+        ordered += [s for s in self.durations if s not in STAGES]
+        for stage in ordered:
+            values = sorted(self.durations[stage])
+            total = sum(values)
+            result[stage] = {
+                'count': len(values),
+                'failed': self.failures.get(stage, 0),
+                'total_s': round(total, 2),
+                'mean_s': round(total / len(values), 3),
+                'p50_s': round(values[len(values) // 2], 3),
+                'p95_s': round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                'max_s': round(values[-1], 3),
+            }
+        return result
+
+    def to_prometheus(self) -> str:
+        """Render histograms and retry counters in Prometheus text (or OpenMetrics) format."""
+        lines = [
+            '# HELP mvoice_stage_duration_seconds Time spent per pipeline stage per video.',
+            '# TYPE mvoice_stage_duration_seconds histogram',
+        ]
+        for stage, counts in self._bucket_counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                # Bounds as floats ("1.0", not "1"): strict OpenMetrics parsers require it
+                lines.append(f'mvoice_stage_duration_seconds_bucket{{stage="{stage}",le="{float(bound)}"}} {cumulative}')
+            lines.append(f'mvoice_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {sum(counts)}')
+            lines.append(f'mvoice_stage_duration_seconds_sum{{stage="{stage}"}} {sum(self.durations[stage]):.4f}')
+            lines.append(f'mvoice_stage_duration_seconds_count{{stage="{stage}"}} {sum(counts)}')
+
+        for name, help_text, values in (
+            ('mvoice_stage_failures', 'Stage runs that did not succeed.', self.failures),
+            ('mvoice_stage_retries', 'Retries per stage.', self.retries),
+        ):
+            # OpenMetrics names the counter family without the _total suffix
+            family = name if self.openmetrics else f'{name}_total'
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} counter')
+            for stage, value in values.items():
+                lines.append(f'{name}_total{{stage="{stage}"}} {value}')
+
+        if self.openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Rewrite the Prometheus/OpenMetrics file (atomically), if one is configured."""
+        if not self.prom_path:
+            return
+        write_text_atomic(Path(self.prom_path), self.to_prometheus())
+
+
+def load_jsonl(file_path: Path) -> StageMetrics:
+    """Rebuild in-memory metrics from a JSON lines file."""
+    metrics = StageMetrics()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event.get('event') == 'span':
+                metrics.record(event['stage'], event['seconds'], ok=event.get('ok', True))
+            elif event.get('event') == 'retry':
+                metrics.count_retry(event['stage'])
+    return metrics
+
+
+def print_summary(metrics: StageMetrics):
+    """Print the per-stage timing table."""
+    summary = metrics.summary()
+    if not summary:
+        print("No stage timings recorded")
+        return
+    print(f"{'stage':<14} {'count':>6} {'failed':>6} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'total s':>9}")
+    for stage, stats in summary.items():
+        print(f"{stage:<14} {stats['count']:>6} {stats['failed']:>6} {stats['mean_s']:>8.2f} "
+              f"{stats['p50_s']:>8.2f} {stats['p95_s']:>8.2f} {stats['max_s']:>8.2f} {stats['total_s']:>9.1f}")
+    if metrics.retries:
+        print("Retries: " + ", ".join(f"{stage}={count}" for stage, count in metrics.retries.items()))
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Summarize per-stage timings from a metrics JSON lines file')
+    parser.add_argument('--file', type=str, default=str(METRICS_FILE), help='Metrics JSON lines file')
+    parser.add_argument('--prometheus', action='store_true', help='Print Prometheus text format instead')
+
+    args = parser.parse_args()
+
+    metrics = load_jsonl(Path(args.file))
+    if args.prometheus:
+        print(metrics.to_prometheus(), end='')
+    else:
+        print_summary(metrics)
+
+
+if __name__ == "__main__":
+    main()
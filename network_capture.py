@@ -0,0 +1,257 @@
+"""
+Network Response Capture for MVoice Automation
+
+Rebuilds the assistant's answer from the chat backend's network traffic
+(SSE / NDJSON / JSON responses and websocket frames) instead of reading it
+back from the rendered markdown. Used by AIUploader when
+RESPONSE_CAPTURE_MODE = "network".
+"""
+import asyncio
+import json
+import re
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from config import AI_STREAM_URL_PATTERN
+from utils import logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+
+# Keys that commonly carry a streamed text chunk, checked in order
+TEXT_KEYS = ('delta', 'content', 'text', 'token', 'message', 'answer', 'completion', 'output')
+
+# Response content types that can carry the assistant payload
+STREAM_CONTENT_TYPES = ('text/event-stream', 'application/x-ndjson', 'application/json', 'text/plain')
+
+
+def iter_sse_data(body: str) -> List[str]:
+    """
+    Split a Server-Sent Events body into the data payload of each event.
+    
+    Args:
+        body: Raw text/event-stream body
+    
+    Returns:
+        List of data payloads ("[DONE]" markers are dropped)
+    """
+    payloads = []
+    data_lines: List[str] = []
+    for line in body.splitlines() + ['']:
+        if not line.strip():
+            if data_lines:
+                payload = '\n'.join(data_lines)
+                if payload.strip() != '[DONE]':
+                    payloads.append(payload)
+                data_lines = []
+            continue
+        if line.startswith('data:'):
+            data_lines.append(line[5:].lstrip(' '))
+    return payloads
+
+
+def split_payloads(body: str, content_type: str = '') -> List[str]:
+    """
+    Split a response body into individual stream payloads.
+    
+    Args:
+        body: Response body text
+        content_type: Response Content-Type header
+    
+    Returns:
+        List of payload strings (SSE events, NDJSON lines, or the whole body)
+    """
+    if 'event-stream' in content_type or body.lstrip().startswith('data:'):
+        return iter_sse_data(body)
+    if 'ndjson' in content_type:
+        return [line for line in body.splitlines() if line.strip()]
+    return [body]
+
+
+def extract_text(payload) -> str:
+    """
+    Pull the text chunk out of one stream payload.
+    
+    Handles OpenAI-style `choices[0].delta.content` as well as flat
+    {"delta": "..."} / {"content": "..."} shapes. Non-JSON payloads are
+    returned as-is.
+    
+    Args:
+        payload: Payload string, or an already decoded JSON value
+    
+    Returns:
+        Text chunk ('' if none found)
+    """
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            return payload
+    
+    if isinstance(payload, str):
+        return payload
+    if isinstance(payload, list):
+        return ''.join(extract_text(item) for item in payload)
+    if not isinstance(payload, dict):
+        return ''
+    
+    choices = payload.get('choices')
+    if isinstance(choices, list) and choices:
+        return extract_text(choices[0])
+    
+    for key in TEXT_KEYS:
+        if key in payload and payload[key] not in (None, ''):
+            return extract_text(payload[key])
+    return ''
+
+
+def rebuild_text(chunks: List[str]) -> str:
+    """
+    Join streamed chunks into the full answer.
+    
+    Backends either send deltas (append) or cumulative snapshots (each chunk
+    repeats everything so far); a chunk that starts with the text so far is
+    treated as a snapshot.
+    
+    Args:
+        chunks: Text chunks in arrival order
+    
+    Returns:
+        Rebuilt text
+    """
+    text = ''
+    for chunk in chunks:
+        if text and chunk.startswith(text):
+            text = chunk
+        else:
+            text += chunk
+    return text
+
+
+class NetworkResponseCapture:
+    """
+    Collects assistant payloads from a page's HTTP responses and websockets.
+    
+    Call arm() right before sending the prompt, then wait() for the answer.
+    """
+    
+    def __init__(self, page: "Page", url_pattern: str = AI_STREAM_URL_PATTERN):
+        self.page = page
+        self.url_pattern = re.compile(url_pattern, re.IGNORECASE)
+        self._armed = False
+        self._candidates: List[str] = []
+        self._ws_chunks: List[str] = []
+        self._changed = asyncio.Event()
+        
+        page.on("response", self._on_response)
+        page.on("websocket", self._on_websocket)
+    
+    def arm(self):
+        """Forget earlier traffic and start collecting for the next answer."""
+        self._candidates = []
+        self._ws_chunks = []
+        self._changed.clear()
+        self._armed = True
+    
+    def disarm(self):
+        """Stop collecting."""
+        self._armed = False
+    
+    def _matches(self, url: str) -> bool:
+        return bool(self.url_pattern.search(url))
+    
+    async def _on_response(self, response):
+        if not self._armed or not self._matches(response.url):
+            return
+        content_type = response.headers.get('content-type', '')
+        if not any(ct in content_type for ct in STREAM_CONTENT_TYPES):
+            return
+        try:
+            # For SSE this resolves when the stream ends, i.e. the answer is done
+            body = await response.text()
+        except Exception as e:
+            logger.debug(f"Could not read response body from {response.url}: {e}")
+            return
+        
+        text = rebuild_text([extract_text(p) for p in split_payloads(body, content_type)])
+        if text.strip():
+            logger.debug(f"Captured {len(text)} chars from {response.url}")
+            self._candidates.append(text)
+            self._changed.set()
+    
+    def _on_websocket(self, websocket):
+        if not self._matches(websocket.url):
+            return
+        websocket.on("framereceived", self._on_frame)
+    
+    def _on_frame(self, payload):
+        if not self._armed:
+            return
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8', errors='ignore')
+        chunks = [extract_text(p) for p in split_payloads(payload)]
+        chunks = [c for c in chunks if c]
+        if chunks:
+            self._ws_chunks.extend(chunks)
+            self._changed.set()
+    
+    def texts(self) -> List[str]:
+        """All candidate answers captured so far (websocket stream last)."""
+        candidates = list(self._candidates)
+        if self._ws_chunks:
+            candidates.append(rebuild_text(self._ws_chunks))
+        return candidates
+    
+    async def wait(
+        self,
+        timeout: float,
+        make_check: Callable[[], Callable[[str], bool]],
+        idle_timeout: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Wait until a captured answer is complete.
+        
+        Every stream gets its own completeness check from `make_check` (an
+        incremental JSON scanner must only ever see one growing text). A
+        response body is read once it has ended, so it is checked once; the
+        websocket answer grows and keeps one check for all its updates.
+        
+        Args:
+            timeout: Maximum wait time in seconds
+            make_check: Returns a new predicate on the rebuilt text of one stream
+            idle_timeout: Give up early if nothing at all was captured
+                within this many seconds (wrong URL pattern, DOM-only backend)
+        
+        Returns:
+            The complete answer, or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        checked = 0
+        ws_check = make_check()
+        try:
+            while True:
+                while checked < len(self._candidates):
+                    text = self._candidates[checked]
+                    checked += 1
+                    if make_check()(text):
+                        return text
+                if self._ws_chunks:
+                    text = rebuild_text(self._ws_chunks)
+                    if ws_check(text):
+                        return text
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                if idle_timeout is not None and not self.texts():
+                    remaining = min(remaining, idle_timeout)
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    if not self.texts():
+                        logger.info("No assistant payload seen in network traffic")
+                        return None
+        finally:
+            self.disarm()
@@ -2,8 +2,8 @@
 MVoice Automation Pipeline - Streaming Batch Version
 
 This module implements an optimized pipeline for processing thousands of videos:
-- Batch downloading (configurable batch size)
-- Sequential AI upload (1 video at a time)
+- Downloads and AI uploads overlap through a bounded queue
+- Queue size (batch size) caps how many videos wait on disk
 - Delete after upload (saves disk space)
 - Resume support
 - Real-time progress tracking
@@ -13,33 +13,52 @@ Usage:
     python pipeline.py --download-only [--batch-size N]
     python pipeline.py --upload-only
     python pipeline.py -i  # Interactive mode
+    python pipeline.py --queue http://<coordinator>:8765  # Pull URLs from a job queue
 """
 import asyncio
 import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from itertools import chain
+from typing import Dict, Optional, Tuple
 
 from config import (
+    AI_URL,
     DEFAULT_PROMPT, 
+    DATA_FILE,
     OUTPUT_FILE, 
     BATCH_SIZE, 
     DELETE_AFTER_UPLOAD,
-    DOWNLOADS_DIR
+    DOWNLOADS_DIR,
+    AI_CONCURRENCY,
+    DOWNLOAD_CONCURRENCY,
+    RESPONSE_CAPTURE_MODE,
+    METRICS_FILE,
+    METRICS_PROM_FILE,
+    JOB_LEASE_SECONDS,
+    CONTENT_DEDUP,
+    USE_RESULTS_DB
 )
 from utils import (
     logger, 
-    get_unique_urls, 
     get_processed_urls, 
     get_video_path, 
     migrate_old_output_format,
     detect_platform,
     log_failed_url,
-    should_attempt_ai_upload
+    should_attempt_ai_upload,
+    hash_video_file,
+    reuse_content_result,
+    remember_content_result,
+    PendingUrls,
+    OrderedResultWriter
 )
 from downloader import VideoDownloader
+from metrics import StageMetrics, print_summary as print_stage_summary
+from selector_cache import SelectorResolver, print_report as print_selector_report
+from job_queue import JobFeed, JobResultWriter, connect_job_queue, default_worker_id
 
-from ai_uploader import AIUploader
+from ai_uploader import AIUploader, AISessionPool
 
 
 class StreamingPipeline:
@@ -47,12 +66,21 @@ class StreamingPipeline:
     Optimized streaming batch pipeline for large-scale video processing.
     
     Flow:
-    1. Download batch of N videos
-    2. Upload each to AI (sequential, ~1 min each)
+    1. Download workers put downloaded videos on a queue (max N waiting)
+    2. AI workers (one per chat session) upload queued videos (~1 min each)
     3. Delete video after successful upload
-    4. Repeat until done
+    4. Repeat until the download worker runs out of URLs
+    
+    With a job queue (`jobs`), URLs are claimed from the queue one at a
+    time instead of read from data.csv, and results go back to the queue.
+    
+    uploader_cls / downloader_cls can be overridden by subclasses (e.g. the
+    benchmarks wrap AIUploader to time each stage).
     """
     
+    uploader_cls = AIUploader
+    downloader_cls = VideoDownloader
+    
     def __init__(
         self, 
         headless: bool = False, 
@@ -60,33 +88,74 @@ class StreamingPipeline:
         batch_size: int = BATCH_SIZE,
         delete_after_upload: bool = DELETE_AFTER_UPLOAD,
         download_only: bool = False,
-        upload_only: bool = False
+        upload_only: bool = False,
+        ai_sessions: int = AI_CONCURRENCY,
+        capture_mode: str = RESPONSE_CAPTURE_MODE,
+        ai_url: str = AI_URL,
+        data_file: Path = DATA_FILE,
+        output_file: Path = OUTPUT_FILE,
+        downloads_dir: Path = DOWNLOADS_DIR,
+        metrics: Optional[StageMetrics] = None,
+        selectors: Optional[SelectorResolver] = None,
+        jobs=None,
+        worker_id: Optional[str] = None,
+        content_dedup: bool = CONTENT_DEDUP,
+        content_file: Optional[Path] = None
     ):
+        if jobs is not None and (download_only or upload_only):
+            raise ValueError("A job queue can only be used in full pipeline mode")
+        
         self.headless = headless
         self.prompt = prompt
         self.batch_size = batch_size
         self.delete_after_upload = delete_after_upload
         self.download_only = download_only
         self.upload_only = upload_only
+        self.ai_sessions = ai_sessions
+        self.capture_mode = capture_mode
+        self.ai_url = ai_url
+        self.data_file = data_file
+        self.output_file = output_file
+        self.downloads_dir = downloads_dir
+        # Per-stage timings, shared by the downloader and every AI session
+        self.metrics = metrics or StageMetrics(METRICS_FILE, METRICS_PROM_FILE)
+        # Learned fallback selectors, shared the same way
+        self.selectors = selectors or SelectorResolver()
+        # Job queue (JobQueue / JobQueueClient) shared with other workers
+        self.jobs = jobs
+        self.worker_id = worker_id or default_worker_id()
+        # Download workers take URLs off the shared iterator one at a time
+        self._pending_lock = asyncio.Lock()
+        # Reuse results of already analyzed videos with the same content
+        # (the hash -> result index lives in the results store of
+        # content_file's output CSV; shards share the main one)
+        self.content_dedup = content_dedup and USE_RESULTS_DB
+        self.content_file = content_file or output_file
         
         self.stats = {
             'start_time': None,
             'end_time': None,
             'total_urls': 0,
             'download': {'successful': 0, 'failed': 0, 'skipped': 0},
-            'upload': {'successful': 0, 'failed': 0, 'skipped': 0},
+            'upload': {'successful': 0, 'failed': 0, 'skipped': 0, 'reused': 0},
             'deleted': 0
         }
         
         # Track progress
         self.current_batch = 0
         self.total_batches = 0
+        # Streamed data.csv input; its size is known once it is read to the end
+        self.pending: Optional[PendingUrls] = None
     
     def _print_progress(self):
         """Print current progress."""
         total = self.stats['total_urls']
+        if self.pending is not None:
+            more = '' if self.pending.exhausted else '+'
+            total = f"{self.pending.count}{more}"
+            self.total_batches = f"{(self.pending.count + self.batch_size - 1) // self.batch_size}{more}"
         downloaded = self.stats['download']['successful'] + self.stats['download']['skipped']
-        uploaded = self.stats['upload']['successful'] + self.stats['upload']['skipped']
+        uploaded = sum(self.stats['upload'][key] for key in ('successful', 'skipped', 'reused'))
         
         print(f"\r[Batch {self.current_batch}/{self.total_batches}] "
               f"Downloaded: {downloaded}/{total} | "
@@ -102,211 +171,365 @@ class StreamingPipeline:
         print("="*60)
         print(f"Batch Size: {self.batch_size}")
         print(f"Delete After Upload: {self.delete_after_upload}")
+        print(f"AI Sessions: {self.ai_sessions}")
+        print(f"Download Concurrency: {', '.join(f'{site}={n}' for site, n in DOWNLOAD_CONCURRENCY.items())}")
         print(f"Mode: {'Download Only' if self.download_only else 'Upload Only' if self.upload_only else 'Full Pipeline'}")
+        if self.jobs is not None:
+            print(f"Job Queue: {self.jobs} as {self.worker_id}")
         print("="*60 + "\n")
         
-        # Get all URLs and filter already processed
-        all_urls = get_unique_urls()
-        processed_urls = get_processed_urls()
-        
-        # Filter out already processed
-        pending_urls = [url for url in all_urls if url not in processed_urls]
-        
-        self.stats['total_urls'] = len(pending_urls)
-        self.total_batches = (len(pending_urls) + self.batch_size - 1) // self.batch_size
+        if self.jobs is not None:
+            await self._run_queue()
+            return
         
-        logger.info(f"Total URLs: {len(all_urls)}")
+        # Stream data.csv, skipping already processed URLs; work starts as
+        # soon as the first pending row is read
+        processed_urls = get_processed_urls(self.output_file)
+        self.pending = PendingUrls(self.data_file, processed_urls)
         logger.info(f"Already processed: {len(processed_urls)}")
-        logger.info(f"Pending: {len(pending_urls)}")
-        logger.info(f"Batches to process: {self.total_batches}")
         
-        if not pending_urls:
+        # Reading data.csv may resolve short links (network), so not on the loop
+        first = await asyncio.to_thread(next, self.pending, None)
+        if first is None:
             print("\n✓ All videos already processed!")
             self.stats['end_time'] = datetime.now()
             return
         
-        # Create URL index mapping for get_video_path
-        url_indices = {url: i for i, url in enumerate(all_urls)}
+        pending = chain([first], self.pending)
+        # URL -> data.csv position for get_video_path, filled as URLs are handed out
+        url_indices = self.pending.indices
         
-        if self.upload_only:
-            await self._upload_only_mode(pending_urls, url_indices)
-        elif self.download_only:
-            await self._download_only_mode(pending_urls, url_indices)
-        else:
-            await self._streaming_mode(pending_urls, url_indices)
+        try:
+            if self.upload_only:
+                await self._upload_only_mode(pending, url_indices)
+            elif self.download_only:
+                await self._download_only_mode(pending, url_indices)
+            else:
+                await self._streaming_mode(pending, url_indices)
+        finally:
+            self.metrics.close()
         
+        self.stats['total_urls'] = self.pending.count
+        self.stats['stages'] = self.metrics.summary()
         self.stats['end_time'] = datetime.now()
         self._print_summary()
     
-    async def _download_only_mode(self, urls: List[str], url_indices: Dict[str, int]):
-        """Download all videos in batches."""
+    async def _run_queue(self):
+        """Streaming mode over URLs claimed from the job queue, renewing leases meanwhile."""
+        counts = await asyncio.to_thread(self.jobs.counts)
+        self.stats['total_urls'] = counts.get('pending', 0)
+        self.total_batches = (self.stats['total_urls'] + self.batch_size - 1) // self.batch_size
+        logger.info(f"Job queue: {counts}")
+        
+        feed = JobFeed(self.jobs, self.worker_id)
+        heartbeat = asyncio.create_task(self._renew_leases())
+        try:
+            await self._streaming_mode(feed, feed.indices)
+        finally:
+            heartbeat.cancel()
+            self.metrics.close()
+        
+        self.stats['total_urls'] = feed.count
+        self.stats['stages'] = self.metrics.summary()
+        self.stats['end_time'] = datetime.now()
+        self._print_summary()
+    
+    async def _renew_leases(self):
+        """Renew this worker's leases well before they expire."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await asyncio.to_thread(self.jobs.renew, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not renew job leases: {e}")
+    
+    def _new_downloader(self) -> VideoDownloader:
+        """Create the video downloader for this run."""
+        return self.downloader_cls(
+            headless=self.headless,
+            downloads_dir=self.downloads_dir,
+            metrics=self.metrics,
+            selectors=self.selectors
+        )
+    
+    def _new_uploader(self) -> AIUploader:
+        """Create the AI uploader for this run."""
+        return self.uploader_cls(
+            headless=self.headless,
+            prompt=self.prompt,
+            ai_url=self.ai_url,
+            capture_mode=self.capture_mode,
+            metrics=self.metrics,
+            selectors=self.selectors
+        )
+    
+    async def _download_only_mode(self, pending, url_indices: Dict[str, int]):
+        """Download all videos with concurrent download workers sharing the (seq, url) iterator."""
         logger.info("Running in DOWNLOAD ONLY mode")
         
-        async with VideoDownloader(headless=self.headless) as downloader:
-            for batch_start in range(0, len(urls), self.batch_size):
-                self.current_batch += 1
-                batch = urls[batch_start:batch_start + self.batch_size]
-                
-                logger.info(f"\n--- Batch {self.current_batch}/{self.total_batches} ---")
-                
-                for url in batch:
-                    index = url_indices.get(url, 0)
-                    output_path = get_video_path(url, index)
-                    
-                    if output_path.exists():
-                        self.stats['download']['skipped'] += 1
-                        continue
-                    
-                    path = await downloader.download_video(url, index)
-                    
-                    if path:
-                        self.stats['download']['successful'] += 1
-                    else:
-                        self.stats['download']['failed'] += 1
-                        log_failed_url(url, "Download failed or timeout")
-                    
-                    self._print_progress()
-                    await asyncio.sleep(1)
+        async with self._new_downloader() as downloader:
+            async def worker():
+                while True:
+                    job = await self._next_pending(pending)
+                    if job is None:
+                        break
+                    seq, url = job
+                    self.current_batch = (seq // self.batch_size) + 1
+                    path = await self._download_one(downloader, url, url_indices)
+                    if path is None:
+                        log_failed_url(url, "Download failed or timeout", self.output_file)
+            
+            await asyncio.gather(*(worker() for _ in range(downloader.max_concurrency)))
     
-    async def _upload_only_mode(self, urls: List[str], url_indices: Dict[str, int]):
+    async def _upload_only_mode(self, pending, url_indices: Dict[str, int]):
         """Upload already downloaded videos to AI."""
         logger.info("Running in UPLOAD ONLY mode")
         
-        async with AIUploader(headless=self.headless, prompt=self.prompt) as uploader:
+        async with self._new_uploader() as uploader:
             # Check login first
             is_logged_in = await uploader.check_login_status()
             if not is_logged_in:
-                print("\n" + "="*60)
-                print("SESSION EXPIRED atau BELUM LOGIN")
-                print("="*60)
-                print("Jalankan dulu: python ai_uploader.py --login")
-                print("="*60 + "\n")
+                self._print_login_required()
                 return
             
-            for i, url in enumerate(urls):
-                self.current_batch = (i // self.batch_size) + 1
-                index = url_indices.get(url, 0)
-                video_path = get_video_path(url, index)
-                
-                if not video_path.exists():
-                    logger.warning(f"Video not found: {video_path}")
-                    self.stats['upload']['failed'] += 1
-                    log_failed_url(url, "Video file not found")
-                    continue
-
-                # Only upload if output.csv row is empty or header-like
-                if not should_attempt_ai_upload(url, OUTPUT_FILE):
-                    logger.info(f"Skipping upload for {url} (already has valid AI result)")
-                    self.stats['upload']['skipped'] += 1
-                    continue
-                
-                response = await uploader.process_video(url, video_path, max_retries=5)
-                
-                if response:
-                    self.stats['upload']['successful'] += 1
+            writer = OrderedResultWriter(self.output_file)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size)
+            
+            async def feed():
+                while True:
+                    job = await self._next_pending(pending)
+                    if job is None:
+                        break
+                    seq, url = job
+                    self.current_batch = (seq // self.batch_size) + 1
+                    index = url_indices.pop(url, 0)
+                    video_path = get_video_path(url, index, self.downloads_dir)
                     
-                    # Delete after successful upload
-                    if self.delete_after_upload:
-                        try:
-                            video_path.unlink()
-                            self.stats['deleted'] += 1
-                            logger.info(f"Deleted: {video_path}")
-                        except Exception as e:
-                            logger.warning(f"Failed to delete {video_path}: {e}")
-                else:
-                    self.stats['upload']['failed'] += 1
-                    log_failed_url(url, "AI upload failed")
-                
-                self._print_progress()
-                await asyncio.sleep(2)
+                    if not video_path.exists():
+                        logger.warning(f"Video not found: {video_path}")
+                        self.stats['upload']['failed'] += 1
+                        writer.add_failure(seq, url, "Video file not found")
+                        continue
+                    
+                    await queue.put((seq, url, video_path))
+            
+            await self._run_workers(uploader, feed, queue, writer)
     
-    async def _streaming_mode(self, urls: List[str], url_indices: Dict[str, int]):
+    async def _streaming_mode(self, pending, url_indices: Dict[str, int]):
         """
-        Main streaming mode: Download batch → Upload one by one → Delete → Repeat
+        Main streaming mode: Download and AI upload run at the same time.
+        
+        Download workers (limited per downloader site) fill a bounded queue with
+        (url, path) items while AI workers (one per chat session) drain it, so
+        neither browser sits idle waiting for the other. The queue bound (batch
+        size) also caps how many videos sit on disk.
+        
+        `pending` is the shared iterator of (seq, url) pairs (a JobFeed when
+        URLs come from a job queue).
         """
         logger.info("Running in STREAMING mode")
         
-        async with VideoDownloader(headless=self.headless) as downloader:
-            async with AIUploader(headless=self.headless, prompt=self.prompt) as uploader:
+        async with self._new_downloader() as downloader:
+            async with self._new_uploader() as uploader:
                 # Check login first
                 is_logged_in = await uploader.check_login_status()
                 if not is_logged_in:
-                    print("\n" + "="*60)
-                    print("SESSION EXPIRED atau BELUM LOGIN")
-                    print("="*60)
-                    print("Jalankan dulu: python ai_uploader.py --login")
-                    print("="*60 + "\n")
+                    self._print_login_required()
                     return
                 
-                # Process in batches
-                for batch_start in range(0, len(urls), self.batch_size):
-                    self.current_batch += 1
-                    batch = urls[batch_start:batch_start + self.batch_size]
-                    
-                    print(f"\n\n{'='*60}")
-                    print(f"BATCH {self.current_batch}/{self.total_batches}")
-                    print(f"{'='*60}\n")
-                    
-                    # Step 1: Download this batch
-                    logger.info(f"Downloading batch {self.current_batch}...")
-                    downloaded_videos = []
-                    
-                    for url in batch:
-                        index = url_indices.get(url, 0)
-                        output_path = get_video_path(url, index)
-                        
-                        if output_path.exists():
-                            self.stats['download']['skipped'] += 1
-                            downloaded_videos.append((url, output_path))
-                            continue
-                        
-                        path = await downloader.download_video(url, index)
-                        
-                        if path:
-                            self.stats['download']['successful'] += 1
-                            downloaded_videos.append((url, path))
-                        else:
-                            self.stats['download']['failed'] += 1
-                            # Log failed download to output.csv
-                            log_failed_url(url, "Download failed or timeout")
-                        
-                        self._print_progress()
-                        await asyncio.sleep(1)
-                    
-                    # Step 2: Upload each video to AI
-                    logger.info(f"\nUploading {len(downloaded_videos)} videos to AI...")
-                    
-                    for url, video_path in downloaded_videos:
-                        logger.info(f"Processing: {video_path.name}")
-
-                        # Only upload if output.csv row is empty or header-like
-                        if not should_attempt_ai_upload(url, OUTPUT_FILE):
-                            logger.info(f"Skipping upload for {url} (already has valid AI result)")
-                            self.stats['upload']['skipped'] += 1
-                            continue
-
-                        response = await uploader.process_video(url, video_path, max_retries=5)
-
-                        if response:
-                            self.stats['upload']['successful'] += 1
-                            # Step 3: Delete after successful upload
-                            if self.delete_after_upload:
-                                try:
-                                    video_path.unlink()
-                                    self.stats['deleted'] += 1
-                                    logger.info(f"Deleted: {video_path.name}")
-                                except Exception as e:
-                                    logger.warning(f"Failed to delete {video_path}: {e}")
-                        else:
-                            self.stats['upload']['failed'] += 1
-                            # Log failed upload to output.csv
-                            log_failed_url(url, "AI upload failed")
-
-                        self._print_progress()
-                        await asyncio.sleep(2)
-                    
-                    # Batch complete
-                    print(f"\n✓ Batch {self.current_batch} complete!")
+                if self.jobs is not None:
+                    writer = JobResultWriter(self.jobs, self.worker_id)
+                else:
+                    writer = OrderedResultWriter(self.output_file)
+                queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size)
+                
+                async def feed():
+                    await asyncio.gather(*(
+                        self._download_worker(downloader, pending, url_indices, queue, writer)
+                        for _ in range(downloader.max_concurrency)
+                    ))
+                
+                await self._run_workers(uploader, feed, queue, writer)
+    
+    async def _run_workers(self, uploader: AIUploader, feed, queue: asyncio.Queue, writer: OrderedResultWriter):
+        """
+        Run the feed coroutine alongside one upload worker per AI session.
+        
+        feed() puts (seq, url, path) items on the queue; one None sentinel per
+        upload worker is added once it returns.
+        """
+        async with AISessionPool(uploader, size=self.ai_sessions) as pool:
+            async def produce():
+                await feed()
+                for _ in pool.sessions:
+                    await queue.put(None)
+            
+            tasks = [asyncio.create_task(produce())]
+            tasks += [
+                asyncio.create_task(self._upload_worker(session, queue, writer))
+                for session in pool.sessions
+            ]
+            
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                writer.close()
+    
+    async def _download_worker(
+        self,
+        downloader: VideoDownloader,
+        pending,
+        url_indices: Dict[str, int],
+        queue: asyncio.Queue,
+        writer: OrderedResultWriter
+    ):
+        """
+        Download videos and put (seq, url, path) items on the queue.
+        
+        Several workers share the same `pending` iterator of (seq, url) pairs.
+        """
+        while True:
+            job = await self._next_pending(pending)
+            if job is None:
+                break
+            seq, url = job
+            self.current_batch = (seq // self.batch_size) + 1
+            
+            # A claimed URL can be stolen until its download starts
+            if self.jobs is not None and not await asyncio.to_thread(self.jobs.start, self.worker_id, url):
+                logger.info(f"Skipping {url} (taken over by another worker)")
+                url_indices.pop(url, None)
+                writer.skip(seq)
+                continue
+            
+            path = await self._download_one(downloader, url, url_indices)
+            
+            if path:
+                # Blocks while the queue is full, which caps videos on disk
+                await queue.put((seq, url, path))
+            else:
+                # Log failed download to output.csv
+                writer.add_failure(seq, url, "Download failed or timeout")
+    
+    async def _next_pending(self, pending) -> Optional[Tuple[int, str]]:
+        """
+        Take the next (seq, url) pair off the shared iterator, or None at the end.
+        
+        next() runs in a worker thread: claiming from a job queue is a SQLite
+        or HTTP round trip (with retries) and reading data.csv may resolve a
+        short link, neither of which may stall the event loop.
+        """
+        async with self._pending_lock:
+            return await asyncio.to_thread(next, pending, None)
+    
+    async def _download_one(
+        self,
+        downloader: VideoDownloader,
+        url: str,
+        url_indices: Dict[str, int]
+    ) -> Optional[Path]:
+        """Download one video (or reuse an existing file) and update stats."""
+        index = url_indices.pop(url, 0)
+        output_path = get_video_path(url, index, self.downloads_dir)
+        
+        if output_path.exists():
+            self.stats['download']['skipped'] += 1
+            return output_path
+        
+        path = await downloader.download_video(url, index)
+        
+        if path:
+            self.stats['download']['successful'] += 1
+        else:
+            self.stats['download']['failed'] += 1
+        
+        self.metrics.export()
+        self._print_progress()
+        return path
+    
+    async def _upload_worker(self, uploader: AIUploader, queue: asyncio.Queue, writer: OrderedResultWriter):
+        """Take (seq, url, path) items off the queue and upload them until the sentinel arrives."""
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            
+            seq, url, video_path = item
+            logger.info(f"Processing: {video_path.name} (queued: {queue.qsize()})")
+            
+            # The lease expired while the video waited in the queue. Another
+            # worker may own the URL now and downloads to the same path, so
+            # the file is left for it
+            if self.jobs is not None and not await asyncio.to_thread(self.jobs.start, self.worker_id, url):
+                logger.info(f"Skipping upload for {url} (lease lost to another worker)")
+                self.stats['upload']['skipped'] += 1
+                writer.skip(seq)
+                continue
+            
+            # Only upload if output.csv row is empty or header-like
+            if self.jobs is None and not should_attempt_ai_upload(url, self.output_file):
+                logger.info(f"Skipping upload for {url} (already has valid AI result)")
+                self.stats['upload']['skipped'] += 1
+                writer.skip(seq)
+                continue
+            
+            # Same video content as one analyzed before: reuse its result
+            content_hash = None
+            if self.content_dedup:
+                try:
+                    with self.metrics.span('content_hash', url):
+                        content_hash = await asyncio.to_thread(hash_video_file, video_path)
+                except OSError as e:
+                    logger.warning(f"Could not hash {video_path.name}, uploading it: {e}")
+            if content_hash:
+                reused = await asyncio.to_thread(reuse_content_result, content_hash, url, self.content_file)
+                if reused:
+                    original_url, response = reused
+                    logger.info(f"Reusing result of {original_url} for {url} (same video content)")
+                    writer.add_result(seq, url, response)
+                    self.stats['upload']['reused'] += 1
+                    self._delete_video(video_path)
+                    self._print_progress()
+                    continue
+            
+            response = await uploader.process_video(url, video_path, max_retries=5, save_result=False)
+            
+            if response:
+                writer.add_result(seq, url, response)
+                if content_hash:
+                    await asyncio.to_thread(remember_content_result, content_hash, url, response, self.content_file)
+                self.stats['upload']['successful'] += 1
+                self._delete_video(video_path)
+            else:
+                self.stats['upload']['failed'] += 1
+                # Log failed upload to output.csv
+                writer.add_failure(seq, url, "AI upload failed")
+            
+            self.metrics.export()
+            self._print_progress()
+            await asyncio.sleep(2)
+    
+    def _delete_video(self, video_path: Path):
+        """Delete a video once its result is in (if delete_after_upload)."""
+        if not self.delete_after_upload:
+            return
+        try:
+            video_path.unlink()
+            self.stats['deleted'] += 1
+            logger.info(f"Deleted: {video_path.name}")
+        except Exception as e:
+            logger.warning(f"Failed to delete {video_path}: {e}")
+    
+    def _print_login_required(self):
+        """Tell the user to log in first."""
+        print("\n" + "="*60)
+        print("SESSION EXPIRED atau BELUM LOGIN")
+        print("="*60)
+        print("Jalankan dulu: python ai_uploader.py --login")
+        print("="*60 + "\n")
     
     def _print_summary(self):
         """Print final summary."""
@@ -331,6 +554,7 @@ class StreamingPipeline:
             print(f"  ✓ Successful: {self.stats['upload']['successful']}")
             print(f"  ✗ Failed: {self.stats['upload']['failed']}")
             print(f"  ⊘ Skipped (processed): {self.stats['upload']['skipped']}")
+            print(f"  ♻ Reused (same video content): {self.stats['upload']['reused']}")
             print()
         
         if self.delete_after_upload and not self.download_only:
@@ -338,7 +562,18 @@ class StreamingPipeline:
             print(f"  🗑 Deleted: {self.stats['deleted']} files")
             print()
         
-        print(f"Results saved to: {OUTPUT_FILE}")
+        if self.stats.get('stages'):
+            print("STAGE TIMING:")
+            print_stage_summary(self.metrics)
+            print()
+        
+        selector_report = self.selectors.report()
+        if selector_report:
+            print("SELECTORS:")
+            print_selector_report(selector_report)
+            print()
+        
+        print(f"Results saved to: {self.output_file}")
         print("="*60)
 
 
@@ -443,6 +678,35 @@ async def main():
         action='store_true',
         help='Do not delete videos after successful upload'
     )
+    parser.add_argument(
+        '--ai-sessions',
+        type=int,
+        default=AI_CONCURRENCY,
+        help=f'Number of concurrent AI chat sessions (default: {AI_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--capture',
+        choices=['dom', 'network'],
+        default=RESPONSE_CAPTURE_MODE,
+        help=f'How to capture the AI answer (default: {RESPONSE_CAPTURE_MODE})'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        default=str(METRICS_FILE) if METRICS_FILE else None,
+        help='JSON lines file for per-stage timings'
+    )
+    parser.add_argument(
+        '--prometheus-file',
+        type=str,
+        default=str(METRICS_PROM_FILE) if METRICS_PROM_FILE else None,
+        help='Prometheus text file with stage histograms, rewritten after every video'
+    )
+    parser.add_argument(
+        '--openmetrics',
+        action='store_true',
+        help='Write the --prometheus-file in OpenMetrics format'
+    )
     parser.add_argument(
         '--prompt', 
         type=str, 
@@ -460,9 +724,27 @@ async def main():
         action='store_true', 
         help='Run in interactive mode'
     )
+    parser.add_argument(
+        '--queue',
+        type=str,
+        help='Claim URLs from a job queue: http://host:port of a coordinator or a shared jobs.db'
+    )
+    parser.add_argument(
+        '--no-content-dedup',
+        action='store_true',
+        help='Analyze every video, even if the same content was analyzed before'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        help='Name of this worker in the job queue (default: hostname-pid)'
+    )
     
     args = parser.parse_args()
     
+    if args.queue and (args.download_only or args.upload_only or args.interactive):
+        parser.error('--queue only works in full pipeline mode')
+    
     # Migrate old output format if needed
     migrate_old_output_format()
     
@@ -475,9 +757,23 @@ async def main():
             batch_size=args.batch_size,
             delete_after_upload=not args.no_delete,
             download_only=args.download_only,
-            upload_only=args.upload_only
+            upload_only=args.upload_only,
+            ai_sessions=args.ai_sessions,
+            capture_mode=args.capture,
+            metrics=StageMetrics(
+                Path(args.metrics_file) if args.metrics_file else None,
+                Path(args.prometheus_file) if args.prometheus_file else None,
+                openmetrics=args.openmetrics
+            ),
+            jobs=connect_job_queue(args.queue) if args.queue else None,
+            worker_id=args.worker_id,
+            content_dedup=not args.no_content_dedup
         )
-        await pipeline.run()
+        try:
+            await pipeline.run()
+        finally:
+            if pipeline.jobs is not None:
+                pipeline.jobs.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,371 @@
+"""
+SQLite Results Store for MVoice Automation
+
+Keeps one row per URL (upsert) with status, attempt count, parsed metrics
+and the raw AI response, plus a video content hash -> response index so
+copies of an analyzed video reuse its result. output.csv stays the deliverable; this database is
+the fast index behind it and can export a clean, de-duplicated CSV.
+
+Usage:
+    python results_store.py --stats
+    python results_store.py --export output_clean.csv [--include-failed]
+    python results_store.py --rebuild
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import OUTPUT_FILE, RESULTS_DB_FILE
+from utils import (
+    logger,
+    METRICS_COLUMNS,
+    normalize_url,
+    row_status,
+    STATUS_VALID,
+    STATUS_FAILED
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    metrics TEXT,
+    raw_response TEXT,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results(status);
+CREATE TABLE IF NOT EXISTS content (
+    content_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    raw_response TEXT NOT NULL,
+    reused INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Bumped whenever normalize_url changes, so stores keyed the old way are rebuilt
+URL_KEY_VERSION = '2'
+
+
+class ResultsStore:
+    """
+    SQLite (WAL mode) store of AI results keyed by normalized URL.
+    
+    A valid result is never replaced by a later failure; the attempt
+    counter still goes up so retries are visible. Methods may be called
+    from worker threads (asyncio.to_thread); a lock serializes them.
+    """
+    
+    def __init__(self, db_path: Path = RESULTS_DB_FILE, csv_path: Path = OUTPUT_FILE):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+    
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+    
+    def _csv_size(self) -> int:
+        return self.csv_path.stat().st_size if self.csv_path.exists() else 0
+    
+    def _upsert(self, url: str, status: str, metrics: Optional[Dict[str, str]],
+                raw_response: Optional[str], error: Optional[str]):
+        key = normalize_url(url)
+        now = datetime.now().isoformat(timespec='seconds')
+        metrics_json = json.dumps(metrics, ensure_ascii=False) if metrics is not None else None
+        
+        existing = self.conn.execute(
+            "SELECT status FROM results WHERE url_key = ?", (key,)
+        ).fetchone()
+        
+        if existing is None:
+            self.conn.execute(
+                "INSERT INTO results (url_key, url, status, attempts, metrics, raw_response, error, updated_at) "
+                "VALUES (?, ?, ?, 1, ?, ?, ?, ?)",
+                (key, url, status, metrics_json, raw_response, error, now)
+            )
+        elif existing[0] == STATUS_VALID and status != STATUS_VALID:
+            # Keep the good result, only count the attempt
+            self.conn.execute(
+                "UPDATE results SET attempts = attempts + 1, error = ?, updated_at = ? WHERE url_key = ?",
+                (error, now, key)
+            )
+        else:
+            self.conn.execute(
+                "UPDATE results SET url = ?, status = ?, attempts = attempts + 1, metrics = ?, "
+                "raw_response = ?, error = ?, updated_at = ? WHERE url_key = ?",
+                (url, status, metrics_json, raw_response, error, now, key)
+            )
+    
+    def record_result(self, url: str, metrics: Dict[str, str], raw_response: Optional[str] = None):
+        """
+        Upsert a parsed AI result.
+        
+        Args:
+            url: Video URL
+            metrics: Parsed metrics (METRICS_COLUMNS -> value)
+            raw_response: Raw AI response text
+        """
+        with self._lock, self.conn:
+            self._upsert(url, row_status(metrics), metrics, raw_response, None)
+            self._set_meta('csv_size', str(self._csv_size()))
+    
+    def record_failure(self, url: str, reason: str):
+        """
+        Upsert a failure for a URL.
+        
+        Args:
+            url: Video URL
+            reason: Reason for failure
+        """
+        with self._lock, self.conn:
+            self._upsert(url, STATUS_FAILED, None, None, reason)
+            self._set_meta('csv_size', str(self._csv_size()))
+    
+    def statuses(self) -> Dict[str, str]:
+        """Get {url_key: status} for every stored URL."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT url_key, status FROM results"))
+    
+    def raw_response(self, url: str) -> Optional[str]:
+        """Get the stored raw AI response for a URL (None if there is none)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT raw_response FROM results WHERE url_key = ?", (normalize_url(url),)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def record_content(self, content_hash: str, url: str, raw_response: str):
+        """
+        Index a valid response by video content hash (the first one analyzed is kept).
+        
+        Args:
+            content_hash: hash_video_file() of the video
+            url: Video URL the response belongs to
+            raw_response: Raw AI response text
+        """
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO content (content_hash, url, raw_response, updated_at) VALUES (?, ?, ?, ?)",
+                (content_hash, url, raw_response, datetime.now().isoformat(timespec='seconds'))
+            )
+    
+    def reuse_content(self, content_hash: str) -> Optional[Tuple[str, str]]:
+        """Get (url, raw_response) indexed for a content hash and count the reuse (None if unknown)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url, raw_response FROM content WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is not None:
+                with self.conn:
+                    self.conn.execute(
+                        "UPDATE content SET reused = reused + 1 WHERE content_hash = ?", (content_hash,)
+                    )
+        return row
+    
+    def content_entries(self) -> List[Tuple[str, str, str, int]]:
+        """Get every (content_hash, url, raw_response, reused) of the content index."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT content_hash, url, raw_response, reused FROM content ORDER BY rowid"
+            ).fetchall()
+    
+    def import_content(self, entries: List[Tuple[str, str, str, int]]) -> int:
+        """
+        Add content index entries of another store (e.g. a shard's).
+        
+        A hash already indexed here keeps its response; only the reuse
+        counts are added up.
+        
+        Args:
+            entries: content_entries() of the other store
+        
+        Returns:
+            Number of new content hashes
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self.conn:
+            before = self.conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+            self.conn.executemany(
+                "INSERT INTO content (content_hash, url, raw_response, reused, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET reused = reused + excluded.reused",
+                [(content_hash, url, raw, reused, now) for content_hash, url, raw, reused in entries]
+            )
+            after = self.conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+        return after - before
+    
+    def content_counts(self) -> Tuple[int, int]:
+        """Get (indexed content hashes, results reused from them)."""
+        with self._lock:
+            hashes, reused = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(reused), 0) FROM content").fetchone()
+        return hashes, reused
+    
+    def in_sync(self) -> bool:
+        """True if output.csv has not changed since this store last wrote to it (and keys are current)."""
+        return (self._get_meta('csv_size') == str(self._csv_size())
+                and self._get_meta('url_key_version') == URL_KEY_VERSION)
+    
+    def rebuild_from_csv(self):
+        """
+        Re-import every row of output.csv (e.g. after the CSV was edited or
+        deleted by hand, or normalize_url changed). Raw responses of URLs
+        still in the CSV are kept.
+        """
+        raw = {
+            normalize_url(url): response for url, response in self.conn.execute(
+                "SELECT url, raw_response FROM results WHERE raw_response IS NOT NULL"
+            )
+        }
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM results")
+            if self.csv_path.exists():
+                with open(self.csv_path, 'r', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        url = row.get('url')
+                        if not url:
+                            continue
+                        status = row_status(row)
+                        if status == STATUS_FAILED:
+                            reason = (row.get('message') or row.get(METRICS_COLUMNS[0]) or '')
+                            self._upsert(url, status, None, None, reason[len('FAILED:'):].strip())
+                        else:
+                            metrics = {col: (row.get(col) or '') for col in METRICS_COLUMNS}
+                            self._upsert(url, status, metrics, raw.get(normalize_url(url)), None)
+            self._set_meta('csv_size', str(self._csv_size()))
+            self._set_meta('url_key_version', URL_KEY_VERSION)
+        logger.info(f"Rebuilt results store from {self.csv_path} ({len(self.statuses())} URLs)")
+    
+    def counts(self) -> Dict[str, int]:
+        """Get the number of URLs per status."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM results GROUP BY status"))
+    
+    def export_csv(self, file_path: Path, include_failed: bool = False) -> int:
+        """
+        Write one row per URL in the same ['url'] + METRICS_COLUMNS layout as output.csv.
+        
+        Args:
+            file_path: Destination CSV path
+            include_failed: Also write failed URLs ("FAILED: reason" in the first metric column)
+        
+        Returns:
+            Number of rows written
+        """
+        fieldnames = ['url'] + METRICS_COLUMNS
+        written = 0
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for url, status, metrics_json, error in self.conn.execute(
+                "SELECT url, status, metrics, error FROM results ORDER BY rowid"
+            ):
+                if status == STATUS_FAILED:
+                    if not include_failed:
+                        continue
+                    row = {'url': url, METRICS_COLUMNS[0]: f'FAILED: {error or ""}'}
+                else:
+                    row = {'url': url}
+                    row.update(json.loads(metrics_json) if metrics_json else {})
+                writer.writerow(row)
+                written += 1
+        logger.info(f"Exported {written} rows to {file_path}")
+        return written
+
+
+# One shared store per output file (keyed by resolved path)
+_stores: Dict[Path, ResultsStore] = {}
+
+
+def get_results_store(output_file: Path = OUTPUT_FILE) -> ResultsStore:
+    """
+    Get the results store that backs an output CSV.
+    
+    output.csv uses RESULTS_DB_FILE; any other output file gets a database
+    next to it with a .db suffix.
+    
+    Args:
+        output_file: Output CSV path
+    
+    Returns:
+        Shared ResultsStore, synced with the CSV
+    """
+    key = Path(output_file).resolve()
+    if key not in _stores:
+        if key == OUTPUT_FILE.resolve():
+            db_path = RESULTS_DB_FILE
+        else:
+            db_path = Path(output_file).with_suffix('.db')
+        store = ResultsStore(db_path, Path(output_file))
+        if not store.in_sync():
+            store.rebuild_from_csv()
+        _stores[key] = store
+    return _stores[key]
+
+
+def close_results_store(output_file: Path):
+    """Close and forget the shared store of an output CSV (e.g. before deleting it)."""
+    store = _stores.pop(Path(output_file).resolve(), None)
+    if store is not None:
+        store.close()
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Inspect/export the SQLite results store')
+    parser.add_argument('--output', type=str, default=str(OUTPUT_FILE), help='Output CSV the store backs')
+    parser.add_argument('--export', type=str, help='Write a de-duplicated CSV to this path')
+    parser.add_argument('--include-failed', action='store_true', help='Include failed URLs in the export')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the store from the output CSV')
+    parser.add_argument('--stats', action='store_true', help='Print URL counts per status')
+    
+    args = parser.parse_args()
+    
+    store = get_results_store(Path(args.output))
+    
+    if args.rebuild:
+        store.rebuild_from_csv()
+    
+    if args.export:
+        store.export_csv(Path(args.export), include_failed=args.include_failed)
+    
+    if args.stats or not (args.export or args.rebuild):
+        print("\n" + "="*50)
+        print("RESULTS STORE")
+        print("="*50)
+        print(f"Database: {store.db_path}")
+        for status, count in sorted(store.counts().items()):
+            print(f"{status}: {count}")
+        hashes, reused = store.content_counts()
+        print(f"Content hashes: {hashes} (results reused: {reused})")
+        print("="*50)
+
+
+if __name__ == "__main__":
+    main()
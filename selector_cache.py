@@ -0,0 +1,166 @@
+"""
+Selector Cache for MVoice Automation
+
+The chat page and the downloader sites are driven through ordered lists of
+fallback selectors. SelectorResolver remembers which selector matched for
+each role (upload input, prompt box, send button, response container,
+download link, ...), puts it first the next time, persists the winners
+across runs and reports how often the remembered selector hit. Catch-all
+fallbacks are never remembered.
+
+Usage:
+    python selector_cache.py            # show learned selectors and hit rates
+    python selector_cache.py --clear    # forget all learned selectors
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import SELECTOR_CACHE_FILE
+from utils import logger, write_text_atomic
+
+
+# Broad fallbacks that match some element on almost any page. They are still
+# tried in their place but never become a role's winner, or one lucky match
+# would put them ahead of the specific selectors for good.
+CATCH_ALL_SELECTORS = frozenset({
+    'button svg',
+    'a[href*="download"]',
+    'div:has-text("Upload files")',
+    'div:has-text("Minimal")',
+})
+
+
+class SelectorResolver:
+    """
+    Learned winning selector per role, shared by every page of a run.
+
+    Callers try `ordered(role, selectors)` in order and report the result
+    with `found(role, selector)` or `missed(role)`.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = SELECTOR_CACHE_FILE,
+                 catch_all: Iterable[str] = CATCH_ALL_SELECTORS):
+        self.cache_file = cache_file
+        self.catch_all = frozenset(catch_all)
+        self.winners: Dict[str, str] = {}
+        # Counts from earlier runs (from the cache file) and from this run
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable selector cache {self.cache_file}: {e}")
+            return
+        for role, entry in data.get('roles', {}).items():
+            # Catch-all winners saved by earlier versions are dropped
+            if entry.get('winner') and entry['winner'] not in self.catch_all:
+                self.winners[role] = entry['winner']
+            self.totals[role] = {key: int(entry.get(key, 0)) for key in ('lookups', 'hits', 'misses')}
+
+    def _count(self, role: str, key: str):
+        counts = self.stats.setdefault(role, {'lookups': 0, 'hits': 0, 'misses': 0})
+        counts[key] += 1
+
+    def ordered(self, role: str, selectors: List[str]) -> List[str]:
+        """
+        The selectors to try for a role, the learned winner first.
+
+        A winner that is no longer one of `selectors` is ignored.
+        """
+        winner = self.winners.get(role)
+        if winner in selectors:
+            return [winner] + [s for s in selectors if s != winner]
+        return list(selectors)
+
+    def found(self, role: str, selector: str):
+        """Record that `selector` matched for `role` (it becomes the winner unless it is a catch-all)."""
+        self._count(role, 'lookups')
+        if self.winners.get(role) == selector:
+            self._count(role, 'hits')
+        elif selector not in self.catch_all:
+            logger.debug(f"Selector for {role} is now {selector}")
+            self.winners[role] = selector
+
+    def missed(self, role: str):
+        """Record that no selector matched for `role`."""
+        self._count(role, 'lookups')
+        self._count(role, 'misses')
+
+    def report(self, include_totals: bool = False) -> Dict[str, dict]:
+        """
+        Per-role winner, lookups, hits, misses and hit rate (hits / lookups).
+
+        Args:
+            include_totals: Add the counts of earlier runs from the cache file
+        """
+        roles = set(self.stats) | (set(self.totals) if include_totals else set())
+        result = {}
+        for role in sorted(roles):
+            counts = dict(self.stats.get(role, {'lookups': 0, 'hits': 0, 'misses': 0}))
+            if include_totals:
+                for key, value in self.totals.get(role, {}).items():
+                    counts[key] = counts.get(key, 0) + value
+            lookups = counts.get('lookups', 0)
+            result[role] = {
+                'winner': self.winners.get(role),
+                **counts,
+                'hit_rate': round(counts.get('hits', 0) / lookups, 3) if lookups else 0.0,
+            }
+        return result
+
+    def save(self):
+        """Write winners and cumulative counts to the cache file (atomically)."""
+        if not self.cache_file:
+            return
+        data = {'roles': {
+            role: {key: value for key, value in entry.items() if key != 'hit_rate'}
+            for role, entry in self.report(include_totals=True).items()
+        }}
+        for role, winner in self.winners.items():
+            data['roles'].setdefault(role, {'winner': winner})
+        try:
+            write_text_atomic(self.cache_file, json.dumps(data, indent=2))
+        except OSError as e:
+            logger.warning(f"Could not save selector cache {self.cache_file}: {e}")
+
+
+def print_report(report: Dict[str, dict]):
+    """Print the per-role selector table."""
+    if not report:
+        print("No selector lookups recorded")
+        return
+    print(f"{'role':<28} {'lookups':>8} {'hits':>6} {'misses':>7} {'hit %':>6}  winner")
+    for role, entry in report.items():
+        print(f"{role:<28} {entry['lookups']:>8} {entry['hits']:>6} {entry['misses']:>7} "
+              f"{entry['hit_rate'] * 100:>5.0f}%  {entry['winner'] or '-'}")
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Show or clear the learned selector cache')
+    parser.add_argument('--file', type=str, default=str(SELECTOR_CACHE_FILE), help='Selector cache file')
+    parser.add_argument('--clear', action='store_true', help='Forget all learned selectors')
+
+    args = parser.parse_args()
+
+    cache_file = Path(args.file)
+    if args.clear:
+        if cache_file.exists():
+            cache_file.unlink()
+            print("✓ Selector cache cleared!")
+        else:
+            print("No selector cache to clear.")
+        return
+
+    print_report(SelectorResolver(cache_file).report(include_totals=True))
+
+
+if __name__ == "__main__":
+    main()
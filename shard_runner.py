@@ -0,0 +1,329 @@
+"""
+Sharded Pipeline Runner for MVoice Automation
+
+Splits the pending URLs of data.csv across K worker processes. Each worker
+runs its own StreamingPipeline with its own browsers, its own downloads
+subfolder and its own output partition:
+
+    shards/shard-<k>/data.csv       URLs of the shard
+    shards/shard-<k>/output.csv     results of the shard (+ output.db store)
+    shards/shard-<k>/metrics.jsonl  stage timings of the shard
+    downloads/shard-<k>/            videos of the shard
+
+When the workers finish (or are interrupted) the partitions are merged
+into output.csv in data.csv order and removed. Partitions left behind by
+a crashed run are merged at the start of the next one.
+
+The content hash index (CONTENT_DEDUP) is not partitioned: every shard
+reads and writes the one in output.csv's store (output.db), so a video
+that is duplicated across shards is reused once any shard analyzed it.
+Two shards working on copies of one video at the same time both upload it.
+
+Usage:
+    python shard_runner.py [--shards 4] [--ai-sessions 1] [--batch-size 5] [--headless]
+    python shard_runner.py --merge-only
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    DATA_FILE,
+    OUTPUT_FILE,
+    DOWNLOADS_DIR,
+    DEFAULT_PROMPT,
+    BATCH_SIZE,
+    DELETE_AFTER_UPLOAD,
+    AI_CONCURRENCY,
+    RESPONSE_CAPTURE_MODE,
+    METRICS_FILE,
+    USE_RESULTS_DB,
+    SHARD_COUNT,
+    SHARDS_DIR
+)
+from utils import (
+    logger,
+    get_unique_urls,
+    get_processed_urls,
+    get_video_path,
+    migrate_old_output_format,
+    append_result_to_csv_parsed,
+    log_failed_url,
+    row_status,
+    METRICS_COLUMNS,
+    STATUS_VALID,
+    STATUS_FAILED
+)
+from results_store import get_results_store, close_results_store
+
+
+def shard_paths(shard_dir: Path) -> Dict[str, Path]:
+    """data / output / metrics / downloads paths of one shard."""
+    return {
+        'data': shard_dir / "data.csv",
+        'output': shard_dir / "output.csv",
+        'metrics': shard_dir / "metrics.jsonl",
+        'downloads': DOWNLOADS_DIR / shard_dir.name,
+    }
+
+
+def split_into_shards(urls: List[str], shards: int, url_indices: Dict[str, int],
+                      shards_dir: Path = SHARDS_DIR) -> List[Path]:
+    """
+    Write one data.csv per shard (round-robin, so every shard gets a similar mix).
+
+    Videos already in the downloads folder are moved into the shard's
+    downloads subfolder so they are not downloaded again.
+
+    Args:
+        urls: Pending URLs in data.csv order
+        shards: Number of shards
+        url_indices: URL -> position in data.csv (for the existing video names)
+        shards_dir: Folder for the shard partitions
+
+    Returns:
+        Shard folders that received URLs
+    """
+    shard_dirs = []
+    for k in range(min(shards, len(urls))):
+        shard_urls = urls[k::shards]
+        shard_dir = shards_dir / f"shard-{k}"
+        paths = shard_paths(shard_dir)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        paths['downloads'].mkdir(parents=True, exist_ok=True)
+
+        with open(paths['data'], 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url'])
+            writer.writerows([url] for url in shard_urls)
+
+        for i, url in enumerate(shard_urls):
+            existing = get_video_path(url, url_indices.get(url, 0))
+            if existing.exists():
+                existing.replace(get_video_path(url, i, paths['downloads']))
+
+        logger.info(f"Shard {k}: {len(shard_urls)} URLs")
+        shard_dirs.append(shard_dir)
+    return shard_dirs
+
+
+def run_shard(shard_dir: str, options: dict):
+    """Worker process: run the pipeline over one shard."""
+    # Imported here so the coordinator never loads playwright
+    from metrics import StageMetrics
+    from pipeline import StreamingPipeline
+
+    paths = shard_paths(Path(shard_dir))
+    pipeline = StreamingPipeline(
+        data_file=paths['data'],
+        output_file=paths['output'],
+        downloads_dir=paths['downloads'],
+        metrics=StageMetrics(paths['metrics']),
+        **options
+    )
+    asyncio.run(pipeline.run())
+
+
+def run_shards(shard_dirs: List[Path], options: dict) -> List[Optional[int]]:
+    """
+    Run one worker process per shard and wait for all of them.
+
+    Ctrl+C stops the workers; whatever they finished is still merged.
+
+    Returns:
+        Exit code per shard
+    """
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=run_shard, args=(str(shard_dir), options), name=shard_dir.name)
+        for shard_dir in shard_dirs
+    ]
+    for worker in workers:
+        worker.start()
+        logger.info(f"Started {worker.name} (pid {worker.pid})")
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        logger.warning("Interrupted, stopping shard workers...")
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+    return [worker.exitcode for worker in workers]
+
+
+def _read_shard_rows(output_file: Path) -> Dict[str, Tuple[str, dict]]:
+    """
+    Best row per URL of a shard output: a valid row wins, otherwise the last one.
+
+    Rows are read by position, so failure rows ("FAILED: ..." in the first
+    metric column) and parsed rows line up whatever the header says.
+    """
+    fieldnames = ['url'] + METRICS_COLUMNS
+    rows: Dict[str, Tuple[str, dict]] = {}
+    with open(output_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for values in reader:
+            if not values or not values[0]:
+                continue
+            row = dict(zip(fieldnames, values))
+            status = row_status(row)
+            url = row['url']
+            if url not in rows or rows[url][0] != STATUS_VALID:
+                rows[url] = (status, row)
+    return rows
+
+
+def merge_shards(shards_dir: Path = SHARDS_DIR, output_file: Path = OUTPUT_FILE,
+                 data_file: Path = DATA_FILE) -> Dict[str, int]:
+    """
+    Append every shard's results to output_file in data.csv order, then remove the shards.
+
+    Results go through the normal append functions, so output_file's results
+    store and processed index stay in sync. The shard's raw AI response is
+    used when its store has one, and a content hash index in it (from runs
+    before the shards shared output_file's) is added to output_file's store.
+    Videos still in a shard's downloads subfolder are moved back to the
+    downloads folder.
+
+    Returns:
+        Number of merged rows per status
+    """
+    counts: Dict[str, int] = {}
+    shard_dirs = sorted(shards_dir.glob("shard-*")) if shards_dir.exists() else []
+    if not shard_dirs:
+        return counts
+
+    # Collect the best row (and raw response) per URL from every shard
+    rows: Dict[str, Tuple[str, dict]] = {}
+    messages: Dict[str, str] = {}
+    content = []
+    for shard_dir in shard_dirs:
+        output = shard_paths(shard_dir)['output']
+        if not output.exists():
+            continue
+        shard_rows = _read_shard_rows(output)
+        store = get_results_store(output) if USE_RESULTS_DB else None
+        for url, (status, row) in shard_rows.items():
+            if url in rows and rows[url][0] == STATUS_VALID:
+                continue
+            rows[url] = (status, row)
+            raw = store.raw_response(url) if store is not None and status != STATUS_FAILED else None
+            if raw:
+                messages[url] = raw
+        if store is not None:
+            content.extend(store.content_entries())
+            close_results_store(output)
+
+    # Write in data.csv order; URLs no longer in data.csv go last
+    order = [url for url in get_unique_urls(data_file) if url in rows] if data_file.exists() else []
+    known = set(order)
+    order += [url for url in rows if url not in known]
+
+    processed = get_processed_urls(output_file)
+    for url in order:
+        if processed.status(url) == STATUS_VALID:
+            continue
+        status, row = rows[url]
+        if status == STATUS_FAILED:
+            log_failed_url(url, row[METRICS_COLUMNS[0]][len('FAILED:'):].strip(), output_file)
+        else:
+            message = messages.get(url) or json.dumps(
+                {col: row.get(col, '') for col in METRICS_COLUMNS}, ensure_ascii=False)
+            append_result_to_csv_parsed(url, message, output_file)
+        counts[status] = counts.get(status, 0) + 1
+
+    if content:
+        added = get_results_store(output_file).import_content(content)
+        logger.info(f"Merged {added} content hashes into the results store of {output_file}")
+
+    for shard_dir in shard_dirs:
+        paths = shard_paths(shard_dir)
+        if paths['metrics'].exists() and METRICS_FILE:
+            with open(METRICS_FILE, 'a', encoding='utf-8') as out:
+                out.write(paths['metrics'].read_text(encoding='utf-8'))
+        if paths['downloads'].exists():
+            for video in paths['downloads'].iterdir():
+                target = DOWNLOADS_DIR / video.name
+                if video.is_file() and not target.exists():
+                    video.replace(target)
+            shutil.rmtree(paths['downloads'], ignore_errors=True)
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    logger.info(f"Merged {len(shard_dirs)} shards into {output_file}: {counts}")
+    return counts
+
+
+def main():
+    """Main function for standalone execution."""
+    parser = argparse.ArgumentParser(description='Run the pipeline in several worker processes')
+    parser.add_argument('--shards', type=int, default=SHARD_COUNT, help=f'Worker processes (default: {SHARD_COUNT})')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Videos waiting on disk per shard')
+    parser.add_argument('--ai-sessions', type=int, default=AI_CONCURRENCY, help='AI chat sessions per shard')
+    parser.add_argument('--no-delete', action='store_true', help='Do not delete videos after successful upload')
+    parser.add_argument('--capture', choices=['dom', 'network'], default=RESPONSE_CAPTURE_MODE,
+                        help='How to capture the AI answer')
+    parser.add_argument('--prompt', type=str, default=DEFAULT_PROMPT, help='Custom prompt for AI analysis')
+    parser.add_argument('--headless', action='store_true', help='Run browsers in headless mode')
+    parser.add_argument('--merge-only', action='store_true', help='Only merge leftover shard results into output.csv')
+
+    args = parser.parse_args()
+
+    migrate_old_output_format()
+
+    # Results of an interrupted run first, so they count as processed
+    leftovers = merge_shards()
+    if leftovers:
+        print(f"Merged leftover shard results: {leftovers}")
+    if args.merge_only:
+        return
+
+    all_urls = get_unique_urls(DATA_FILE)
+    processed = get_processed_urls(OUTPUT_FILE)
+    pending = [url for url in all_urls if url not in processed]
+    if not pending:
+        print("\n✓ All videos already processed!")
+        return
+
+    shard_dirs = split_into_shards(pending, max(1, args.shards), {url: i for i, url in enumerate(all_urls)})
+    options = {
+        'headless': args.headless,
+        'prompt': args.prompt,
+        'batch_size': args.batch_size,
+        'delete_after_upload': not args.no_delete,
+        'ai_sessions': args.ai_sessions,
+        'capture_mode': args.capture,
+        # One content hash index for all shards
+        'content_file': OUTPUT_FILE,
+    }
+    if USE_RESULTS_DB:
+        # Synced with output.csv here, so the shards never rebuild it at the same time
+        get_results_store(OUTPUT_FILE)
+
+    print("\n" + "="*60)
+    print(f"SHARDED RUN: {len(pending)} URLs over {len(shard_dirs)} processes")
+    print("="*60 + "\n")
+
+    exit_codes = run_shards(shard_dirs, options)
+    counts = merge_shards()
+
+    print("\n" + "="*60)
+    print("SHARDED RUN COMPLETE")
+    print("="*60)
+    for shard_dir, code in zip(shard_dirs, exit_codes):
+        print(f"{shard_dir.name}: exit code {code}")
+    for status, count in sorted(counts.items()):
+        print(f"Merged {status}: {count}")
+    print(f"Results saved to: {OUTPUT_FILE}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Tests for the SQLite job queue shared by several worker processes.
+
+Every test runs real processes on a temporary jobs.db: concurrent leasing
+(every URL started once) with ordered output, lease expiry after a crashed worker, and stealing of
+URLs that were leased but not started.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_queue import JobQueue, JOB_DONE, JOB_FAILED, JOB_LEASED, JOB_PENDING  # noqa: E402
+from utils import METRICS_COLUMNS  # noqa: E402
+
+
+URLS = [f"https://www.tiktok.com/@queue/video/{7400000000000000000 + i}" for i in range(40)]
+
+
+def _response(url: str) -> str:
+    return "\n".join(f"{metric}: {url if metric == 'Creative Link' else 'value'}" for metric in METRICS_COLUMNS)
+
+
+def run_worker(db_path: str, output_file: str, worker: str, started, ready):
+    """Claim, start and complete URLs until the queue is empty (out of order finishes)."""
+    jobs = JobQueue(Path(db_path), output_file=Path(output_file))
+    rng = random.Random(worker)
+    ready.wait(30)
+    while True:
+        job = jobs.claim(worker)
+        if job is None:
+            break
+        seq, url = job
+        # Idle workers may steal the URL before it is started
+        if jobs.start(worker, url):
+            started.append((worker, url))
+            time.sleep(rng.uniform(0, 0.02))
+            jobs.complete(worker, url, response=_response(url))
+    jobs.close()
+
+
+def crash_after_claim(db_path: str, worker: str):
+    """Lease a URL and die without completing or releasing it."""
+    jobs = JobQueue(Path(db_path), output_file=None, lease_seconds=0.5)
+    jobs.claim(worker)
+    os._exit(1)
+
+
+def hold_leases(db_path: str, worker: str, count: int, leased, stolen_check, results):
+    """Lease URLs without starting them, then report which ones could still be started."""
+    jobs = JobQueue(Path(db_path), output_file=None)
+    urls = [jobs.claim(worker)[1] for _ in range(count)]
+    leased.set()
+    stolen_check.wait(10)
+    for url in urls:
+        results[url] = jobs.start(worker, url)
+    jobs.close()
+
+
+class JobQueueProcessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.db_path = self.root / "jobs.db"
+        self.output_file = self.root / "output.csv"
+        self.context = multiprocessing.get_context('spawn')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _queue(self, **kwargs) -> JobQueue:
+        jobs = JobQueue(self.db_path, **kwargs)
+        self.addCleanup(jobs.close)
+        return jobs
+
+    def _run(self, target, *args) -> int:
+        process = self.context.Process(target=target, args=args)
+        process.start()
+        process.join(60)
+        return process.exitcode
+
+    def test_workers_start_each_url_once_and_output_is_ordered(self):
+        jobs = self._queue(output_file=None)
+        jobs.enqueue(enumerate(URLS))
+
+        with self.context.Manager() as manager:
+            started = manager.list()
+            ready = manager.Barrier(3)
+            workers = [
+                self.context.Process(
+                    target=run_worker,
+                    args=(str(self.db_path), str(self.output_file), f"w{k}", started, ready)
+                )
+                for k in range(3)
+            ]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join(120)
+            started = list(started)
+
+        self.assertEqual([process.exitcode for process in workers], [0, 0, 0])
+        self.assertEqual(sorted(url for _, url in started), sorted(URLS))
+        self.assertGreater(len({worker for worker, _ in started}), 1)
+        self.assertEqual(jobs.counts(), {JOB_DONE: len(URLS)})
+
+        with open(self.output_file, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['url'] for row in rows], URLS)
+        self.assertEqual([row['Creative Link'] for row in rows], URLS)
+
+    def test_expired_lease_is_requeued_then_failed(self):
+        jobs = self._queue(output_file=None, lease_seconds=0.5, max_attempts=2)
+        jobs.enqueue([(0, URLS[0])])
+
+        self.assertEqual(self._run(crash_after_claim, str(self.db_path), "crashed-1"), 1)
+        self.assertEqual(jobs.counts(), {JOB_LEASED: 1})
+        time.sleep(0.6)
+
+        # The expired lease goes back to pending and is leased again
+        self.assertEqual(jobs.claim("w2"), (0, URLS[0]))
+        self.assertEqual(jobs.workers(), {"w2": 1})
+        jobs.release("w2")
+        self.assertEqual(jobs.counts(), {JOB_PENDING: 1})
+
+        # After max_attempts expired leases the URL is failed
+        self.assertEqual(self._run(crash_after_claim, str(self.db_path), "crashed-2"), 1)
+        time.sleep(0.6)
+        self.assertIsNone(jobs.claim("w3"))
+        self.assertEqual(jobs.counts(), {JOB_FAILED: 1})
+
+    def test_idle_worker_steals_unstarted_url(self):
+        jobs = self._queue(output_file=None)
+        jobs.enqueue(enumerate(URLS[:2]))
+
+        with self.context.Manager() as manager:
+            leased = manager.Event()
+            stolen_check = manager.Event()
+            results = manager.dict()
+            holder = self.context.Process(
+                target=hold_leases,
+                args=(str(self.db_path), "holder", 2, leased, stolen_check, results)
+            )
+            holder.start()
+            self.assertTrue(leased.wait(30))
+
+            stolen = jobs.claim("thief")
+            self.assertEqual(stolen, (0, URLS[0]))
+            self.assertTrue(jobs.start("thief", URLS[0]))
+            # The started URL stays with the thief; the other unstarted one is stolen next
+            self.assertEqual(jobs.claim("holder-2"), (1, URLS[1]))
+
+            stolen_check.set()
+            holder.join(30)
+            results = dict(results)
+
+        self.assertEqual(holder.exitcode, 0)
+        self.assertEqual(results, {URLS[0]: False, URLS[1]: False})
+        self.assertEqual(jobs.workers(), {"thief": 1, "holder-2": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Tests for NetworkResponseCapture against the mock chat server's SSE stream.
+
+The answer of benchmarks/mock_ai_server.py /api/chat/stream is delivered to
+the capture the way the browser page does: as a finished response body and
+as websocket frames, one event per frame.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+import asyncio
+import json
+import sys
+import unittest
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from json_scanner import IncrementalJSONScanner  # noqa: E402
+from mock_ai_server import MockAIConfig, start_mock_server  # noqa: E402
+from network_capture import NetworkResponseCapture, split_payloads  # noqa: E402
+from utils import METRICS_COLUMNS  # noqa: E402
+
+
+class CountingScanner(IncrementalJSONScanner):
+    """IncrementalJSONScanner that counts how often it starts over."""
+
+    def reset(self):
+        self.resets = getattr(self, 'resets', -1) + 1
+        super().reset()
+
+
+class FakeResponse:
+    """What the page's "response" event hands over: url, headers, text()."""
+
+    def __init__(self, url: str, body: str, content_type: str):
+        self.url = url
+        self.headers = {'content-type': content_type}
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+
+class FakeWebSocket:
+    def __init__(self, url: str):
+        self.url = url
+        self.handlers = {}
+
+    def on(self, event: str, handler):
+        self.handlers[event] = handler
+
+
+class FakePage:
+    """Records the event handlers NetworkResponseCapture registers."""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event: str, handler):
+        self.handlers[event] = handler
+
+
+class NetworkCaptureTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        config = MockAIConfig(upload_ms=0, first_token_ms=0, chunk_ms=0, kind="clean_json")
+        cls.server, page_url = start_mock_server(config)
+        cls.stream_url = page_url.replace('/chat', '/api/chat/stream')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.scanners = []
+
+    def _stream_body(self) -> str:
+        request = urllib.request.Request(
+            self.stream_url,
+            data=json.dumps({'prompt': 'Analyze this video', 'reasoning': 'Minimal'}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            self.assertEqual(response.headers.get('Content-Type'), 'text/event-stream')
+            return response.read().decode('utf-8')
+
+    def _make_check(self):
+        scanner = CountingScanner(METRICS_COLUMNS)
+        self.scanners.append(scanner)
+        return lambda text: scanner.feed(text).complete
+
+    def _assert_answer(self, text: str):
+        self.assertIsNotNone(text)
+        self.assertEqual(list(json.loads(text)), METRICS_COLUMNS)
+
+    def test_sse_response_body(self):
+        body = self._stream_body()
+
+        async def run():
+            page = FakePage()
+            capture = NetworkResponseCapture(page)
+            capture.arm()
+            waiter = asyncio.create_task(capture.wait(5, self._make_check))
+            await asyncio.sleep(0)
+            # An unrelated backend call first, then the finished answer stream
+            await page.handlers['response'](FakeResponse(
+                self.stream_url.replace('stream', 'title'), '{"message": "Video analysis"}', 'application/json'))
+            await page.handlers['response'](FakeResponse(self.stream_url, body, 'text/event-stream'))
+            return await waiter
+
+        self._assert_answer(asyncio.run(run()))
+        # The websocket check plus one check per response body, none started over
+        self.assertEqual(len(self.scanners), 3)
+        self.assertEqual([scanner.resets for scanner in self.scanners], [0, 0, 0])
+
+    def test_websocket_frames_use_one_scanner(self):
+        events = [f"{event}\n\n" for event in self._stream_body().split("\n\n") if event.strip()]
+        self.assertGreater(len(events), 10)
+
+        async def run():
+            page = FakePage()
+            capture = NetworkResponseCapture(page)
+            capture.arm()
+            websocket = FakeWebSocket(self.stream_url)
+            page.handlers['websocket'](websocket)
+            waiter = asyncio.create_task(capture.wait(5, self._make_check))
+            for event in events:
+                websocket.handlers['framereceived'](event)
+                await asyncio.sleep(0)
+                if waiter.done():
+                    break
+            return await waiter, capture.texts()
+
+        text, texts = asyncio.run(run())
+        self._assert_answer(text)
+        self.assertEqual(len(texts), 1)
+        # One scanner followed the growing text and never started over
+        self.assertEqual(len(self.scanners), 1)
+        self.assertEqual(self.scanners[0].resets, 0)
+        self.assertGreater(len(split_payloads(''.join(events))), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for OrderedResultWriter: rows reach output.csv in input order even
+when workers finish out of order, skip URLs or fail.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+import csv
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import METRICS_COLUMNS, OrderedResultWriter  # noqa: E402
+
+
+URLS = [f"https://www.tiktok.com/@writer/video/{7500000000000000000 + i}" for i in range(30)]
+
+
+def _response(url: str) -> str:
+    return "\n".join(f"{metric}: {url if metric == 'Creative Link' else 'value'}" for metric in METRICS_COLUMNS)
+
+
+class OrderedResultWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_file = Path(self.tmp.name) / "output.csv"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _rows(self):
+        if not self.output_file.exists():
+            return []
+        with open(self.output_file, 'r', encoding='utf-8', newline='') as f:
+            return list(csv.reader(f))[1:]
+
+    def _deliver(self, writer: OrderedResultWriter, seq: int):
+        url = URLS[seq]
+        if seq % 7 == 3:
+            writer.skip(seq)
+        elif seq % 5 == 1:
+            writer.add_failure(seq, url, "Download failed or timeout")
+        else:
+            writer.add_result(seq, url, _response(url))
+
+    def _expected(self):
+        rows = []
+        for seq, url in enumerate(URLS):
+            if seq % 7 == 3:
+                continue
+            if seq % 5 == 1:
+                rows.append((url, "FAILED: Download failed or timeout"))
+            else:
+                rows.append((url, "value"))
+        return rows
+
+    def test_out_of_order_results_are_written_in_input_order(self):
+        writer = OrderedResultWriter(self.output_file)
+        order = list(range(len(URLS)))
+        random.Random(42).shuffle(order)
+        for seq in order:
+            self._deliver(writer, seq)
+        writer.close()
+
+        rows = self._rows()
+        self.assertEqual([(row[0], row[1]) for row in rows], self._expected())
+        for row in rows:
+            if not row[1].startswith("FAILED"):
+                self.assertEqual(row[1 + METRICS_COLUMNS.index('Creative Link')], row[0])
+
+    def test_rows_wait_for_earlier_sequence_numbers(self):
+        writer = OrderedResultWriter(self.output_file)
+        writer.add_result(2, URLS[2], _response(URLS[2]))
+        writer.add_failure(1, URLS[1], "AI upload failed")
+        self.assertEqual(self._rows(), [])
+
+        writer.skip(0)
+        self.assertEqual([row[0] for row in self._rows()], [URLS[1], URLS[2]])
+
+        writer.add_result(4, URLS[4], _response(URLS[4]))
+        self.assertEqual(len(self._rows()), 2)
+        writer.add_result(3, URLS[3], _response(URLS[3]))
+        self.assertEqual([row[0] for row in self._rows()], URLS[1:5])
+
+    def test_close_writes_rows_behind_a_gap(self):
+        writer = OrderedResultWriter(self.output_file)
+        writer.add_result(0, URLS[0], _response(URLS[0]))
+        # seq 1 never finishes (cancelled work)
+        writer.add_result(3, URLS[3], _response(URLS[3]))
+        writer.add_failure(2, URLS[2], "AI upload failed")
+        self.assertEqual([row[0] for row in self._rows()], [URLS[0]])
+
+        writer.close()
+        self.assertEqual([row[0] for row in self._rows()], [URLS[0], URLS[2], URLS[3]])
+
+
+if __name__ == "__main__":
+    unittest.main()
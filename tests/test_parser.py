@@ -0,0 +1,136 @@
+"""
+Golden tests for parse_message_to_dict on non-JSON responses.
+
+The reference is the fallback of the per-metric regex parser that
+parse_message_to_dict replaced. Besides the values, it rewrites bare metric
+words ("brand" -> "Brand: ") and breaks the "Brand Presence // ..." headings,
+so values are compared case- and colon-insensitively and only for the
+metrics whose values contain metric words.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+import re
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import METRICS_COLUMNS, parse_message_to_dict  # noqa: E402
+
+
+# Values that contain other metric headings as plain words, some of them
+# at the start of the value ("| Brand | Brand H |")
+METRIC_WORD_VALUES = {
+    "Brand": "Brand H",
+    "Messaging // Messaging Summary": "A mother shows how the brand keeps skin soft in every setting of the period",
+    "Messaging // Emotional Tone": "Category leader, warm",
+    "Messaging // Emotional Appeal": "Warm, the category leader tone",
+    "Visuals // Color Palette": "Period pastels",
+    "Visuals // Setting": "Kitchen shown on the platform feed",
+    "Talent // Talent Type": "Creator linked via the creative link in bio",
+}
+
+
+def legacy_parse_message_to_dict(message: str) -> dict:
+    """Fallback of the former parser: normalize headings, then one regex per metric."""
+    text = message.strip()
+    for prefix in (r'^AI\s*', r'My thought process\s*', r'MetricsValue\s*', r'Metrics\s*Value\s*',
+                   r'\|\s*Metrics\s*\|\s*Value\s*\|', r'\|[-\s]+\|[-\s]+\|'):
+        text = re.sub(prefix, '', text, flags=re.IGNORECASE)
+
+    for metric in METRICS_COLUMNS:
+        text = re.sub(rf'(?i){re.escape(metric)}\s*(?=[^:\|\n])', metric + ': ', text)
+    for metric in METRICS_COLUMNS:
+        text = re.sub(rf'(?<!\n)({re.escape(metric)})', r'\n\1', text, flags=re.IGNORECASE)
+
+    result = {}
+    for i, metric in enumerate(METRICS_COLUMNS):
+        if i < len(METRICS_COLUMNS) - 1:
+            pattern = rf'{re.escape(metric)}\s*[:\|]?\s*(.+?)(?={re.escape(METRICS_COLUMNS[i + 1])}|$)'
+        else:
+            pattern = rf'{re.escape(metric)}\s*[:\|]?\s*(.+?)$'
+        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        value = ""
+        if match:
+            value = re.sub(r'\s*\|\s*', '', match.group(1).strip())
+            value = re.sub(r'\s+', ' ', value)
+        result[metric] = value
+    return result
+
+
+def _words(value: str) -> str:
+    """Value without the legacy parser's inserted colons, case or extra spaces."""
+    return re.sub(r'\s+', ' ', value.replace(':', ' ')).strip().lower()
+
+
+def _values() -> dict:
+    values = {metric: f"value {index}" for index, metric in enumerate(METRICS_COLUMNS)}
+    values.update({
+        "Brand": "Dove",
+        "Category": "Skin Care",
+        "Platform": "TikTok",
+        "Creative Link": "https://www.tiktok.com/@creator/video/7033924705681620000",
+        "Period": "Q3 2025",
+    })
+    values.update(METRIC_WORD_VALUES)
+    return values
+
+
+def render_lines(values: dict) -> str:
+    return "\n".join(f"{metric}: {value}" for metric, value in values.items())
+
+
+def render_table(values: dict) -> str:
+    rows = "\n".join(f"| {metric} | {value} |" for metric, value in values.items())
+    return "Here's the analysis of the video:\n| Metrics | Value |\n|---|---|\n" + rows
+
+
+class MetricWordsInValuesTest(unittest.TestCase):
+    """Metric words inside a value must not end the value."""
+
+    def test_matches_legacy_parser(self):
+        values = _values()
+        for name, render in (("lines", render_lines), ("table", render_table)):
+            message = render(values)
+            legacy = legacy_parse_message_to_dict(message)
+            parsed = parse_message_to_dict(message)
+            for metric in METRIC_WORD_VALUES:
+                with self.subTest(shape=name, metric=metric):
+                    self.assertEqual(_words(parsed[metric]), _words(legacy[metric]))
+
+    def test_golden_values(self):
+        values = _values()
+        for name, render in (("lines", render_lines), ("table", render_table)):
+            parsed = parse_message_to_dict(render(values))
+            for metric, value in values.items():
+                with self.subTest(shape=name, metric=metric):
+                    self.assertEqual(parsed[metric], value)
+
+    def test_single_line(self):
+        metric = "Messaging // Messaging Summary"
+        message = f"{metric}: {METRIC_WORD_VALUES[metric]}"
+        self.assertEqual(parse_message_to_dict(message)[metric], METRIC_WORD_VALUES[metric])
+        self.assertEqual(_words(legacy_parse_message_to_dict(message)[metric]), _words(METRIC_WORD_VALUES[metric]))
+
+    def test_table_cell_starting_with_metric_word(self):
+        for row, metric, value in (
+            ("| Brand | Brand H |", "Brand", "Brand H"),
+            ("| Messaging // Emotional Tone | Category leader, warm |",
+             "Messaging // Emotional Tone", "Category leader, warm"),
+        ):
+            with self.subTest(row=row):
+                self.assertEqual(parse_message_to_dict(row)[metric], value)
+                self.assertEqual(_words(legacy_parse_message_to_dict(row)[metric]), _words(value))
+
+    def test_glued_page_text(self):
+        message = "AIMy thought processMetricsValueBusiness UnitNutritionCategorySkin CareBrandBrand APlatformTikTok"
+        parsed = parse_message_to_dict(message)
+        self.assertEqual(parsed["Category"], "Skin Care")
+        self.assertEqual(parsed["Brand"], "Brand A")
+        self.assertEqual(parsed["Platform"], "TikTok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Tests for two StreamingPipeline workers sharing one job queue.
+
+Both workers download into the same folder and pull from the same jobs.db;
+a third worker leases a URL and stalls without starting it. The browser
+downloader and AI uploader are replaced by doubles (downloader_cls /
+uploader_cls) that record overlapping downloads and videos deleted while
+they are being uploaded.
+
+pipeline.py imports Playwright, so the tests are skipped without it.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+import asyncio
+import contextlib
+import csv
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_queue import JobQueue, JOB_DONE  # noqa: E402
+from metrics import StageMetrics  # noqa: E402
+from selector_cache import SelectorResolver  # noqa: E402
+from utils import METRICS_COLUMNS, get_video_path  # noqa: E402
+
+try:
+    from pipeline import StreamingPipeline  # noqa: E402
+except ImportError:  # Playwright not installed
+    StreamingPipeline = None
+
+
+URLS = [f"https://www.tiktok.com/@pipeline/video/{7600000000000000000 + i}" for i in range(6)]
+
+
+def _response(url: str) -> str:
+    return "\n".join(f"{metric}: {url if metric == 'Creative Link' else 'value'}" for metric in METRICS_COLUMNS)
+
+
+class WorkerState:
+    """What both workers' downloads and uploads did, shared by the doubles."""
+
+    def __init__(self):
+        self.downloading = set()
+        self.uploading = set()
+        self.uploaded = []
+        self.errors = []
+
+
+class FakeDownloader:
+    """VideoDownloader double: writes the URL as the video after `delay` seconds."""
+
+    state: WorkerState = None
+    delay = 0.05
+    max_concurrency = 2
+
+    def __init__(self, headless=False, downloads_dir=None, metrics=None, selectors=None):
+        self.downloads_dir = downloads_dir
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def download_video(self, url: str, index: int = 0):
+        path = get_video_path(url, index, self.downloads_dir)
+        if url in self.state.downloading:
+            self.state.errors.append(f"{url} downloaded by two workers at once")
+        if path in self.state.uploading:
+            self.state.errors.append(f"{path.name} downloaded again while it is uploaded")
+        self.state.downloading.add(url)
+        try:
+            await asyncio.sleep(self.delay)
+            path.write_bytes(url.encode('utf-8'))
+        finally:
+            self.state.downloading.discard(url)
+        return path
+
+
+class FakeUploader:
+    """AIUploader double: checks the video stays on disk for the whole upload."""
+
+    state: WorkerState = None
+    delay = 0.05
+
+    def __init__(self, headless=False, prompt=None, ai_url=None, capture_mode=None, metrics=None, selectors=None):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def check_login_status(self) -> bool:
+        return True
+
+    async def process_video(self, url: str, video_path: Path, max_retries: int = 5, save_result: bool = False):
+        self.state.uploading.add(video_path)
+        try:
+            for _ in range(3):
+                if not video_path.exists():
+                    self.state.errors.append(f"{video_path.name} deleted while it is uploaded")
+                    return None
+                await asyncio.sleep(self.delay / 3)
+            self.state.uploaded.append(url)
+            return _response(url)
+        finally:
+            self.state.uploading.discard(video_path)
+
+
+class SlowUploader(FakeUploader):
+    delay = 0.5
+
+
+@unittest.skipIf(StreamingPipeline is None, "pipeline.py needs Playwright")
+class PipelineJobQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.db_path = self.root / "jobs.db"
+        self.output_file = self.root / "output.csv"
+        self.downloads_dir = self.root / "downloads"
+        self.downloads_dir.mkdir()
+        self.state = WorkerState()
+        FakeDownloader.state = self.state
+        FakeUploader.state = self.state
+
+    def tearDown(self):
+        FakeDownloader.state = None
+        FakeUploader.state = None
+        self.tmp.cleanup()
+
+    def _queue(self) -> JobQueue:
+        jobs = JobQueue(self.db_path, output_file=self.output_file)
+        self.addCleanup(jobs.close)
+        return jobs
+
+    def _pipeline(self, worker: str, uploader_cls) -> StreamingPipeline:
+        pipeline_cls = type('TestPipeline', (StreamingPipeline,), {
+            'downloader_cls': FakeDownloader,
+            'uploader_cls': uploader_cls,
+        })
+        return pipeline_cls(
+            headless=True,
+            batch_size=2,
+            delete_after_upload=True,
+            ai_sessions=1,
+            output_file=self.output_file,
+            downloads_dir=self.downloads_dir,
+            metrics=StageMetrics(),
+            selectors=SelectorResolver(cache_file=None),
+            jobs=self._queue(),
+            worker_id=worker,
+            content_dedup=False
+        )
+
+    def test_two_workers_share_queue_and_downloads_dir(self):
+        jobs = self._queue()
+        jobs.enqueue(enumerate(URLS))
+        # A stalled worker leased the first URL and never started it
+        self.assertEqual(jobs.claim("stalled"), (0, URLS[0]))
+
+        fast = self._pipeline("fast", FakeUploader)
+        slow = self._pipeline("slow", SlowUploader)
+
+        async def run():
+            await asyncio.gather(fast.run(), slow.run())
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(run())
+
+        self.assertEqual(self.state.errors, [])
+        # Every URL uploaded exactly once, the stalled one by whoever stole it
+        self.assertEqual(sorted(self.state.uploaded), sorted(URLS))
+        self.assertEqual(jobs.counts(), {JOB_DONE: len(URLS)})
+        self.assertEqual(jobs.workers(), {})
+
+        with open(self.output_file, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['url'] for row in rows], URLS)
+        self.assertEqual([row['Creative Link'] for row in rows], URLS)
+        # Every video was deleted once its own worker had uploaded it
+        self.assertEqual(list(self.downloads_dir.iterdir()), [])
+        self.assertEqual(fast.stats['deleted'] + slow.stats['deleted'], len(URLS))
+
+
+if __name__ == "__main__":
+    unittest.main()
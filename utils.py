@@ -4,12 +4,31 @@ Utility functions for MVoice Automation
 import csv
 import re
 import json
+import os
+import math
+import hashlib
 import logging
+import tempfile
+import urllib.request
+from array import array
 from pathlib import Path
-from typing import List, Dict, Optional
-from urllib.parse import urlparse
+from typing import List, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
 
-from config import DATA_FILE, OUTPUT_FILE, DOWNLOADS_DIR
+from config import (
+    DATA_FILE,
+    OUTPUT_FILE,
+    DOWNLOADS_DIR,
+    USE_RESULTS_DB,
+    INPUT_DEDUP,
+    INPUT_BLOOM_CAPACITY,
+    INPUT_BLOOM_ERROR_RATE,
+    RESOLVE_SHORT_LINKS,
+    SHORT_LINK_CACHE_FILE,
+    CONTENT_HASH_MODE,
+    CONTENT_HASH_SAMPLE_BYTES,
+    CONTENT_HASH_SAMPLES
+)
 
 # Configure logging
 logging.basicConfig(
@@ -23,30 +42,179 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def read_urls_from_csv(file_path: Path = DATA_FILE) -> List[str]:
+def iter_urls_from_csv(file_path: Path = DATA_FILE) -> Iterator[str]:
     """
-    Read URLs from the 'url' column in CSV file.
+    Stream URLs from the 'url' column in CSV file, one row at a time.
     
     Args:
         file_path: Path to CSV file
         
-    Returns:
-        List of URLs
+    Yields:
+        URLs (stripped, empty cells skipped)
     """
-    urls = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or 'url' not in header:
+                return
+            col = header.index('url')
             for row in reader:
-                if 'url' in row and row['url']:
-                    urls.append(row['url'].strip())
-        logger.info(f"Read {len(urls)} URLs from {file_path}")
+                if len(row) > col:
+                    url = row[col].strip()
+                    if url:
+                        yield url
     except Exception as e:
         logger.error(f"Error reading CSV: {e}")
         raise
+
+
+def read_urls_from_csv(file_path: Path = DATA_FILE) -> List[str]:
+    """
+    Read URLs from the 'url' column in CSV file.
+    
+    Args:
+        file_path: Path to CSV file
+        
+    Returns:
+        List of URLs
+    """
+    urls = list(iter_urls_from_csv(file_path))
+    logger.info(f"Read {len(urls)} URLs from {file_path}")
     return urls
 
 
+class UrlDigestSet:
+    """
+    Exact set of URL keys, stored as 8-byte blake2b digests instead of strings.
+    
+    The digests live in an open-addressing hash table on an array('Q') that
+    is kept at most 70% full: 11-23 bytes per URL, against ~75 for a Python
+    set of ints and over 100 for a set of URL strings (measured by
+    benchmarks/bench_parser.py).
+    """
+    
+    _MAX_LOAD = 0.7
+    
+    def __init__(self, capacity: int = 1024):
+        size = 8
+        while size * self._MAX_LOAD < capacity:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._count = 0
+    
+    @staticmethod
+    def _digest(url: str) -> int:
+        digest = int.from_bytes(
+            hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest(), 'little'
+        )
+        # 0 marks an empty slot
+        return digest or 1
+    
+    @staticmethod
+    def _find(slots: array, digest: int) -> int:
+        """Slot holding digest, or the empty slot it goes into (linear probing)."""
+        mask = len(slots) - 1
+        i = digest & mask
+        while slots[i] and slots[i] != digest:
+            i = (i + 1) & mask
+        return i
+    
+    def _grow(self):
+        slots = array('Q', bytes(16 * len(self._slots)))
+        for digest in self._slots:
+            if digest:
+                slots[self._find(slots, digest)] = digest
+        self._slots = slots
+    
+    def add(self, url: str) -> bool:
+        """Add a URL; returns False if it was already in the set."""
+        digest = self._digest(url)
+        i = self._find(self._slots, digest)
+        if self._slots[i]:
+            return False
+        self._slots[i] = digest
+        self._count += 1
+        if self._count > len(self._slots) * self._MAX_LOAD:
+            self._grow()
+        return True
+    
+    def __contains__(self, url: str) -> bool:
+        digest = self._digest(url)
+        return self._slots[self._find(self._slots, digest)] == digest
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def memory_bytes(self) -> int:
+        """Size of the digest table."""
+        return self._slots.itemsize * len(self._slots)
+
+
+class BloomFilter:
+    """
+    Fixed-memory set of URL keys with a small false positive rate.
+    
+    A URL that was never added may be reported as present (about
+    error_rate of the time once `capacity` URLs are in), never the reverse.
+    """
+    
+    def __init__(self, capacity: int = INPUT_BLOOM_CAPACITY, error_rate: float = INPUT_BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+    
+    def _positions(self, url: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+    
+    def add(self, url: str) -> bool:
+        """Add a URL; returns False if it was (probably) already in the filter."""
+        added = False
+        for pos in self._positions(url):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                self._bits[pos >> 3] |= mask
+                added = True
+        self._count += added
+        return added
+    
+    def __contains__(self, url: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+    
+    def __len__(self) -> int:
+        return self._count
+
+
+def iter_unique_urls(file_path: Path = DATA_FILE, dedup: str = INPUT_DEDUP) -> Iterator[Tuple[int, str]]:
+    """
+    Stream the unique URLs of a CSV file without loading it.
+    
+    Args:
+        file_path: Path to CSV file
+        dedup: "digest" (exact) or "bloom" (fixed memory, see INPUT_DEDUP)
+        
+    Yields:
+        (index, url) pairs; index is the position among the unique URLs,
+        the same as enumerate(get_unique_urls())
+    """
+    seen = BloomFilter() if dedup == 'bloom' else UrlDigestSet()
+    total = 0
+    index = 0
+    for url in iter_urls_from_csv(file_path):
+        total += 1
+        if RESOLVE_SHORT_LINKS and is_short_link(url):
+            resolve_short_link(url)
+        if seen.add(url):
+            yield index, url
+            index += 1
+    logger.info(f"Found {index} unique URLs out of {total} total in {file_path}")
+
+
 def get_unique_urls(file_path: Path = DATA_FILE) -> List[str]:
     """
     Get unique URLs from CSV file.
@@ -57,10 +225,14 @@ def get_unique_urls(file_path: Path = DATA_FILE) -> List[str]:
     Returns:
         List of unique URLs
     """
-    urls = read_urls_from_csv(file_path)
-    unique_urls = list(dict.fromkeys(urls))  # Preserve order
-    logger.info(f"Found {len(unique_urls)} unique URLs out of {len(urls)} total")
-    return unique_urls
+    return [url for _, url in iter_unique_urls(file_path, dedup='digest')]
+
+
+# Display names for the Platform metric of a detect_platform() result
+PLATFORM_NAMES = {
+    'tiktok': 'TikTok',
+    'instagram': 'Instagram',
+}
 
 
 def detect_platform(url: str) -> str:
@@ -96,33 +268,94 @@ def generate_filename(url: str, index: int = 0) -> str:
         Filename string
     """
     platform = detect_platform(url)
-    
-    # Extract video ID from URL
-    if platform == 'tiktok':
-        match = re.search(r'/video/(\d+)', url)
-        video_id = match.group(1) if match else str(index)
-    elif platform == 'instagram':
-        match = re.search(r'/p/([A-Za-z0-9_-]+)', url)
-        video_id = match.group(1) if match else str(index)
-    else:
-        video_id = str(index)
-    
+    video_id = extract_video_id(url) or str(index)
     return f"{platform}_{video_id}.mp4"
 
 
-def get_video_path(url: str, index: int = 0) -> Path:
+# Video ID in the URL path per platform
+VIDEO_ID_PATTERNS = {
+    'tiktok': re.compile(r'/(?:video|v)/(\d+)'),
+    'instagram': re.compile(r'/(?:p|reels?|tv)/([A-Za-z0-9_-]+)'),
+}
+
+# TikTok share links that only redirect to the video
+SHORT_LINK_HOSTS = ('vm.tiktok.com', 'vt.tiktok.com')
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """
+    Get the platform video ID from a URL.
+    
+    Args:
+        url: Video URL
+        
+    Returns:
+        TikTok numeric ID / Instagram shortcode, or None if the URL has none
+    """
+    pattern = VIDEO_ID_PATTERNS.get(detect_platform(url))
+    match = pattern.search(urlparse(url.strip()).path) if pattern else None
+    return match.group(1) if match else None
+
+
+def get_video_path(url: str, index: int = 0, downloads_dir: Path = DOWNLOADS_DIR) -> Path:
     """
     Get the full path for a video file.
     
     Args:
         url: Video URL
         index: Index number
+        downloads_dir: Folder the video is downloaded to
         
     Returns:
         Full path to video file
     """
-    filename = generate_filename(url, index)
-    return DOWNLOADS_DIR / filename
+    path = downloads_dir / generate_filename(url, index)
+    if not path.exists():
+        # Downloaded before reel/tv links were named after their shortcode
+        legacy = downloads_dir / _legacy_filename(url, index)
+        if legacy != path and legacy.exists():
+            return legacy
+    return path
+
+
+def _legacy_filename(url: str, index: int = 0) -> str:
+    """Filename generate_filename gave before it used extract_video_id."""
+    platform = detect_platform(url)
+    patterns = {'tiktok': r'/video/(\d+)', 'instagram': r'/p/([A-Za-z0-9_-]+)'}
+    match = re.search(patterns[platform], url) if platform in patterns else None
+    return f"{platform}_{match.group(1) if match else index}.mp4"
+
+
+def hash_video_file(path: Path, mode: str = CONTENT_HASH_MODE) -> str:
+    """
+    Content hash of a downloaded video, to spot copies behind different URLs.
+    
+    "sampled" reads only the file size and CONTENT_HASH_SAMPLES evenly
+    spaced chunks; "full" reads every byte. Files no bigger than the
+    samples are always hashed in full.
+    
+    Args:
+        path: Video file
+        mode: "sampled" or "full"
+        
+    Returns:
+        "<mode>:<hex digest>"
+    """
+    size = path.stat().st_size
+    samples = max(2, CONTENT_HASH_SAMPLES)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if mode == 'full' or size <= samples * CONTENT_HASH_SAMPLE_BYTES:
+            mode = 'full'
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        else:
+            digest.update(size.to_bytes(8, 'little'))
+            step = (size - CONTENT_HASH_SAMPLE_BYTES) / (samples - 1)
+            for i in range(samples):
+                f.seek(int(i * step))
+                digest.update(f.read(CONTENT_HASH_SAMPLE_BYTES))
+    return f"{mode}:{digest.hexdigest()}"
 
 
 def save_results_to_csv(results: List[Dict], file_path: Path = OUTPUT_FILE):
@@ -165,6 +398,7 @@ def append_result_to_csv(url: str, message: str, file_path: Path = OUTPUT_FILE):
                 writer.writeheader()
             
             writer.writerow({'url': url, 'message': message})
+        _mark_processed(url, STATUS_VALID if message.strip() else STATUS_EMPTY, file_path)
         logger.info(f"Appended result for {url}")
     except Exception as e:
         logger.error(f"Error appending result: {e}")
@@ -183,12 +417,12 @@ def get_downloaded_videos() -> List[Path]:
     return videos
 
 
-def get_pending_videos(processed_urls: List[str]) -> List[tuple]:
+def get_pending_videos(processed_urls) -> List[tuple]:
     """
     Get videos that haven't been processed yet.
     
     Args:
-        processed_urls: List of already processed URLs
+        processed_urls: Already processed URLs (ProcessedIndex or any container)
         
     Returns:
         List of (url, video_path) tuples
@@ -206,30 +440,240 @@ def get_pending_videos(processed_urls: List[str]) -> List[tuple]:
     return pending
 
 
-def get_processed_urls(file_path: Path = OUTPUT_FILE) -> List[str]:
+def is_short_link(url: str) -> bool:
+    """True for TikTok share links (vm.tiktok.com/..., tiktok.com/t/...)."""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    return host in SHORT_LINK_HOSTS or ('tiktok' in host and parsed.path.startswith('/t/'))
+
+
+def _plain_url_key(url: str) -> str:
+    """Lowercase scheme/host, no fragment or trailing slash (no query for TikTok/Instagram)."""
+    parsed = urlparse(url.strip())
+    query = '' if detect_platform(url) != 'unknown' else parsed.query
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path.rstrip('/'), '', query, ''))
+
+
+def write_text_atomic(path: Path, text: str):
     """
-    Get list of already processed URLs from output file.
+    Replace a file's content in one step (temp file next to it + os.replace).
+    
+    The temp file name is unique per call, so processes saving the same
+    file at the same time never write into each other's temp file.
     
     Args:
-        file_path: Output CSV file path
+        path: File to write
+        text: New content (UTF-8)
+    """
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, prefix=f'{path.name}.',
+                                     suffix='.tmp', delete=False) as f:
+        f.write(text)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+# Short link key -> resolved URL, loaded from SHORT_LINK_CACHE_FILE on first use
+_short_links: Optional[Dict[str, str]] = None
+
+
+def _short_link_cache() -> Dict[str, str]:
+    global _short_links
+    if _short_links is None:
+        _short_links = {}
+        if SHORT_LINK_CACHE_FILE.exists():
+            try:
+                _short_links = json.loads(SHORT_LINK_CACHE_FILE.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable short link cache {SHORT_LINK_CACHE_FILE}: {e}")
+    return _short_links
+
+
+def resolve_short_link(url: str, timeout: float = 10) -> Optional[str]:
+    """
+    Follow a TikTok short link to the video URL (cached in SHORT_LINK_CACHE_FILE).
+    
+    Args:
+        url: Short link
+        timeout: Request timeout in seconds
         
     Returns:
-        List of processed URLs
+        Resolved URL, or None if it could not be resolved
     """
-    if not file_path.exists():
-        return []
+    cache = _short_link_cache()
+    key = _plain_url_key(url)
+    if key in cache:
+        return cache[key]
     
-    urls = []
+    request = urllib.request.Request(url.strip(), headers={'User-Agent': 'Mozilla/5.0'})
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if 'url' in row:
-                    urls.append(row['url'])
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            resolved = response.geturl()
     except Exception as e:
-        logger.warning(f"Error reading processed URLs: {e}")
+        logger.warning(f"Could not resolve short link {url}: {e}")
+        return None
     
-    return urls
+    if not extract_video_id(resolved):
+        logger.warning(f"Short link {url} did not lead to a video: {resolved}")
+        return None
+    cache[key] = resolved
+    try:
+        write_text_atomic(SHORT_LINK_CACHE_FILE, json.dumps(cache, indent=2))
+    except OSError as e:
+        logger.warning(f"Could not save short link cache: {e}")
+    return resolved
+
+
+def normalize_url(url: str) -> str:
+    """
+    Key used to match the same video across data.csv, output.csv and indexes.
+    
+    TikTok/Instagram URLs become "platform:video_id", so tracking
+    parameters, mobile hosts, trailing slashes and (already resolved)
+    short links of one video share a key. Other URLs keep their query but
+    lose the fragment and trailing slash.
+    
+    Args:
+        url: Video URL
+        
+    Returns:
+        Canonical URL key
+    """
+    video_id = extract_video_id(url)
+    if video_id is None and is_short_link(url):
+        resolved = _short_link_cache().get(_plain_url_key(url))
+        if resolved:
+            url = resolved
+            video_id = extract_video_id(url)
+    if video_id is not None:
+        return f"{detect_platform(url)}:{video_id}"
+    return _plain_url_key(url)
+
+
+# Result statuses tracked by ProcessedIndex
+STATUS_VALID = 'valid'    # Row has at least one real metric value
+STATUS_EMPTY = 'empty'    # Row is empty or only echoes column names
+STATUS_FAILED = 'failed'  # Row written by log_failed_url ("FAILED: ...")
+
+
+def row_status(row: dict) -> str:
+    """
+    Classify an output.csv row as valid, empty/header-like or failed.
+    
+    Args:
+        row: Row dict from csv.DictReader (or parsed metrics)
+        
+    Returns:
+        STATUS_VALID, STATUS_EMPTY or STATUS_FAILED
+    """
+    # log_failed_url writes (url, message); in a parsed-format file the
+    # message lands in the first metric column
+    for col in ('message', METRICS_COLUMNS[0]):
+        if (row.get(col) or '').startswith('FAILED:'):
+            return STATUS_FAILED
+    if is_row_empty_or_header(row):
+        return STATUS_EMPTY
+    return STATUS_VALID
+
+
+class ProcessedIndex:
+    """
+    Processed URL keys and their result status for one output file.
+    
+    Built from the output CSV once, then kept current by the append
+    functions, so membership and status checks are O(1) and the file is
+    not rescanned.
+    """
+    
+    def __init__(self, file_path: Path = OUTPUT_FILE):
+        self.file_path = file_path
+        self._status: Dict[str, str] = {}
+        self._load()
+    
+    def _load(self):
+        if not self.file_path.exists():
+            return
+        
+        # The SQLite store already holds one status per URL; no CSV scan needed
+        store = _results_store(self.file_path)
+        if store is not None:
+            self._status = store.statuses()
+            return
+        
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    if 'url' in row and row['url'] is not None:
+                        self.set_status(row['url'], row_status(row))
+        except Exception as e:
+            logger.warning(f"Error reading processed URLs: {e}")
+    
+    def set_status(self, url: str, status: str):
+        """
+        Record the status of a row written for a URL.
+        
+        A valid result is never downgraded by a later failed/empty row, so
+        a retried URL with one good row counts as done.
+        """
+        key = normalize_url(url)
+        if self._status.get(key) != STATUS_VALID:
+            self._status[key] = status
+    
+    def status(self, url: str) -> Optional[str]:
+        """Get the status for a URL, or None if it has no row yet."""
+        return self._status.get(normalize_url(url))
+    
+    def __contains__(self, url: str) -> bool:
+        return normalize_url(url) in self._status
+    
+    def __len__(self) -> int:
+        return len(self._status)
+
+
+# One shared index per output file (keyed by resolved path)
+_processed_indexes: Dict[Path, ProcessedIndex] = {}
+
+
+def get_processed_urls(file_path: Path = OUTPUT_FILE) -> ProcessedIndex:
+    """
+    Get the index of already processed URLs from output file.
+    
+    The index is built on first use and shared by every caller, so all
+    entry points see URLs appended later in the run.
+    
+    Args:
+        file_path: Output CSV file path
+        
+    Returns:
+        ProcessedIndex supporting `url in index` and len()
+    """
+    key = Path(file_path).resolve()
+    if key not in _processed_indexes:
+        _processed_indexes[key] = ProcessedIndex(Path(file_path))
+    return _processed_indexes[key]
+
+
+def _mark_processed(url: str, status: str, file_path: Path):
+    """Keep an already built processed index in sync after an append."""
+    index = _processed_indexes.get(Path(file_path).resolve())
+    if index is not None:
+        index.set_status(url, status)
+
+
+def _results_store(file_path: Path):
+    """Get the SQLite results store behind an output file (None if disabled/unavailable)."""
+    if not USE_RESULTS_DB:
+        return None
+    # Imported here because results_store itself imports from utils
+    from results_store import get_results_store
+    try:
+        return get_results_store(file_path)
+    except Exception as e:
+        logger.warning(f"Results store unavailable: {e}")
+        return None
 
 
 def is_row_empty_or_header(row: dict) -> bool:
@@ -239,7 +683,7 @@ def is_row_empty_or_header(row: dict) -> bool:
     """
     # Check if all metric columns are empty or just echoing the column name
     for col in METRICS_COLUMNS:
-        val = row.get(col, "").strip()
+        val = (row.get(col) or "").strip()
         if val and val.lower() != col.lower():
             return False  # At least one real value exists
     return True
@@ -247,20 +691,13 @@ def is_row_empty_or_header(row: dict) -> bool:
 
 def should_attempt_ai_upload(url: str, output_file: Path) -> bool:
     """
-    Return True if the given URL in output.csv is missing, or its row is empty/just header-like.
+    Return True if the given URL in output.csv is missing, or its row is empty/just header-like
+    or a failure row.
+    
+    Uses the shared in-memory status index, so output.csv is read once per run
+    rather than once per video.
     """
-    if not output_file.exists():
-        return True
-    with open(output_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row.get('url', '').strip() == url.strip():
-                # Found the row for this URL
-                if is_row_empty_or_header(row):
-                    return True  # Needs retry
-                else:
-                    return False  # Already has valid result
-    return True  # Not found at all, so should attempt
+    return get_processed_urls(output_file).status(url) != STATUS_VALID
 
 
 def clean_message(message: str) -> str:
@@ -289,6 +726,7 @@ def log_failed_url(url: str, reason: str, file_path: Path = OUTPUT_FILE):
         reason: Reason for failure
         file_path: Output file path
     """
+    store = _results_store(file_path)
     file_exists = file_path.exists()
     
     try:
@@ -300,7 +738,10 @@ def log_failed_url(url: str, reason: str, file_path: Path = OUTPUT_FILE):
                 writer.writeheader()
             
             writer.writerow({'url': url, 'message': f'FAILED: {reason}'})
+        _mark_processed(url, STATUS_FAILED, file_path)
         logger.warning(f"Logged failed URL: {url} - {reason}")
+        if store is not None:
+            store.record_failure(url, reason)
     except Exception as e:
         logger.error(f"Error logging failed URL: {e}")
 
@@ -360,39 +801,101 @@ METRICS_COLUMNS = [
 ]
 
 
+# Common prefixes like "AI", "My thought process", "MetricsValue" that the
+# chat UI puts in front of the answer
+_MESSAGE_PREFIX_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'^AI\s*',
+        r'My thought process\s*',
+        r'MetricsValue\s*',
+        r'Metrics\s*Value\s*',
+        r'\|\s*Metrics\s*\|\s*Value\s*\|',
+        r'\|[-\s]+\|[-\s]+\|',
+    )
+]
+
+_CODE_FENCE_PATTERN = re.compile(r'```\w*')
+
+# Every metric heading in one alternation, longest first: at a given position
+# "Brand Presence // Brand Prominence" must win over the bare "Brand" heading
+_METRIC_ALTERNATION = '|'.join(
+    re.escape(metric) for metric in sorted(METRICS_COLUMNS, key=len, reverse=True)
+)
+# Headings of separated text ("Brand: X" lines, "| Brand | X |" rows) only
+# count at a line start, in a table row's first cell or right before a colon
+# (or a truncated JSON key's closing quote), so a metric word inside a value
+# ("shows how the brand ...", "| Brand | Brand H |") does not end it
+_METRIC_HEADING_PATTERN = re.compile(
+    rf'^[ \t]*(?:\|[ \t]*)?({_METRIC_ALTERNATION})|({_METRIC_ALTERNATION})(?="?[ \t]*:)',
+    re.IGNORECASE | re.MULTILINE
+)
+# Page text with headings glued to their values ("BrandXCategoryY")
+_GLUED_METRIC_HEADING_PATTERN = re.compile(_METRIC_ALTERNATION, re.IGNORECASE)
+_SEPARATED_TEXT_PATTERN = re.compile(rf'[\n|]|(?:{_METRIC_ALTERNATION})[ \t]*:', re.IGNORECASE)
+_METRIC_BY_LOWER = {metric.lower(): metric for metric in METRICS_COLUMNS}
+_METRIC_ORDER = {metric: index for index, metric in enumerate(METRICS_COLUMNS)}
+
+# Separator between a heading and its value ("Brand: X", "| Brand | X |", "BrandX")
+_VALUE_SEPARATOR_PATTERN = re.compile(r'\s*[:\|]?\s*')
+_PIPE_PATTERN = re.compile(r'\s*\|\s*')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _find_metric_headings(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Locate the metric headings of a non-JSON response.
+    
+    Args:
+        text: Response text without the page prefix
+        
+    Returns:
+        (start, end, metric) per heading, in text order
+    """
+    if _SEPARATED_TEXT_PATTERN.search(text):
+        return [
+            (match.start(), match.end(), _METRIC_BY_LOWER[(match.group(1) or match.group(2)).lower()])
+            for match in _METRIC_HEADING_PATTERN.finditer(text)
+        ]
+
+    # Glued page text follows the METRICS_COLUMNS order, so a heading that
+    # does not come after the previous one is part of a value ("BrandBrand A")
+    headings = []
+    last_index = -1
+    for match in _GLUED_METRIC_HEADING_PATTERN.finditer(text):
+        metric = _METRIC_BY_LOWER[match.group(0).lower()]
+        if _METRIC_ORDER[metric] > last_index:
+            headings.append((match.start(), match.end(), metric))
+            last_index = _METRIC_ORDER[metric]
+    return headings
+
+
 def parse_message_to_dict(message: str) -> Dict[str, str]:
     """
     Parse AI response message into a dictionary of metrics.
     
+    A JSON object in the response is used directly; otherwise the text is
+    tokenized in a single pass over all metric headings and each value is
+    the text between its heading and the next one. Headings only count at a
+    line start, in a table row's first cell or before a colon, so metric
+    words inside a value are kept.
+    
     Args:
-        message: Raw message from AI (flattened table format)
+        message: Raw message from AI (JSON or flattened table format)
         
     Returns:
         Dictionary with metric names as keys and values
     """
-    result = {}
-    
     # Clean the message
     text = message.strip()
-    
-    # Remove common prefixes like "AI", "My thought process", "MetricsValue"
-    prefixes_to_remove = [
-        r'^AI\s*',
-        r'My thought process\s*',
-        r'MetricsValue\s*',
-        r'Metrics\s*Value\s*',
-        r'\|\s*Metrics\s*\|\s*Value\s*\|',
-        r'\|[-\s]+\|[-\s]+\|',
-    ]
-    for prefix in prefixes_to_remove:
-        text = re.sub(prefix, '', text, flags=re.IGNORECASE)
+    for pattern in _MESSAGE_PREFIX_PATTERNS:
+        text = pattern.sub('', text)
 
     # First attempt: try to extract and parse a JSON object from the response.
     # This supports the new JSON-first prompt format.
     try:
         # Strip common code fence wrappers
-        text_no_fence = re.sub(r'```\w*', '', text)
-        text_no_fence = re.sub(r'```', '', text_no_fence)
+        text_no_fence = _CODE_FENCE_PATTERN.sub('', text)
 
         # Find the first JSON object in the text by locating the first '{' and the matching last '}'
         first_brace = text_no_fence.find('{')
@@ -423,49 +926,24 @@ def parse_message_to_dict(message: str) -> Dict[str, str]:
         # If JSON extraction/parsing fails, continue to fallback parsing below
         pass
 
-    # Normalization: if AI concatenates metric names directly with values
-    # (e.g. "BrandNamePlatform..."), insert a ': ' after metric headings
-    # when there is no existing separator (':' or '|' or newline).
-    for metric in METRICS_COLUMNS:
-        escaped = re.escape(metric)
-        try:
-            text = re.sub(rf'(?i){escaped}\s*(?=[^:\|\n])', metric + ': ', text)
-        except re.error:
-            # skip problematic metric regex
-            continue
-
-    # Additional normalization: ensure each metric starts on a new line
-    for metric in METRICS_COLUMNS:
-        escaped = re.escape(metric)
-        try:
-            # insert newline before metric if it's not already at line start
-            text = re.sub(rf'(?<!\n)({escaped})', r'\n\1', text, flags=re.IGNORECASE)
-        except re.error:
-            continue
+    # Fallback: flattened table / "Metric: value" text
+    headings = _find_metric_headings(text)
     
-    # Try to extract values for each metric
-    for i, metric in enumerate(METRICS_COLUMNS):
-        # Escape special regex characters in metric name
-        escaped_metric = re.escape(metric)
-        
-        # Determine the next metric for boundary
-        if i < len(METRICS_COLUMNS) - 1:
-            next_metric = re.escape(METRICS_COLUMNS[i + 1])
-            # Pattern: metric name followed by value, ending before next metric
-            pattern = rf'{escaped_metric}\s*[:\|]?\s*(.+?)(?={next_metric}|$)'
-        else:
-            # Last metric - capture everything after it
-            pattern = rf'{escaped_metric}\s*[:\|]?\s*(.+?)$'
+    result = {metric: "" for metric in METRICS_COLUMNS}
+    seen = set()
+    for i, (_, heading_end, metric) in enumerate(headings):
+        # First occurrence of a heading wins
+        if metric in seen:
+            continue
+        seen.add(metric)
         
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            value = match.group(1).strip()
-            # Clean up pipe characters and extra whitespace
-            value = re.sub(r'\s*\|\s*', '', value)
-            value = re.sub(r'\s+', ' ', value)
-            result[metric] = value
-        else:
-            result[metric] = ""
+        value_end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        value_start = _VALUE_SEPARATOR_PATTERN.match(text, heading_end, value_end).end()
+        value = text[value_start:value_end].strip()
+        # Clean up pipe characters and extra whitespace
+        value = _PIPE_PATTERN.sub('', value)
+        value = _WHITESPACE_PATTERN.sub(' ', value)
+        result[metric] = value
     
     return result
 
@@ -479,6 +957,7 @@ def append_result_to_csv_parsed(url: str, message: str, file_path: Path = OUTPUT
         message: AI generated message
         file_path: Output file path
     """
+    store = _results_store(file_path)
     file_exists = file_path.exists()
     
     # Parse message into metrics dictionary
@@ -499,10 +978,153 @@ def append_result_to_csv_parsed(url: str, message: str, file_path: Path = OUTPUT
                 writer.writeheader()
             
             writer.writerow(row)
+        _mark_processed(url, row_status(metrics), file_path)
         logger.info(f"Appended parsed result for {url}")
     except Exception as e:
         logger.error(f"Error appending result: {e}")
         raise
+    
+    # output.csv is the deliverable; a store error must not lose the run
+    if store is not None:
+        try:
+            store.record_result(url, metrics, raw_response=message)
+        except Exception as e:
+            logger.warning(f"Could not record result in results store: {e}")
+
+
+def reuse_content_result(content_hash: str, url: str, file_path: Path = OUTPUT_FILE) -> Optional[Tuple[str, str]]:
+    """
+    Look up an earlier valid result for the same video content.
+    
+    The response is returned as a JSON object whose URL-specific metrics
+    (Creative Link, Platform) describe `url` instead of the analyzed copy.
+    
+    Args:
+        content_hash: hash_video_file() of the downloaded video
+        url: Video URL the result is reused for
+        file_path: Output CSV whose results store holds the index
+        
+    Returns:
+        (url analyzed, AI response for url), or None
+    """
+    store = _results_store(file_path)
+    if store is None:
+        return None
+    try:
+        reused = store.reuse_content(content_hash)
+    except Exception as e:
+        logger.warning(f"Could not look up content hash: {e}")
+        return None
+    if reused is None:
+        return None
+    
+    original_url, message = reused
+    metrics = parse_message_to_dict(message)
+    metrics['Creative Link'] = url
+    platform = detect_platform(url)
+    if platform in PLATFORM_NAMES:
+        metrics['Platform'] = PLATFORM_NAMES[platform]
+    return original_url, json.dumps(metrics, ensure_ascii=False)
+
+
+def remember_content_result(content_hash: str, url: str, message: str, file_path: Path = OUTPUT_FILE):
+    """
+    Index a valid AI response by video content hash (empty/header-like answers are not reused).
+    
+    Args:
+        content_hash: hash_video_file() of the analyzed video
+        url: Video URL
+        message: Raw AI response
+        file_path: Output CSV whose results store holds the index
+    """
+    store = _results_store(file_path)
+    if store is None or row_status(parse_message_to_dict(message)) != STATUS_VALID:
+        return
+    try:
+        store.record_content(content_hash, url, message)
+    except Exception as e:
+        logger.warning(f"Could not record content hash: {e}")
+
+
+class PendingUrls:
+    """
+    Iterator of (seq, url) pairs for the URLs of data.csv not processed yet.
+    
+    data.csv is streamed, so work starts after the first pending row.
+    seq counts the pending URLs (for OrderedResultWriter); `indices`
+    maps a handed-out URL to its data.csv position (for get_video_path)
+    until a consumer pops it.
+    """
+    
+    def __init__(self, file_path: Path = DATA_FILE, processed: Optional["ProcessedIndex"] = None,
+                 dedup: str = INPUT_DEDUP):
+        self._urls = iter_unique_urls(file_path, dedup)
+        self.processed = processed
+        self.indices: Dict[str, int] = {}
+        self.count = 0
+        self.exhausted = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> Tuple[int, str]:
+        for index, url in self._urls:
+            if self.processed is not None and url in self.processed:
+                continue
+            self.indices[url] = index
+            self.count += 1
+            return self.count - 1, url
+        self.exhausted = True
+        raise StopIteration
+
+
+class OrderedResultWriter:
+    """
+    Write results to output.csv in input order while workers finish out of order.
+    
+    Every URL gets a sequence number when it is handed out. Rows are buffered
+    until all earlier sequence numbers have been written or skipped.
+    """
+    
+    def __init__(self, file_path: Path = OUTPUT_FILE, start: int = 0):
+        self.file_path = file_path
+        self._next_seq = start
+        self._pending: Dict[int, Optional[tuple]] = {}
+    
+    def add_result(self, seq: int, url: str, message: str):
+        """Queue a successful AI response for the given sequence number."""
+        self._pending[seq] = ('result', url, message)
+        self._flush()
+    
+    def add_failure(self, seq: int, url: str, reason: str):
+        """Queue a failure row for the given sequence number."""
+        self._pending[seq] = ('failed', url, reason)
+        self._flush()
+    
+    def skip(self, seq: int):
+        """Mark a sequence number that produces no row (e.g. already processed)."""
+        self._pending[seq] = None
+        self._flush()
+    
+    def close(self):
+        """Write whatever is still buffered (gaps come from cancelled work)."""
+        for seq in sorted(self._pending):
+            self._write(self._pending[seq])
+        self._pending.clear()
+    
+    def _flush(self):
+        while self._next_seq in self._pending:
+            self._write(self._pending.pop(self._next_seq))
+            self._next_seq += 1
+    
+    def _write(self, entry: Optional[tuple]):
+        if entry is None:
+            return
+        kind, url, text = entry
+        if kind == 'result':
+            append_result_to_csv_parsed(url, text, self.file_path)
+        else:
+            log_failed_url(url, text, self.file_path)
 
 
 def migrate_old_output_format(old_file: Path = OUTPUT_FILE, backup: bool = True):